@@ -0,0 +1,121 @@
+import numpy as np
+import pandas as pd
+
+from indice import limites_segmentos, primeiro_extremo
+
+
+# -----------------------------
+# Redução de pontos (downsampling) das curvas antes de enviar ao Plotly
+# -----------------------------
+# Os pontos são divididos em baldes contíguos (na ordem de aquisição) dentro
+# de cada ensaio; o primeiro e o último ponto de cada ensaio são sempre
+# mantidos, assim como o ponto de tensão máxima (pico / UCS).
+#
+# LTTB: em cada balde fica o ponto que forma o maior triângulo com a média do
+# balde anterior e a média do balde seguinte (variante vetorizada do LTTB
+# clássico, que usa o ponto escolhido no balde anterior e por isso é sequencial).
+# Mín/Máx: em cada balde ficam os pontos de menor e de maior valor em y.
+
+LTTB = "LTTB"
+MINMAX = "Mín/Máx"
+METODOS = [LTTB, MINMAX]
+
+
+def _baldes(inicios: np.ndarray, fins: np.ndarray, n: int):
+    # Retorna o início de cada balde; os baldes particionam todos os pontos.
+    # Ensaios com até n pontos ficam com um balde por ponto (nada é removido).
+    partes = []
+    for a, b in zip(inicios.tolist(), fins.tolist()):
+        tam = b - a
+        if tam <= max(n, 2):
+            partes.append(np.arange(a, b))
+        else:
+            k = max(n - 2, 1)
+            internos = a + 1 + (np.arange(k) * (tam - 2)) // k
+            partes.append(np.r_[a, np.unique(internos), b - 1])
+    if not partes:
+        return np.array([], dtype=np.int64)
+    return np.concatenate(partes).astype(np.int64)
+
+
+def indices_reduzidos(
+    x: np.ndarray,
+    y: np.ndarray,
+    n: int,
+    metodo: str = LTTB,
+    inicios: np.ndarray = None,
+    fins: np.ndarray = None,
+    pico: np.ndarray = None,
+) -> np.ndarray:
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    total = len(x)
+    if inicios is None:
+        inicios, fins = np.array([0]), np.array([total])
+    if total == 0:
+        return np.array([], dtype=np.int64)
+
+    if metodo == MINMAX:
+        # Dois pontos por balde: metade dos baldes para o mesmo total
+        inicios_b = _baldes(inicios, fins, max(n // 2, 2))
+        sel = [
+            primeiro_extremo(y, inicios_b, maximo=True),
+            primeiro_extremo(y, inicios_b, maximo=False),
+        ]
+    else:
+        inicios_b = _baldes(inicios, fins, n)
+        tamanhos = np.diff(np.r_[inicios_b, total])
+        media_x = np.add.reduceat(x, inicios_b) / tamanhos
+        media_y = np.add.reduceat(y, inicios_b) / tamanhos
+
+        ant = np.r_[0, np.arange(len(inicios_b) - 1)]
+        prox = np.r_[np.arange(1, len(inicios_b)), len(inicios_b) - 1]
+        balde = np.repeat(np.arange(len(inicios_b)), tamanhos)
+        ax, ay = media_x[ant][balde], media_y[ant][balde]
+        cx, cy = media_x[prox][balde], media_y[prox][balde]
+        area = np.abs((ax - cx) * (y - ay) - (ax - x) * (cy - ay))
+        sel = [primeiro_extremo(area, inicios_b, maximo=True)]
+
+    if pico is not None:
+        # Pico de tensão de cada ensaio (primeira ocorrência do máximo)
+        p = np.where(np.isnan(pico), -np.inf, np.asarray(pico, dtype=np.float64))
+        sel.append(primeiro_extremo(p, inicios, maximo=True))
+
+    return np.unique(np.concatenate(sel))
+
+
+def reduzir(
+    df: pd.DataFrame,
+    x: str,
+    y: str,
+    n: int,
+    metodo: str = LTTB,
+    col_id: str = None,
+    col_pico: str = "tensao",
+    faixa_x: tuple = None,
+    faixa_y: tuple = None,
+) -> pd.DataFrame:
+    # Só entram na redução os pontos visíveis: ao fechar os limites dos eixos
+    # (zoom), a mesma quantidade de pontos cobre uma faixa menor da curva.
+    vx = df[x].to_numpy(dtype=np.float64)
+    vy = df[y].to_numpy(dtype=np.float64)
+    visivel = np.isfinite(vx) & np.isfinite(vy)
+    if faixa_x is not None:
+        visivel &= (vx >= faixa_x[0]) & (vx <= faixa_x[1])
+    if faixa_y is not None:
+        visivel &= (vy >= faixa_y[0]) & (vy <= faixa_y[1])
+    if not visivel.all():
+        df = df[visivel]
+
+    if col_id is not None:
+        df = df.sort_values(col_id, kind="stable")
+        inicios, fins = limites_segmentos(df[col_id].to_numpy())
+    else:
+        inicios, fins = np.array([0]), np.array([len(df)])
+
+    if (fins - inicios).max(initial=0) <= n:
+        return df
+
+    pico = df[col_pico].to_numpy(dtype=np.float64) if col_pico in df.columns else None
+    idx = indices_reduzidos(df[x].to_numpy(), df[y].to_numpy(), n, metodo, inicios, fins, pico)
+    return df.iloc[idx]
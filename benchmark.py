@@ -0,0 +1,280 @@
+import argparse
+import gc
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+
+# -----------------------------
+# Benchmarks dos caminhos principais dos dashboards
+# -----------------------------
+# Gera dados sintéticos no formato da consolidada (amostras por ensaio) e da
+# planilha do Vale (Litologia / Tensão de Pico), mede leitura, filtro por
+# rocha/id, pico por ensaio, estatística dos cenários e montagem das figuras
+# (teste7 / teste8), e grava um JSON comparável entre commits. Roda offline;
+# o cache dos dados vai para uma pasta temporária.
+#
+# uso: python benchmark.py --ensaios 200 --amostras 2000 --saida bench.json
+#      python benchmark.py --comparar antes.json depois.json
+
+LITOLOGIAS_PADRAO = [
+    "Granito Isotrópico (GRA)",
+    "Granito Albítico (GRB)",
+    "Granito Albítico Pegmatítico (GRBp)",
+    "Granitoide (GRN)",
+    "Anfibolito (ANF)",
+    "Biotita Xisto (HDB)",
+    "Hidrotermalito (HQM)",
+    "Hidrotermalito a Anfibólio (HDA)",
+    "Hidrotermalito a Granada (HDG)",
+    "Diabásio (DIA)",
+]
+
+
+# -----------------------------
+# Dados sintéticos
+# -----------------------------
+
+def gerar_consolidada(n_ensaios: int = 30, amostras: int = 2000, n_rochas: int = 30, seed: int = 0) -> pd.DataFrame:
+    # Curvas tensão x deformação: subida quase linear até o pico (UCS) e queda
+    # pós-pico, com ruído; número de amostras varia ±20% entre ensaios
+    rng = np.random.default_rng(seed)
+    tamanhos = np.maximum(rng.integers(int(amostras * 0.8), int(amostras * 1.2) + 1, n_ensaios), 2)
+    n = int(tamanhos.sum())
+    ensaio = np.repeat(np.arange(n_ensaios), tamanhos)
+    inicio = np.repeat(np.r_[0, np.cumsum(tamanhos)[:-1]], tamanhos)
+    u = (np.arange(n) - inicio) / np.repeat(tamanhos - 1, tamanhos)  # 0..1 dentro do ensaio
+
+    ucs = rng.uniform(30, 250, n_ensaios)[ensaio]
+    def_pico = rng.uniform(0.2, 0.8, n_ensaios)[ensaio]
+    pos_pico = rng.uniform(0.7, 0.9, n_ensaios)[ensaio]
+    deformacao = u / pos_pico * def_pico
+    subida = ucs * np.sin(np.minimum(u / pos_pico, 1) * np.pi / 2)
+    queda = np.where(u > pos_pico, ucs * (u - pos_pico) / (1 - pos_pico) * 0.6, 0)
+    tensao = np.maximum(subida - queda + rng.normal(0, 0.3, n), 0)
+    tempo = u * np.repeat(rng.uniform(300, 900, n_ensaios), tamanhos)
+
+    return pd.DataFrame({
+        "id": ensaio + 1,
+        "rocha": 100000 + ensaio % max(n_rochas, 1),
+        "tempo": tempo,
+        "carga": tensao * 1.9635,  # área de um CP de 50 mm (kN)
+        "V1": deformacao * 0.9 + rng.normal(0, 1e-3, n),
+        "V2": deformacao * 1.1 + rng.normal(0, 1e-3, n),
+        "def": deformacao,
+        "tensao": tensao,
+    })
+
+
+def gerar_vale(n: int = 150, litologias: list = None, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    litologias = litologias or LITOLOGIAS_PADRAO
+    return pd.DataFrame({
+        "Litologia": rng.choice(litologias, n),
+        "Tensão de Pico": rng.lognormal(np.log(110), 0.5, n),
+    })
+
+
+def gravar(df: pd.DataFrame, destino: str):
+    if destino.endswith(".csv"):
+        df.to_csv(destino, index=False)
+    else:
+        df.to_excel(destino, index=False)
+
+
+# -----------------------------
+# Medição
+# -----------------------------
+
+def medir(funcao, repeticoes: int = 3, preparar=None) -> dict:
+    tempos = []
+    for _ in range(repeticoes):
+        if preparar is not None:
+            preparar()
+        gc.collect()
+        t0 = time.perf_counter()
+        funcao()
+        tempos.append(time.perf_counter() - t0)
+    return {
+        "min": min(tempos),
+        "mediana": statistics.median(tempos),
+        "media": statistics.fmean(tempos),
+        "repeticoes": repeticoes,
+    }
+
+
+def _commit() -> str:
+    try:
+        saida = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)), timeout=10,
+        )
+        return saida.stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def _stats_series(s: pd.Series) -> pd.Series:
+    # stats_series original dos apps (referência com os valores brutos)
+    s = pd.Series(s).dropna().astype(float)
+    return pd.Series({
+        "SOMA": int(s.count()),
+        "MÉDIA": s.mean(),
+        "MEDIANA": s.median(),
+        "DESVPAD": s.std(ddof=1),
+        "MÍNIMO": s.min(),
+        "MÁXIMO": s.max(),
+    })
+
+
+def rodar(ensaios: int, amostras: int, rochas: int, vale: int, repeticoes: int, formato: str, seed: int) -> dict:
+    pasta = tempfile.mkdtemp(prefix="bench_")
+    # O cache dos dados (dados.CACHE_DIR) é lido na importação
+    os.environ["DADOS_CACHE_DIR"] = os.path.join(pasta, "cache")
+
+    import dados
+    from bootstrap import REAMOSTRAGENS, bootstrap_grupos
+    from cenarios import IndiceLitologias, carregar_cenarios, estatistica_cenario, valores_cenario
+    from figuras import MODO_TRACOS, MODO_WEBGL, com_estilo, figura_cenario, figura_geral
+    from momentos import momentos_blocos
+    from resumo import resumo_ensaios
+
+    df_sint = gerar_consolidada(ensaios, amostras, rochas, seed)
+    arquivo = os.path.join(pasta, f"consolidada.{formato}")
+    t0 = time.perf_counter()
+    gravar(df_sint, arquivo)
+    geracao = time.perf_counter() - t0
+
+    config = carregar_cenarios(os.path.join(os.path.dirname(os.path.abspath(__file__)), "cenarios.json"))
+    litologias = sorted({nome for conjunto in config["litologias"].values() for nome in conjunto})
+    df_vale = gerar_vale(vale, litologias, seed=seed)
+
+    def limpar_memoria():
+        # Tudo o que o processo guardou deste arquivo (dados, índice, relatórios)
+        dados.esquecer(arquivo)
+
+    def limpar_cache():
+        limpar_memoria()
+        shutil.rmtree(dados.CACHE_DIR, ignore_errors=True)
+
+    res = {}
+    res["leitura_fria"] = medir(lambda: dados.load_consolidada(arquivo), repeticoes, limpar_cache)
+    res["leitura_quente"] = medir(lambda: dados.load_consolidada(arquivo), repeticoes, limpar_memoria)
+
+    df = dados.load_consolidada(arquivo)
+    indice = dados.indice_consolidada(arquivo)
+    pares = indice.pares()
+    amostra = [pares[i] for i in np.random.default_rng(seed).choice(len(pares), min(50, len(pares)), replace=False)]
+    res["filtro_mascara"] = medir(
+        lambda: [df[(df["rocha"] == r) & (df["id"] == i)] for r, i in amostra], repeticoes
+    )
+    res["filtro_indice"] = medir(lambda: [indice.ensaio(r, i) for r, i in amostra], repeticoes)
+    res["indice_construcao"] = medir(lambda: dados.IndiceEnsaios(df), repeticoes)
+
+    res["pico_idxmax"] = medir(
+        lambda: df.loc[df.groupby("id")["tensao"].idxmax()], repeticoes
+    )
+    res["pico_resumo"] = medir(lambda: resumo_ensaios(df), repeticoes)
+
+    geo_peak = resumo_ensaios(df)["tensao"].dropna()
+    cenarios = [c["id"] for c in config["cenarios"]]
+    grupos = {c: valores_cenario(config, c, IndiceLitologias(df_vale, config), geo_peak) for c in cenarios}
+    res["stats_series"] = medir(
+        lambda: [pd.DataFrame({k: _stats_series(v) for k, v in grupos[c].items()}) for c in cenarios], repeticoes
+    )
+    mom_vale = momentos_blocos(df_vale.rename(columns={"Tensão de Pico": "UCS"}), ["UCS"], ["Litologia"])
+    mom_geo = momentos_blocos(geo_peak.rename("UCS").to_frame(), ["UCS"])
+    res["stats_momentos"] = medir(
+        lambda: [estatistica_cenario(config, c, mom_vale, mom_geo) for c in cenarios], repeticoes
+    )
+    res["bootstrap_cenario"] = medir(lambda: bootstrap_grupos(grupos[cenarios[-1]], REAMOSTRAGENS), repeticoes)
+    res["cenario_indice_litologias"] = medir(lambda: IndiceLitologias(df_vale, config), repeticoes)
+
+    # Mesma montagem do teste7: figura do cenário + estilo dos pontos numa cópia
+    estilo = dict(boxpoints="all", jitter=0.25, marker_size=5)
+    res["figura_teste7"] = medir(
+        lambda: com_estilo(figura_cenario(grupos[cenarios[-1]], config["cores"], cenarios[-1]), traces=estilo).to_json(),
+        repeticoes,
+    )
+    res["figura_teste7_caixas"] = medir(
+        lambda: com_estilo(
+            figura_cenario(grupos[cenarios[-1]], config["cores"], cenarios[-1], "all"), traces=estilo
+        ).to_json(),
+        repeticoes,
+    )
+    res["figura_teste8_tracos"] = medir(
+        lambda: figura_geral(df, modo=MODO_TRACOS, n_pontos=2000).to_json(), repeticoes
+    )
+    res["figura_teste8_webgl"] = medir(
+        lambda: figura_geral(df, modo=MODO_WEBGL, n_pontos=2000).to_json(), repeticoes
+    )
+
+    return {
+        "meta": {
+            "commit": _commit(),
+            "data": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "plataforma": platform.platform(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "parametros": {
+                "ensaios": ensaios,
+                "amostras": amostras,
+                "rochas": rochas,
+                "vale": vale,
+                "repeticoes": repeticoes,
+                "formato": formato,
+                "seed": seed,
+            },
+            "linhas": len(df_sint),
+            "geracao_arquivo_s": geracao,
+        },
+        "resultados": res,
+    }
+
+
+def comparar(antes: str, depois: str):
+    with open(antes, encoding="utf-8") as f:
+        a = json.load(f)
+    with open(depois, encoding="utf-8") as f:
+        b = json.load(f)
+    print(f"{'caso':<28}{'antes (s)':>12}{'depois (s)':>12}{'razão':>9}")
+    for nome in sorted(set(a["resultados"]) | set(b["resultados"])):
+        ta = a["resultados"].get(nome, {}).get("mediana")
+        tb = b["resultados"].get(nome, {}).get("mediana")
+        razao = f"{tb / ta:8.2f}x" if ta and tb else ""
+        print(f"{nome:<28}{ta if ta is not None else float('nan'):>12.4f}{tb if tb is not None else float('nan'):>12.4f}{razao:>9}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmarks com dados sintéticos de ensaios de rocha.")
+    parser.add_argument("--ensaios", type=int, default=30)
+    parser.add_argument("--amostras", type=int, default=2000, help="amostras por ensaio (média)")
+    parser.add_argument("--rochas", type=int, default=30, help="nº de códigos de rocha")
+    parser.add_argument("--vale", type=int, default=150, help="linhas da planilha do Vale")
+    parser.add_argument("--repeticoes", type=int, default=3)
+    parser.add_argument("--formato", choices=["csv", "xlsx"], default="csv")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--saida", default=None, help="arquivo JSON de resultados (padrão: só imprime)")
+    parser.add_argument("--comparar", nargs=2, metavar=("ANTES", "DEPOIS"), help="compara dois JSON de resultados")
+    args = parser.parse_args()
+
+    if args.comparar:
+        comparar(*args.comparar)
+        sys.exit(0)
+
+    resultado = rodar(args.ensaios, args.amostras, args.rochas, args.vale, args.repeticoes, args.formato, args.seed)
+    texto = json.dumps(resultado, ensure_ascii=False, indent=1)
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as f:
+            f.write(texto)
+    print(texto)
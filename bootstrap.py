@@ -0,0 +1,119 @@
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+
+# -----------------------------
+# Intervalos de confiança por bootstrap (teste6 / teste7)
+# -----------------------------
+# Todos os grupos do cenário são reamostrados juntos: os valores ficam num
+# único array (cada grupo ordenado, em blocos contíguos) e cada reamostragem é
+# uma linha de uma matriz de índices, com n_g sorteios dentro do bloco de cada
+# grupo. Média e desvio saem de somas por bloco (np.add.reduceat na linha); a
+# mediana sai ordenando os índices: como os valores estão ordenados dentro do
+# grupo, índice ordenado = valor ordenado, e os blocos continuam no lugar.
+#
+# As reamostragens vão em lotes de até ELEMENTOS_LOTE índices, cada lote com
+# a sua semente derivada da semente principal (SeedSequence.spawn): o
+# resultado é o mesmo rodando num processo só ou em vários (workers).
+#
+# Intervalo percentil: quantis (1 - nivel)/2 e (1 + nivel)/2 das estatísticas
+# das reamostragens.
+
+REAMOSTRAGENS = 2000
+NIVEL = 0.95
+SEMENTE = 0
+
+# Memória de pico de um lote (linhas x valores): por elemento, o índice
+# sorteado (int64) e o valor reunido com ele (float64), mais os temporários
+# float64 do desvio (x - média e o quadrado) -> ~32 bytes (medido com
+# tracemalloc no _lote)
+BYTES_ELEMENTO = 32
+MEMORIA_LOTE = 128_000_000
+ELEMENTOS_LOTE = MEMORIA_LOTE // BYTES_ELEMENTO
+
+ESTATISTICAS = ["MÉDIA", "MEDIANA", "DESVPAD"]
+
+
+def _coluna(estatistica: str, nivel: float, lado: str) -> str:
+    return f"{estatistica} IC{nivel:.0%} {lado}"
+
+
+def colunas_ic(nivel: float = NIVEL) -> list:
+    return [_coluna(est, nivel, lado) for est in ESTATISTICAS for lado in ("inf", "sup")]
+
+
+def _preparar(grupos: dict):
+    # Valores de todos os grupos (sem NaN), cada grupo ordenado, em sequência
+    partes = []
+    for valores in grupos.values():
+        v = pd.to_numeric(pd.Series(valores), errors="coerce").to_numpy(dtype=np.float64)
+        partes.append(np.sort(v[~np.isnan(v)]))
+    n = np.array([len(p) for p in partes], dtype=np.int64)
+    inicios = np.r_[0, np.cumsum(n)[:-1]].astype(np.int64)
+    return (np.concatenate(partes) if partes else np.empty(0)), n, inicios
+
+
+def _lote(valores: np.ndarray, n: np.ndarray, inicios: np.ndarray, linhas: int, semente) -> np.ndarray:
+    # (linhas, grupos, 3): média, mediana e desvio de cada reamostragem
+    rng = np.random.default_rng(semente)
+    com = n > 0
+    n_c, ini_c = n[com], inicios[com]
+    total = int(n_c.sum())
+    saida = np.full((linhas, len(n), 3), np.nan)
+    if not total:
+        return saida
+
+    # Coluna j da matriz sorteia no bloco do grupo a que ela pertence
+    grupo_col = np.repeat(np.arange(len(n_c)), n_c)
+    idx = ini_c[grupo_col] + (rng.random((linhas, total)) * n_c[grupo_col]).astype(np.int64)
+    idx.sort(axis=1)
+    x = valores[idx]
+
+    # Posição do bloco de cada grupo dentro da linha
+    pos = np.r_[0, np.cumsum(n_c)[:-1]]
+    media = np.add.reduceat(x, pos, axis=1) / n_c
+    desvio = x - media[:, grupo_col]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        desvpad = np.sqrt(np.add.reduceat(desvio * desvio, pos, axis=1) / (n_c - 1))
+    desvpad[:, n_c < 2] = np.nan
+    mediana = (x[:, pos + (n_c - 1) // 2] + x[:, pos + n_c // 2]) / 2
+
+    saida[:, com, 0] = media
+    saida[:, com, 1] = mediana
+    saida[:, com, 2] = desvpad
+    return saida
+
+
+def _lote_tarefa(args):
+    return _lote(*args)
+
+
+def bootstrap_grupos(grupos: dict, reamostragens: int = REAMOSTRAGENS, nivel: float = NIVEL,
+                     semente: int = SEMENTE, workers: int = None) -> pd.DataFrame:
+    # Uma linha por grupo (na ordem de `grupos`), colunas de colunas_ic(nivel).
+    # workers > 1 divide os lotes entre processos
+    valores, n, inicios = _preparar(grupos)
+    total = max(int(n.sum()), 1)
+    por_lote = max(1, min(reamostragens, ELEMENTOS_LOTE // total))
+    tamanhos = [min(por_lote, reamostragens - a) for a in range(0, reamostragens, por_lote)]
+    sementes = np.random.SeedSequence(semente).spawn(len(tamanhos))
+    tarefas = [(valores, n, inicios, linhas, s) for linhas, s in zip(tamanhos, sementes)]
+
+    if workers and workers > 1 and len(tarefas) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(tarefas))) as pool:
+            lotes = list(pool.map(_lote_tarefa, tarefas))
+    else:
+        lotes = [_lote(*t) for t in tarefas]
+    estat = np.concatenate(lotes, axis=0)
+
+    alfa = (1 - nivel) / 2
+    with np.errstate(invalid="ignore"):
+        limites = np.quantile(estat, [alfa, 1 - alfa], axis=0)  # (2, grupos, 3)
+    colunas = {}
+    for j, est in enumerate(ESTATISTICAS):
+        colunas[_coluna(est, nivel, "inf")] = limites[0, :, j]
+        colunas[_coluna(est, nivel, "sup")] = limites[1, :, j]
+    # Grupo vazio (ou desvio com menos de 2 valores): NaN
+    return pd.DataFrame(colunas, index=list(grupos))
@@ -0,0 +1,94 @@
+import pandas as pd
+import streamlit as st
+
+from bootstrap import bootstrap_grupos
+from cenarios import IndiceLitologias, carregar_cenarios, estatistica_cenario, valores_cenario
+from comparacao import comparar_grupos
+from dados import load_planilha, resumo_consolidada
+from medicao import etapa
+from momentos import momentos_blocos
+
+
+# -----------------------------
+# Caches dos apps de cenários (teste6 / teste7)
+# -----------------------------
+# cache_resource: objeto único (somente leitura) para todas as sessões e os
+# dois apps, sem a cópia via pickle do cache_data. A versão de cada arquivo
+# (dados.chave_cache: mtime e tamanho) entra na chave para recarregar quando
+# ele mudar; o config entra pelo hash do conteúdo (cenarios.chave_config) e
+# os parâmetros com "_" ficam fora do hash do cache.
+
+@st.cache_resource(show_spinner=True, max_entries=4)
+def load_vale(path: str, versao: str = None) -> pd.DataFrame:
+    df = load_planilha(path)
+    if "Litologia" not in df.columns or "Tensão de Pico" not in df.columns:
+        raise ValueError("Arquivo do Vale precisa ter colunas: 'Litologia' e 'Tensão de Pico'.")
+    df["Tensão de Pico"] = pd.to_numeric(df["Tensão de Pico"], errors="coerce")
+    return df
+
+
+@st.cache_resource(show_spinner=True, max_entries=4)
+def load_geo_peak(path: str, versao: str = None) -> pd.DataFrame:
+    # Resumo por ensaio (pico por ID); exige as colunas 'id' e 'tensao'
+    return resumo_consolidada(path)
+
+
+# Momentos da tensão de pico por litologia (Vale) e dos picos da Geocontrole
+# (um bloco só); a estatística de cada grupo é a junção desses blocos, sem
+# reprocessar os valores a cada interação (ver momentos.py)
+@st.cache_resource(show_spinner=False, max_entries=4)
+def momentos_vale(path: str, versao: str = None) -> pd.DataFrame:
+    df = load_vale(path, versao).rename(columns={"Tensão de Pico": "UCS"})
+    return momentos_blocos(df, ["UCS"], ["Litologia"])
+
+
+@st.cache_resource(show_spinner=False, max_entries=4)
+def momentos_geo(path: str, versao: str = None) -> pd.DataFrame:
+    return momentos_blocos(load_geo_peak(path, versao).rename(columns={"tensao": "UCS"}), ["UCS"])
+
+
+# Cenários e grupos vêm do arquivo de cenários (ver cenarios.py)
+@st.cache_resource(show_spinner=False, max_entries=4)
+def load_cenarios(path: str, versao: str = None) -> dict:
+    return carregar_cenarios(path)
+
+
+# Litologia codificada uma vez (código -> grupos) por config e versão do Vale
+@st.cache_resource(show_spinner=False, max_entries=4)
+def indice_litologias(_config: dict, chave: str, vale_path: str, vale_versao: str) -> IndiceLitologias:
+    return IndiceLitologias(load_vale(vale_path, vale_versao), _config)
+
+
+# Só o cenário selecionado é montado, guardado por (config, cenário, versões
+# dos arquivos)
+@st.cache_resource(show_spinner=False, max_entries=32)
+def montar_cenario(_config: dict, chave: str, cenario: str, vale_path: str, vale_versao: str,
+                   geo_path: str, geo_versao: str):
+    geo_peak = load_geo_peak(geo_path, geo_versao)["tensao"].dropna()
+    indice = indice_litologias(_config, chave, vale_path, vale_versao)
+    with etapa("valores do cenário", "filtro"):
+        grupos = valores_cenario(_config, cenario, indice, geo_peak)
+    mom_vale, mom_geo = momentos_vale(vale_path, vale_versao), momentos_geo(geo_path, geo_versao)
+    with etapa("estatística do cenário", "calculo"):
+        tab = estatistica_cenario(_config, cenario, mom_vale, mom_geo)
+        # A mediana dos esboços só é exata até LIMITE_ESBOCO valores por
+        # bloco; com os valores do grupo já em mãos, a tabela usa a exata
+        tab["MEDIANA"] = pd.Series({nome: pd.to_numeric(v, errors="coerce").median() for nome, v in grupos.items()})
+    return grupos, tab
+
+
+# Intervalos de confiança (bootstrap) dos grupos do cenário, guardados por
+# (config, cenário, versões dos arquivos, nº de reamostragens, semente)
+@st.cache_resource(show_spinner=False, max_entries=32)
+def bootstrap_cenario(_config: dict, chave: str, cenario: str, vale_path: str, vale_versao: str,
+                      geo_path: str, geo_versao: str, reamostragens: int, semente: int) -> pd.DataFrame:
+    grupos, _ = montar_cenario(_config, chave, cenario, vale_path, vale_versao, geo_path, geo_versao)
+    with etapa("bootstrap", "calculo"):
+        return bootstrap_grupos(grupos, reamostragens, semente=semente)
+
+
+# Testes entre os pares de grupos, guardados pelo hash dos valores (chave)
+@st.cache_resource(show_spinner=False, max_entries=32)
+def comparacao_cenario(_grupos: dict, chave: str, permutacoes: int) -> pd.DataFrame:
+    with etapa("comparação dos grupos", "calculo"):
+        return comparar_grupos(_grupos, permutacoes)
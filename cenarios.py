@@ -0,0 +1,129 @@
+import hashlib
+import json
+
+import numpy as np
+import pandas as pd
+
+from momentos import estatistica_blocos
+
+
+# -----------------------------
+# Cenários dos boxplots (teste6 / teste7) definidos em arquivo
+# -----------------------------
+# cenarios.json define:
+#   - "litologias": conjuntos nomeados de litologias do Vale (GR, HD_ALL_VALE, ...)
+#   - "cores": cor de cada grupo (opcional)
+#   - "cenarios": lista de {id, nome, grupos}; cada grupo é uma lista de
+#     conjuntos (ou nomes de litologia avulsos) e a flag "geocontrole", que
+#     inclui os picos por ID da Geocontrole no grupo
+#
+# Só o cenário selecionado é montado; os apps guardam o resultado por
+# (hash do config, cenário, versão dos arquivos), então cenários e
+# litologias novos não pesam nas interações.
+#
+# A coluna Litologia do Vale é codificada uma vez (categorical) e cada código
+# aponta para uma máscara de bits com todos os grupos de todos os cenários a
+# que ele pertence (IndiceLitologias): montar os grupos é um teste de bit
+# sobre um array inteiro, sem um isin (comparação de texto) por grupo.
+
+CONFIG_PADRAO = "cenarios.json"
+
+
+def carregar_cenarios(path: str = CONFIG_PADRAO) -> dict:
+    with open(path, encoding="utf-8") as f:
+        config = json.load(f)
+
+    config.setdefault("litologias", {})
+    config.setdefault("cores", {})
+    ids = set()
+    for c in config.get("cenarios", []):
+        if "id" not in c or not c.get("grupos"):
+            raise ValueError(f"{path}: cada cenário precisa de 'id' e de ao menos um grupo.")
+        if c["id"] in ids:
+            raise ValueError(f"{path}: cenário '{c['id']}' repetido.")
+        ids.add(c["id"])
+        c.setdefault("nome", c["id"])
+        for grupo in c["grupos"]:
+            if "nome" not in grupo:
+                raise ValueError(f"{path}: grupo sem 'nome' no cenário '{c['id']}'.")
+            grupo.setdefault("litologias", [])
+            grupo.setdefault("geocontrole", False)
+    if not ids:
+        raise ValueError(f"{path}: nenhum cenário definido.")
+    return config
+
+
+def chave_config(config: dict) -> str:
+    bruto = json.dumps(config, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha1(bruto.encode("utf-8")).hexdigest()[:16]
+
+
+def cenario(config: dict, id_) -> dict:
+    for c in config["cenarios"]:
+        if c["id"] == id_:
+            return c
+    raise KeyError(id_)
+
+
+def litologias_grupo(config: dict, grupo: dict) -> list:
+    # Expande os conjuntos nomeados; nomes que não são conjuntos valem como litologia
+    saida = []
+    for nome in grupo["litologias"]:
+        saida.extend(config["litologias"].get(nome, [nome]))
+    return list(dict.fromkeys(saida))
+
+
+class IndiceLitologias:
+    def __init__(self, df_vale: pd.DataFrame, config: dict, col: str = "Litologia", col_valor: str = "Tensão de Pico"):
+        categorias = pd.Categorical(df_vale[col])
+        self.valores = pd.to_numeric(df_vale[col_valor], errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+
+        # Um bit por (cenário, grupo), em palavras de 64 bits
+        self._bit = {}
+        for c in config["cenarios"]:
+            for grupo in c["grupos"]:
+                self._bit[(c["id"], grupo["nome"])] = len(self._bit)
+        palavras = max(1, -(-len(self._bit) // 64))
+
+        # Tabela código -> máscara; a última linha (código -1, litologia vazia) fica zerada
+        tabela = np.zeros((len(categorias.categories) + 1, palavras), dtype=np.uint64)
+        for c in config["cenarios"]:
+            for grupo in c["grupos"]:
+                i = self._bit[(c["id"], grupo["nome"])]
+                pos = categorias.categories.get_indexer(litologias_grupo(config, grupo))
+                tabela[pos[pos >= 0], i // 64] |= np.uint64(1 << (i % 64))
+        self.tabela = tabela
+
+        # Máscara de cada linha: um único acesso indexado pelos códigos
+        self._bits = tabela[categorias.codes]
+
+    def mascara(self, id_, grupo: str) -> np.ndarray:
+        i = self._bit[(id_, grupo)]
+        return (self._bits[:, i // 64] & np.uint64(1 << (i % 64))) != 0
+
+    def valores_grupo(self, id_, grupo: str) -> pd.Series:
+        v = self.valores[self.mascara(id_, grupo)]
+        return pd.Series(v[~np.isnan(v)], name="Tensão de Pico")
+
+
+def valores_cenario(config: dict, id_, indice: IndiceLitologias, geo_peak: pd.Series) -> dict:
+    # {grupo: tensões de pico} do cenário escolhido
+    grupos = {}
+    for grupo in cenario(config, id_)["grupos"]:
+        vale = indice.valores_grupo(id_, grupo["nome"])
+        if grupo["geocontrole"]:
+            vale = pd.concat([vale.reset_index(drop=True), geo_peak.reset_index(drop=True)], ignore_index=True)
+        grupos[grupo["nome"]] = vale
+    return grupos
+
+
+def estatistica_cenario(config: dict, id_, mom_vale: pd.DataFrame, mom_geo: pd.DataFrame,
+                        coluna: str = "UCS") -> pd.DataFrame:
+    # Tabela SOMA/MÉDIA/... por grupo, pela junção dos momentos (ver momentos.py)
+    linhas = {}
+    for grupo in cenario(config, id_)["grupos"]:
+        partes = [mom_vale[mom_vale["Litologia"].isin(litologias_grupo(config, grupo))]]
+        if grupo["geocontrole"]:
+            partes.append(mom_geo)
+        linhas[grupo["nome"]] = estatistica_blocos(pd.concat(partes, ignore_index=True), coluna)
+    return pd.DataFrame(linhas).T
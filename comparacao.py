@@ -0,0 +1,133 @@
+import hashlib
+from itertools import combinations
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+from cenarios import cenario
+
+
+# -----------------------------
+# Comparação entre os grupos de um cenário (teste6 / teste7)
+# -----------------------------
+# Para cada par de grupos: Mann–Whitney (bilateral), Kolmogorov–Smirnov
+# (duas amostras) e teste de permutação da diferença de médias, com os
+# tamanhos de efeito delta de Cliff (a partir do U) e g de Hedges.
+#
+# Nos grupos que juntam os picos da Geocontrole (flag "geocontrole"), a parte
+# do Vale e a da Geocontrole entram separadas ("<grupo> (Vale)" e
+# "Geocontrole"): o par das duas mostra se a junção se justifica.
+#
+# Permutação: scipy.stats.permutation_test (vetorizado, em lotes de até
+# ELEMENTOS_LOTE valores) sobre a diferença de médias. Com menos arranjos
+# possíveis que permutações o teste é exato; senão o p é uma estimativa de
+# Monte Carlo que depende de `permutacoes` e da semente. Bilateral como no
+# scipy: p = 2 x o menor p unilateral (limitado a 1).
+#
+# Os apps guardam o resultado pela chave dos dados (chave_grupos: hash dos
+# valores de cada grupo, das permutações e da semente).
+
+PERMUTACOES = 5000
+SEMENTE = 0
+GRUPO_GEOCONTROLE = "Geocontrole"
+
+# Valores por lote de permutações (linhas x n)
+ELEMENTOS_LOTE = 2_000_000
+
+COLUNAS_COMPARACAO = [
+    "grupo A", "grupo B", "n A", "n B",
+    "Mann–Whitney U", "p Mann–Whitney",
+    "KS D", "p KS",
+    "dif. médias", "p permutação",
+    "delta de Cliff", "g de Hedges",
+]
+
+
+def grupos_comparacao(config: dict, id_, indice, geo_peak: pd.Series) -> dict:
+    # {grupo: valores} do cenário, com Vale e Geocontrole separados nos
+    # grupos que os juntam
+    grupos = {}
+    geo = False
+    for grupo in cenario(config, id_)["grupos"]:
+        vale = indice.valores_grupo(id_, grupo["nome"])
+        if grupo["geocontrole"]:
+            grupos[f"{grupo['nome']} (Vale)"] = vale
+            geo = True
+        else:
+            grupos[grupo["nome"]] = vale
+    if geo:
+        grupos[GRUPO_GEOCONTROLE] = geo_peak
+    return grupos
+
+
+def _valores(v) -> np.ndarray:
+    v = pd.to_numeric(pd.Series(v), errors="coerce").to_numpy(dtype=np.float64)
+    return v[~np.isnan(v)]
+
+
+def chave_grupos(grupos: dict, permutacoes: int = PERMUTACOES, semente: int = SEMENTE) -> str:
+    h = hashlib.sha256(f"{permutacoes}|{semente}".encode("utf-8"))
+    for nome, valores in grupos.items():
+        v = _valores(valores)
+        h.update(f"|{nome}|{len(v)}|".encode("utf-8"))
+        h.update(v.tobytes())
+    return h.hexdigest()[:32]
+
+
+def _dif_medias(x: np.ndarray, y: np.ndarray, axis: int = -1) -> np.ndarray:
+    return np.mean(x, axis=axis) - np.mean(y, axis=axis)
+
+
+def permutacao_medias(x: np.ndarray, y: np.ndarray, permutacoes: int = PERMUTACOES,
+                      rng: np.random.Generator = None) -> tuple:
+    # (diferença observada de médias x - y, p bilateral)
+    rng = rng if rng is not None else np.random.default_rng(SEMENTE)
+    if len(x) == 0 or len(y) == 0:
+        return np.nan, np.nan
+    res = stats.permutation_test(
+        (x, y), _dif_medias, permutation_type="independent", vectorized=True,
+        n_resamples=permutacoes, batch=max(1, ELEMENTOS_LOTE // (len(x) + len(y))),
+        alternative="two-sided", rng=rng,
+    )
+    return float(res.statistic), float(res.pvalue)
+
+
+def _hedges(x: np.ndarray, y: np.ndarray) -> float:
+    n1, n2 = len(x), len(y)
+    if n1 < 2 or n2 < 2:
+        return np.nan
+    s = np.sqrt(((n1 - 1) * x.var(ddof=1) + (n2 - 1) * y.var(ddof=1)) / (n1 + n2 - 2))
+    if s == 0:
+        return np.nan
+    correcao = 1 - 3 / (4 * (n1 + n2) - 9)
+    return (x.mean() - y.mean()) / s * correcao
+
+
+def comparar_grupos(grupos: dict, permutacoes: int = PERMUTACOES, semente: int = SEMENTE) -> pd.DataFrame:
+    # Uma linha por par de grupos (na ordem de `grupos`); pares com grupo
+    # vazio ficam com NaN
+    rng = np.random.default_rng(semente)
+    valores = {nome: _valores(v) for nome, v in grupos.items()}
+    linhas = []
+    for a, b in combinations(valores, 2):
+        x, y = valores[a], valores[b]
+        linha = dict.fromkeys(COLUNAS_COMPARACAO, np.nan)
+        linha.update({"grupo A": a, "grupo B": b, "n A": len(x), "n B": len(y)})
+        if len(x) and len(y):
+            mw = stats.mannwhitneyu(x, y, alternative="two-sided")
+            ks = stats.ks_2samp(x, y)
+            dif, p_perm = permutacao_medias(x, y, permutacoes, rng)
+            linha.update({
+                "Mann–Whitney U": mw.statistic,
+                "p Mann–Whitney": mw.pvalue,
+                "KS D": ks.statistic,
+                "p KS": ks.pvalue,
+                "dif. médias": dif,
+                "p permutação": p_perm,
+                # delta = P(X > Y) - P(X < Y) = 2U / (n1 n2) - 1
+                "delta de Cliff": 2 * mw.statistic / (len(x) * len(y)) - 1,
+                "g de Hedges": _hedges(x, y),
+            })
+        linhas.append(linha)
+    return pd.DataFrame(linhas, columns=COLUNAS_COMPARACAO)
@@ -0,0 +1,109 @@
+import numpy as np
+
+
+# -----------------------------
+# Módulo de elasticidade e características da curva tensão x deformação
+# -----------------------------
+# Calculado para todos os ensaios de uma vez, sobre os segmentos contíguos da
+# tabela ordenada por id (mesmo passe do resumo, ver resumo.py): somas por
+# segmento com np.bincount, sem laço por ensaio.
+#
+# def em %, tensao em MPa: inclinação dσ/dε% (MPa por %) × 0.1 = E em GPa.
+#
+#   - modulo_tangente_50: ajuste linear na faixa de 50% ± FAIXA_TANGENTE do UCS
+#     (trecho antes do pico)
+#   - modulo_secante_50:  σ50 / ε50, com ε50 interpolada na primeira vez que a
+#     curva cruza 50% do UCS
+#   - modulo_janela:      ajuste linear na janela de tensão JANELA_MODULO
+#     (frações do UCS, trecho antes do pico)
+#   - def_50:             ε50 (%)
+#   - inclinacao_pos_pico: ajuste linear do pico até a tensão cair abaixo de
+#     PISO_POS_PICO × UCS (GPa; negativa no amolecimento)
+# A deformação no pico já é a coluna def_pico do resumo.
+#
+# Ajuste com menos de 2 pontos (ou deformação constante) fica NaN.
+
+JANELA_MODULO = (0.3, 0.6)
+FAIXA_TANGENTE = 0.05
+PISO_POS_PICO = 0.5
+
+# MPa / % -> GPa
+FATOR_GPA = 0.1
+
+COLUNAS_CURVA = [
+    "modulo_tangente_50",
+    "modulo_secante_50",
+    "modulo_janela",
+    "def_50",
+    "inclinacao_pos_pico",
+]
+
+
+def _inclinacao(seg: np.ndarray, x: np.ndarray, y: np.ndarray, mascara: np.ndarray, n_seg: int) -> np.ndarray:
+    # Mínimos quadrados por segmento, só nos pontos da máscara (em dois passes:
+    # médias e depois desvios, sem cancelamento)
+    ok = mascara & np.isfinite(x) & np.isfinite(y)
+    s, xs, ys = seg[ok], x[ok], y[ok]
+    n = np.bincount(s, minlength=n_seg).astype(np.float64)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mx = np.bincount(s, xs, n_seg) / n
+        my = np.bincount(s, ys, n_seg) / n
+        dx = xs - mx[s]
+        sxx = np.bincount(s, dx * dx, n_seg)
+        sxy = np.bincount(s, dx * (ys - my[s]), n_seg)
+        inclinacao = sxy / sxx
+    return np.where((n >= 2) & (sxx > 0), inclinacao, np.nan)
+
+
+def _primeiro(seg: np.ndarray, mascara: np.ndarray, n_seg: int) -> np.ndarray:
+    # Posição do primeiro ponto da máscara em cada segmento (-1 se nenhum)
+    pos = np.flatnonzero(mascara)
+    primeiro = np.full(n_seg, -1, dtype=np.int64)
+    segs, idx = np.unique(seg[pos], return_index=True)
+    primeiro[segs] = pos[idx]
+    return primeiro
+
+
+def caracteristicas_curvas(deformacao: np.ndarray, tensao: np.ndarray, inicios: np.ndarray, fins: np.ndarray,
+                           pos_pico: np.ndarray, janela: tuple = JANELA_MODULO) -> dict:
+    # deformacao / tensao: arrays da tabela ordenada por id; inicios/fins dos
+    # segmentos e posição do pico de cada um (ver resumo.resumo_ensaios)
+    n_seg = len(inicios)
+    seg = np.repeat(np.arange(n_seg), fins - inicios)
+    pos = np.arange(len(tensao))
+    ucs = tensao[pos_pico]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        razao = tensao / ucs[seg]
+    pre = pos <= pos_pico[seg]
+    apos_pico = pos >= pos_pico[seg]
+
+    tangente = _inclinacao(seg, deformacao, tensao, pre & (np.abs(razao - 0.5) <= FAIXA_TANGENTE), n_seg)
+    modulo_janela = _inclinacao(seg, deformacao, tensao, pre & (razao >= janela[0]) & (razao <= janela[1]), n_seg)
+
+    # Cruzamento de 50% do UCS: primeiro ponto do trecho pré-pico com σ >= 0.5 UCS,
+    # interpolado com o ponto anterior do mesmo ensaio
+    i = _primeiro(seg, pre & (razao >= 0.5), n_seg)
+    achou = i >= 0
+    i = np.where(achou, i, pos_pico)
+    ant = np.maximum(i - 1, inicios)
+    alvo = 0.5 * ucs
+    with np.errstate(invalid="ignore", divide="ignore"):
+        frac = np.where(i > ant, (alvo - tensao[ant]) / (tensao[i] - tensao[ant]), 1.0)
+        def_50 = deformacao[ant] + np.clip(frac, 0, 1) * (deformacao[i] - deformacao[ant])
+        def_50 = np.where(achou & (ucs > 0), def_50, np.nan)
+        secante = np.where(def_50 > 0, alvo / def_50, np.nan)
+
+    # Pós-pico: do pico até a primeira queda abaixo do piso
+    abaixo = apos_pico & (razao < PISO_POS_PICO)
+    fim_pos = _primeiro(seg, abaixo, n_seg)
+    fim_pos = np.where(fim_pos >= 0, fim_pos, fins)
+    trecho_pos = apos_pico & (pos < fim_pos[seg])
+    inclinacao_pos = _inclinacao(seg, deformacao, tensao, trecho_pos, n_seg)
+
+    return {
+        "modulo_tangente_50": tangente * FATOR_GPA,
+        "modulo_secante_50": secante * FATOR_GPA,
+        "modulo_janela": modulo_janela * FATOR_GPA,
+        "def_50": def_50,
+        "inclinacao_pos_pico": inclinacao_pos * FATOR_GPA,
+    }
@@ -0,0 +1,367 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import weakref
+
+import pandas as pd
+import pyarrow as pa
+
+from esquema import aplicar_esquema
+from indice import IndiceEnsaios
+from leitura import COLUNAS_PICO, caminho_tmp, converter_parquet, filtrar_tabela, ler_tabela
+from limpeza import COLUNAS_LIMPEZA, limpar_ensaios
+from medicao import etapa
+from curvas import JANELA_MODULO
+from momentos import COLUNAS_ENSAIO, momentos_blocos
+from resumo import atualizar_resumo
+
+
+# -----------------------------
+# Cache colunar (Parquet) da planilha consolidada
+# -----------------------------
+# O xlsx é convertido uma única vez para Parquet (em lotes, ver leitura.py),
+# checando as colunas obrigatórias já no cabeçalho. A chave do cache é o caminho
+# absoluto + mtime + tamanho do arquivo de origem: se o xlsx mudar, o Parquet
+# antigo é descartado e reconstruído na próxima leitura.
+#
+# As amostras já no esquema compacto também são gravadas em Arrow IPC sem
+# compressão e abertas por memory-map: todas as sessões do processo usam o
+# mesmo DataFrame e outros processos (workers) compartilham as mesmas páginas
+# do arquivo via page cache do sistema, sem uma cópia por sessão.
+#
+# A limpeza das amostras (ordem, duplicados, picos, offset da deformação, ver
+# limpeza.py) roda antes de gravar esse arquivo: uma vez por versão do xlsx.
+# O relatório por ensaio vai junto, nos metadados do Arrow.
+#
+# As sessões do Streamlit são threads do mesmo processo: cada construção de
+# cache (conversão, Arrow, índice, resumo, momentos) roda sob uma trava por
+# chave, então numa falta de cache só uma sessão constrói e as outras esperam
+# e reaproveitam o resultado. Os arquivos são gravados num temporário de nome
+# único e trocados com os.replace.
+
+CACHE_DIR = os.environ.get("DADOS_CACHE_DIR", ".cache_dados")
+
+# Aumente quando mudar o formato gravado no cache (invalida os arquivos antigos)
+VERSAO_CACHE = 4
+
+# DataFrames (e índices) já construídos neste processo, por chave do cache
+_memoria = {}
+_indices = {}
+_relatorios = {}
+_limpezas = {}
+
+# Protege os dicionários acima (e o de travas) contra alterações simultâneas
+_trava_memoria = threading.Lock()
+# Referências fracas: a trava de uma chave vive enquanto alguém a usa (quem
+# entra no "with" segura a referência) e sai sozinha depois, sem acumular
+# uma trava por versão de arquivo já vista
+_travas = weakref.WeakValueDictionary()
+
+
+def trava(chave) -> threading.RLock:
+    # Trava da construção de uma entrada do cache (reentrante: a conversão
+    # para Parquet roda dentro do load_planilha com a mesma chave)
+    with _trava_memoria:
+        return _travas.setdefault(chave, threading.RLock())
+
+
+def prefixo_cache(path: str) -> str:
+    origem = os.path.abspath(path)
+    stem = os.path.splitext(os.path.basename(origem))[0].replace(" ", "_")
+    return f"{stem}-{hashlib.sha1(origem.encode('utf-8')).hexdigest()[:8]}"
+
+
+def chave_cache(path: str) -> str:
+    if os.path.isdir(path):
+        # Pasta de exportações por ensaio: a chave cobre todos os arquivos dela
+        from ingestao import arquivos_exportados
+        partes = [f"{nome}|{st.st_mtime_ns}|{st.st_size}" for nome, st in arquivos_exportados(path)]
+        bruto = f"{os.path.abspath(path)}|{';'.join(partes)}|{VERSAO_CACHE}"
+    else:
+        st = os.stat(path)
+        bruto = f"{os.path.abspath(path)}|{st.st_mtime_ns}|{st.st_size}|{VERSAO_CACHE}"
+    return hashlib.sha1(bruto.encode("utf-8")).hexdigest()[:16]
+
+
+def caminho_cache(path: str, sufixo: str = "parquet") -> str:
+    return os.path.join(CACHE_DIR, f"{prefixo_cache(path)}-{chave_cache(path)}.{sufixo}")
+
+
+def tipar_colunas(df: pd.DataFrame) -> pd.DataFrame:
+    # Colunas de texto com valores misturados (ex.: número e texto na mesma
+    # coluna) não são aceitas pelo Parquet; convertemos para string.
+    for col in df.columns:
+        if df[col].dtype == object:
+            df[col] = df[col].astype("string")
+    return df
+
+
+def _versoes(path: str, sufixo: str) -> list:
+    # Arquivos do cache deste xlsx com o sufixo dado (qualquer chave)
+    if not os.path.isdir(CACHE_DIR):
+        return []
+    padrao = re.compile(re.escape(prefixo_cache(path)) + r"-[0-9a-f]{16}\." + re.escape(sufixo) + "$")
+    return [os.path.join(CACHE_DIR, nome) for nome in os.listdir(CACHE_DIR) if padrao.match(nome)]
+
+
+def _limpar_antigos(path: str, manter: str, sufixo: str = "parquet"):
+    for completo in _versoes(path, sufixo):
+        if completo != manter:
+            try:
+                os.remove(completo)
+            except OSError:
+                pass
+
+
+def gravar_parquet(df: pd.DataFrame, destino: str):
+    os.makedirs(os.path.dirname(destino), exist_ok=True)
+    tmp = caminho_tmp(destino)
+    df.to_parquet(tmp, index=False)
+    os.replace(tmp, destino)
+
+
+def ler_planilha(path: str) -> pd.DataFrame:
+    # Leitura em lotes (ver leitura.py): não materializa as células do openpyxl
+    return tipar_colunas(ler_tabela(path))
+
+
+def converter_para_parquet(path: str, obrigatorias=None) -> str:
+    destino = caminho_cache(path)
+    with trava(destino):
+        if not os.path.exists(destino):
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            converter_parquet(path, destino, obrigatorias)
+            _limpar_antigos(path, destino)
+    return destino
+
+
+def _lembrar(path: str, destino: str, valor):
+    # Mantém na memória só a versão mais recente de cada arquivo
+    prefixo, chave = prefixo_cache(path) + "-", chave_cache(path)
+    with _trava_memoria:
+        for antiga in [k for k in _memoria if os.path.basename(k).startswith(prefixo) and chave not in k]:
+            del _memoria[antiga]
+            _indices.pop(antiga, None)
+            _relatorios.pop(antiga, None)
+            _limpezas.pop(antiga, None)
+        _memoria[destino] = valor
+
+
+def esquecer(path: str):
+    # Tira da memória do processo tudo o que foi lido deste arquivo
+    prefixo = prefixo_cache(path) + "-"
+    with _trava_memoria:
+        for memo in (_memoria, _indices, _relatorios, _limpezas):
+            for antiga in [k for k in memo if os.path.basename(k).startswith(prefixo)]:
+                del memo[antiga]
+
+
+def _checar_colunas(df: pd.DataFrame, obrigatorias, path: str):
+    faltando = set(obrigatorias or ()) - set(df.columns)
+    if faltando:
+        raise ValueError(f"Colunas obrigatórias ausentes em {path}: {', '.join(sorted(faltando))}")
+
+
+def load_planilha(path: str, obrigatorias=None) -> pd.DataFrame:
+    chave = caminho_cache(path)
+    with trava(chave):
+        df = _memoria.get(chave)
+        if df is None:
+            with etapa(f"ler {os.path.basename(path)}", "carga"):
+                df = pd.read_parquet(converter_para_parquet(path, obrigatorias))
+            _lembrar(path, chave, df)
+    _checar_colunas(df, obrigatorias, path)
+    # Cópia rasa: quem chama pode filtrar/adicionar colunas sem afetar o cache
+    return df.copy(deep=False)
+
+
+def _gravar_compartilhado(path: str, destino: str, obrigatorias=None):
+    if os.path.isdir(path):
+        # Pasta de exportações: esquema e limpeza já feitos por partição, só
+        # os ensaios novos ou alterados são processados (ver ingestao.py)
+        from ingestao import ensaios_store, sincronizar
+
+        sincronizar(path)
+        df, relatorio, limpeza = ensaios_store(path)
+        _checar_colunas(df, obrigatorias, path)
+    else:
+        bruto = pd.read_parquet(converter_para_parquet(path, obrigatorias))
+        _checar_colunas(bruto, obrigatorias, path)
+        df, relatorio = aplicar_esquema(bruto)
+
+        # Sai ordenado por (rocha, id, tempo): o IndiceEnsaios usa a tabela sem copiá-la
+        with etapa("limpeza", "carga"):
+            df, limpeza = limpar_ensaios(df)
+
+    tabela = pa.Table.from_pandas(df, preserve_index=False)
+    meta = dict(tabela.schema.metadata or {})
+    meta[b"relatorio_esquema"] = json.dumps(relatorio).encode("utf-8")
+    meta[b"relatorio_limpeza"] = limpeza.to_json(orient="records").encode("utf-8")
+    tabela = tabela.replace_schema_metadata(meta)
+
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    tmp = caminho_tmp(destino)
+    with pa.OSFile(tmp, "wb") as saida:
+        with pa.ipc.new_file(saida, tabela.schema) as escritor:
+            escritor.write_table(tabela)
+    os.replace(tmp, destino)
+    _limpar_antigos(path, destino, "ensaios.arrow")
+
+
+def load_consolidada(path: str = "consolidada.xlsx", obrigatorias=None) -> pd.DataFrame:
+    # Amostras brutas já no esquema compacto (float32 / category, ver esquema.py).
+    # Aceita também uma pasta de exportações por ensaio (ver ingestao.py)
+    chave = caminho_cache(path, "ensaios.arrow")
+    with trava(chave):
+        df = _memoria.get(chave)
+        if df is None:
+            if not os.path.exists(chave):
+                with etapa(f"converter {os.path.basename(path)}", "carga"):
+                    _gravar_compartilhado(path, chave, obrigatorias)
+            # O arquivo mapeado fica aberto enquanto os buffers forem usados;
+            # colunas numéricas sem nulos viram arrays numpy sobre o próprio mmap
+            with etapa("abrir cache Arrow", "carga"):
+                tabela = pa.ipc.open_file(pa.memory_map(chave, "r")).read_all()
+                df = tabela.to_pandas(split_blocks=True)
+            with _trava_memoria:
+                _relatorios[chave] = json.loads(tabela.schema.metadata[b"relatorio_esquema"])
+                _limpezas[chave] = json.loads(tabela.schema.metadata[b"relatorio_limpeza"])
+            _lembrar(path, chave, df)
+    _checar_colunas(df, obrigatorias, path)
+    return df.copy(deep=False)
+
+
+def load_filtrado(path: str, filtros: dict, obrigatorias=None) -> pd.DataFrame:
+    # Só os ensaios pedidos ({coluna: valores}, ex.: rocha / id), no esquema
+    # compacto e limpos. Com o cache Arrow desta versão pronto, fatia dele;
+    # senão lê o arquivo filtrando durante a leitura (ver leitura.py), sem
+    # converter nem limpar o arquivo inteiro
+    chave = caminho_cache(path, "ensaios.arrow")
+    if chave in _memoria or os.path.exists(chave) or os.path.isdir(path):
+        return filtrar_tabela(load_consolidada(path, obrigatorias), filtros).reset_index(drop=True)
+    with etapa(f"ler {os.path.basename(path)} (filtrado)", "carga"):
+        # As colunas obrigatórias (e as do filtro) são checadas no cabeçalho
+        bruto = tipar_colunas(ler_tabela(path, obrigatorias=obrigatorias, filtros=filtros))
+    df, _ = aplicar_esquema(bruto)
+    with etapa("limpeza", "carga"):
+        df, _ = limpar_ensaios(df)
+    return df
+
+
+def relatorio_esquema(path: str = "consolidada.xlsx") -> dict:
+    # Valores descartados na coerção numérica e colunas mantidas em float64
+    load_consolidada(path)
+    return _relatorios[caminho_cache(path, "ensaios.arrow")]
+
+
+def relatorio_limpeza(path: str = "consolidada.xlsx") -> pd.DataFrame:
+    # Por ensaio: pontos lidos, duplicados e picos removidos, pontos finais e
+    # offset da deformação subtraído (ver limpeza.py)
+    load_consolidada(path)
+    registros = _limpezas[caminho_cache(path, "ensaios.arrow")]
+    return pd.DataFrame(registros, columns=list(registros[0]) if registros else COLUNAS_LIMPEZA)
+
+
+def indice_consolidada(path: str = "consolidada.xlsx") -> IndiceEnsaios:
+    chave = caminho_cache(path, "ensaios.arrow")
+    with trava(("indice", chave)):
+        indice = _indices.get(chave)
+        if indice is None:
+            df = load_consolidada(path)
+            with etapa("IndiceEnsaios", "filtro"):
+                indice = IndiceEnsaios(df)
+            with _trava_memoria:
+                _indices[chave] = indice
+    return indice
+
+
+def resumo_consolidada(path: str = "consolidada.xlsx", janela: tuple = JANELA_MODULO) -> pd.DataFrame:
+    # Resumo por ensaio (pico, módulos e inclinações da curva) gravado ao lado
+    # do cache dos dados brutos. Quando o xlsx muda, o resumo da versão
+    # anterior é reaproveitado e só os ensaios com linhas alteradas são
+    # recalculados. Outra janela do módulo (ver curvas.py) tem arquivo próprio;
+    # a pasta de exportações usa sempre a janela padrão.
+    sufixo = "resumo.parquet" if tuple(janela) == JANELA_MODULO else f"resumo-{janela[0]:g}-{janela[1]:g}.parquet"
+    destino = caminho_cache(path, sufixo)
+    with trava(destino):
+        res = _memoria.get(destino)
+        if res is None:
+            if os.path.isdir(path):
+                from ingestao import resumo_store, sincronizar
+
+                sincronizar(path)
+                res = resumo_store(path)
+            elif os.path.exists(destino):
+                res = pd.read_parquet(destino)
+            else:
+                antigos = [p for p in _versoes(path, sufixo) if p != destino]
+                anterior = pd.read_parquet(max(antigos, key=os.path.getmtime)) if antigos else None
+                df = load_consolidada(path, COLUNAS_PICO)
+                with etapa("resumo por ensaio", "calculo"):
+                    res = atualizar_resumo(df, anterior, janela=janela)
+                gravar_parquet(res, destino)
+                _limpar_antigos(path, destino, sufixo)
+            _lembrar(path, destino, res)
+    return res.copy(deep=False)
+
+
+def momentos_consolidada(path: str = "consolidada.xlsx") -> pd.DataFrame:
+    # Momentos por ensaio (rocha, id) das colunas do relatório, calculados num
+    # passe só e gravados ao lado do resumo (ver momentos.py); na pasta de
+    # exportações, juntados a partir dos momentos de cada partição
+    destino = caminho_cache(path, "momentos.parquet")
+    with trava(destino):
+        mom = _memoria.get(destino)
+        if mom is None:
+            if os.path.exists(destino):
+                mom = pd.read_parquet(destino)
+            elif os.path.isdir(path):
+                from ingestao import momentos_store
+
+                df = load_consolidada(path, ["rocha", "id"])
+                with etapa("momentos por ensaio", "calculo"):
+                    mom = momentos_store(path, df)
+                gravar_parquet(mom, destino)
+                _limpar_antigos(path, destino, "momentos.parquet")
+            else:
+                df = load_consolidada(path, ["rocha", "id"])
+                with etapa("momentos por ensaio", "calculo"):
+                    mom = momentos_blocos(df, [c for c in COLUNAS_ENSAIO if c in df.columns], ["rocha", "id"])
+                gravar_parquet(mom, destino)
+                _limpar_antigos(path, destino, "momentos.parquet")
+            _lembrar(path, destino, mom)
+    return mom.copy(deep=False)
+
+
+def momentos_ensaio(path: str, rocha, id_=None) -> pd.DataFrame:
+    # Blocos de um ensaio (ou de todos os ensaios da rocha, sem id_) da tabela
+    # de momentos, por busca no índice (rocha, id) montado uma vez por versão
+    # do arquivo, em vez de comparar as duas colunas inteiras a cada consulta
+    chave = caminho_cache(path, "momentos.parquet")
+    with trava(("indice", chave)):
+        mom = _indices.get(chave)
+        if mom is None:
+            mom = momentos_consolidada(path)
+            mom = mom.set_index(["rocha", "id"], drop=False).sort_index()
+            with _trava_memoria:
+                _indices[chave] = mom
+    try:
+        return mom.loc[[rocha if id_ is None else (rocha, id_)]]
+    except KeyError:
+        return mom.iloc[:0]
+
+
+def resumo_por_id(path: str = "consolidada.xlsx") -> pd.DataFrame:
+    # Resumo por ensaio indexado pelo id (texto), montado uma vez por versão
+    # do arquivo: a linha de um ensaio sai com .loc
+    chave = caminho_cache(path, "resumo.parquet")
+    with trava(("indice", chave)):
+        res = _indices.get(chave)
+        if res is None:
+            res = resumo_consolidada(path)
+            res = res.set_index(res["id"].astype(str))
+            with _trava_memoria:
+                _indices[chave] = res
+    return res
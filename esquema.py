@@ -0,0 +1,61 @@
+import numpy as np
+import pandas as pd
+
+
+# -----------------------------
+# Esquema compacto das amostras brutas dos ensaios
+# -----------------------------
+# Aplicado uma vez, na carga:
+#   - medidas (def, tensao, tempo, carga, ...) -> float32, se a precisão permitir
+#   - rocha e demais colunas de texto           -> category
+#   - id                                        -> inteiro (menor tipo possível)
+# Valores não numéricos nas colunas de medida viram NaN (como o
+# pd.to_numeric(errors="coerce") dos scripts) e são contados no relatório.
+
+MEDIDAS = ["def", "tensao", "tempo", "carga", "V1", "V2", "H1", "H2", "coef_poisson"]
+CATEGORIAS = ["rocha"]
+CHAVE_ID = "id"
+
+
+def _float32_seguro(x: np.ndarray) -> bool:
+    # float32 é aceito se não juntar valores vizinhos distintos (perda de
+    # resolução na curva) e não estourar a faixa do tipo
+    finitos = np.isfinite(x)
+    if finitos.any() and np.abs(x[finitos]).max() > np.finfo(np.float32).max:
+        return False
+    x32 = x.astype(np.float32)
+    perde = (np.diff(x) != 0) & (np.diff(x32) == 0) & np.isfinite(np.diff(x))
+    return not perde.any()
+
+
+def aplicar_esquema(df: pd.DataFrame):
+    df = df.copy(deep=False)
+    relatorio = {"coagidos": {}, "float64_mantidas": []}
+
+    for col in df.columns:
+        serie = df[col]
+        if col in MEDIDAS or (col != CHAVE_ID and pd.api.types.is_float_dtype(serie)):
+            num = pd.to_numeric(serie, errors="coerce")
+            coagidos = int((num.isna() & serie.notna()).sum())
+            if coagidos:
+                relatorio["coagidos"][col] = coagidos
+            x = num.to_numpy(dtype=np.float64, na_value=np.nan)
+            if _float32_seguro(x):
+                df[col] = x.astype(np.float32)
+            else:
+                df[col] = x
+                relatorio["float64_mantidas"].append(col)
+        elif col == CHAVE_ID:
+            num = pd.to_numeric(serie, errors="coerce")
+            if num.notna().all() and (num == np.floor(num)).all():
+                cabe = num.abs().max(skipna=True) <= np.iinfo(np.int32).max if len(num) else True
+                df[col] = num.astype(np.int32 if cabe else np.int64)
+            else:
+                # ids em texto: categoria (códigos inteiros)
+                df[col] = serie.astype("category")
+        elif col in CATEGORIAS or pd.api.types.is_string_dtype(serie) or serie.dtype == object:
+            df[col] = serie.astype("category")
+        elif pd.api.types.is_integer_dtype(serie):
+            df[col] = pd.to_numeric(serie, downcast="integer")
+
+    return df, relatorio
@@ -0,0 +1,212 @@
+import argparse
+import atexit
+import hashlib
+import os
+import re
+import shutil
+import sys
+import threading
+
+import pandas as pd
+import plotly
+import plotly.graph_objects as go
+import plotly.io as pio
+
+from amostragem import LTTB, METODOS
+from cenarios import CONFIG_PADRAO, IndiceLitologias, carregar_cenarios, valores_cenario
+from dados import CACHE_DIR, indice_consolidada, load_consolidada, load_planilha, resumo_consolidada
+from figuras import (
+    ESTILO_CENARIO,
+    LIMITE_TRACOS,
+    MODO_TRACOS,
+    MODO_WEBGL,
+    com_estilo,
+    figura_cenario,
+    figura_geral,
+    figura_individual,
+)
+from leitura import COLUNAS_CURVAS, caminho_tmp
+from medicao import etapa
+
+
+# -----------------------------
+# Exportação das figuras (teste7 / teste8) para PNG / SVG / PDF
+# -----------------------------
+# Renderização sem navegador pelo kaleido (v1, Chrome headless) via
+# plotly.io. O servidor do kaleido é aberto uma vez por processo e fica vivo
+# (start_sync_server, kaleido >= 1.1): as imagens seguintes não pagam a subida
+# do Chrome. Lotes vão num único plotly.io.write_images.
+#
+# Cada imagem fica em cache (CACHE_DIR/figuras) pelo hash do JSON da figura
+# junto com formato, tamanho e escala: figura igual não é renderizada de novo,
+# no app ou no lote.
+#
+# uso: python exportacao.py --saida figuras --formatos png svg pdf
+#      python exportacao.py --so-cenarios --formatos pdf
+
+FORMATOS = ["png", "svg", "pdf"]
+MIME = {"png": "image/png", "svg": "image/svg+xml", "pdf": "application/pdf"}
+PASTA_FIGURAS = os.path.join(CACHE_DIR, "figuras")
+
+# Tamanho em pixels de layout; a altura vem da figura quando ela define uma
+LARGURA = 1400
+ALTURA = 700
+ESCALA = 2
+
+_servidor_ativo = False
+_trava = threading.Lock()
+
+
+def _renderizador():
+    # Abre o servidor do kaleido na primeira exportação do processo
+    global _servidor_ativo
+    try:
+        import kaleido
+    except ImportError as e:
+        raise RuntimeError("A exportação de imagens precisa do pacote 'kaleido' (ver requirements.txt).") from e
+    with _trava:
+        if not _servidor_ativo and hasattr(kaleido, "start_sync_server"):
+            kaleido.start_sync_server(silence_warnings=True)
+            atexit.register(kaleido.stop_sync_server, silence_warnings=True)
+            _servidor_ativo = True
+
+
+def _tamanho(fig: go.Figure, largura: int = None, altura: int = None):
+    return largura or fig.layout.width or LARGURA, altura or fig.layout.height or ALTURA
+
+
+def chave_figura(fig: go.Figure, formato: str, largura: int = None, altura: int = None, escala: float = ESCALA) -> str:
+    largura, altura = _tamanho(fig, largura, altura)
+    bruto = f"{fig.to_json()}|{formato}|{largura}|{altura}|{escala}|{plotly.__version__}"
+    return hashlib.sha256(bruto.encode("utf-8")).hexdigest()[:32]
+
+
+def caminho_figura(chave: str, formato: str) -> str:
+    return os.path.join(PASTA_FIGURAS, f"{chave}.{formato}")
+
+
+def imagem_figura(fig: go.Figure, formato: str = "png", largura: int = None, altura: int = None,
+                  escala: float = ESCALA) -> bytes:
+    destino = caminho_figura(chave_figura(fig, formato, largura, altura, escala), formato)
+    if not os.path.exists(destino):
+        _renderizador()
+        largura, altura = _tamanho(fig, largura, altura)
+        with etapa(f"kaleido {formato}", "render"):
+            dados = pio.to_image(fig, format=formato, width=largura, height=altura, scale=escala)
+        os.makedirs(PASTA_FIGURAS, exist_ok=True)
+        tmp = caminho_tmp(destino)
+        with open(tmp, "wb") as f:
+            f.write(dados)
+        os.replace(tmp, destino)
+    with open(destino, "rb") as f:
+        return f.read()
+
+
+def exportar_figuras(itens: list, largura: int = None, altura: int = None, escala: float = ESCALA) -> dict:
+    # itens: [(figura, arquivo de destino)], formato pela extensão do destino.
+    # Só as figuras fora do cache são renderizadas, todas num write_images
+    pendentes = {}
+    copias = []
+    for fig, destino in itens:
+        formato = os.path.splitext(destino)[1].lstrip(".").lower()
+        if formato not in FORMATOS:
+            raise ValueError(f"Formato não suportado: {destino} (use {', '.join(FORMATOS)})")
+        cache = caminho_figura(chave_figura(fig, formato, largura, altura, escala), formato)
+        if not os.path.exists(cache):
+            pendentes[cache] = (fig, formato)
+        copias.append((cache, destino))
+
+    if pendentes:
+        _renderizador()
+        os.makedirs(PASTA_FIGURAS, exist_ok=True)
+        caches = list(pendentes)
+        figs = [pendentes[c][0] for c in caches]
+        tmps = [caminho_tmp(c) for c in caches]
+        tamanhos = [_tamanho(f, largura, altura) for f in figs]
+        with etapa(f"kaleido lote ({len(figs)})", "render"):
+            pio.write_images(
+                figs, tmps, format=[pendentes[c][1] for c in caches],
+                width=[t[0] for t in tamanhos], height=[t[1] for t in tamanhos], scale=escala,
+            )
+        for tmp, cache in zip(tmps, caches):
+            os.replace(tmp, cache)
+
+    for cache, destino in copias:
+        os.makedirs(os.path.dirname(os.path.abspath(destino)), exist_ok=True)
+        shutil.copyfile(cache, destino)
+    return {"total": len(copias), "renderizadas": len(pendentes), "do_cache": len(copias) - len(pendentes)}
+
+
+# -----------------------------
+# Figuras do lote: cenários (teste7) e ensaios (teste8)
+# -----------------------------
+
+def _nome_arquivo(texto) -> str:
+    return re.sub(r"[^\w.-]", "_", str(texto))
+
+
+def figuras_cenarios(vale_path: str, geo_path: str, config: dict) -> dict:
+    # {id do cenário: figura} com o estilo padrão do teste7
+    df_vale = load_planilha(vale_path, ["Litologia", "Tensão de Pico"])
+    df_vale["Tensão de Pico"] = pd.to_numeric(df_vale["Tensão de Pico"], errors="coerce")
+    geo_peak = resumo_consolidada(geo_path)["tensao"].dropna()
+    indice = IndiceLitologias(df_vale, config)
+    return {
+        c["id"]: com_estilo(
+            figura_cenario(valores_cenario(config, c["id"], indice, geo_peak), config["cores"], c["id"]),
+            traces=ESTILO_CENARIO,
+        )
+        for c in config["cenarios"]
+    }
+
+
+def figuras_ensaios(path: str, n_pontos: int = 2000, metodo: str = LTTB, individuais: bool = True) -> dict:
+    # {"geral": figura geral, (rocha, id): figura individual}, como no teste8
+    df = load_consolidada(path, COLUNAS_CURVAS)
+    indice = indice_consolidada(path)
+    modo = MODO_WEBGL if len(indice.pares()) > LIMITE_TRACOS else MODO_TRACOS
+    figuras = {"geral": figura_geral(df, "def", "tensao", modo, n_pontos, metodo)}
+    if individuais:
+        for rocha, id_ in indice.pares():
+            figuras[(rocha, id_)] = figura_individual(indice.ensaio(rocha, id_), rocha, id_, n_pontos, metodo)
+    return figuras
+
+
+def exportar_lote(saida: str = "figuras", formatos: list = None, vale_path: str = "testeinacio estatisca.xlsx",
+                  geo_path: str = "consolidada.xlsx", cenarios_path: str = CONFIG_PADRAO, cenarios: bool = True,
+                  ensaios: bool = True, n_pontos: int = 2000, metodo: str = LTTB) -> dict:
+    formatos = formatos or ["png"]
+    itens = []
+    if cenarios:
+        for id_, fig in figuras_cenarios(vale_path, geo_path, carregar_cenarios(cenarios_path)).items():
+            itens += [(fig, os.path.join(saida, "cenarios", f"cenario_{_nome_arquivo(id_)}.{f}")) for f in formatos]
+    if ensaios:
+        for chave, fig in figuras_ensaios(geo_path, n_pontos, metodo).items():
+            nome = chave if chave == "geral" else _nome_arquivo(f"{chave[0]}_{chave[1]}")
+            itens += [(fig, os.path.join(saida, "ensaios", f"{nome}.{f}")) for f in formatos]
+    return exportar_figuras(itens)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Exporta as figuras dos cenários (teste7) e dos ensaios (teste8).")
+    parser.add_argument("--saida", default="figuras", help="pasta de saída")
+    parser.add_argument("--formatos", nargs="+", choices=FORMATOS, default=["png"])
+    parser.add_argument("--vale", default="testeinacio estatisca.xlsx", help="planilha do Vale")
+    parser.add_argument("--geo", default="consolidada.xlsx", help="planilha consolidada ou pasta de exportações")
+    parser.add_argument("--cenarios", default=CONFIG_PADRAO, help="arquivo de cenários")
+    parser.add_argument("--pontos", type=int, default=2000, help="pontos por ensaio (máx.)")
+    parser.add_argument("--metodo", choices=METODOS, default=LTTB)
+    grupo = parser.add_mutually_exclusive_group()
+    grupo.add_argument("--so-cenarios", action="store_true", help="só os boxplots dos cenários")
+    grupo.add_argument("--so-ensaios", action="store_true", help="só as curvas dos ensaios")
+    args = parser.parse_args()
+
+    try:
+        resultado = exportar_lote(
+            args.saida, args.formatos, args.vale, args.geo, args.cenarios,
+            cenarios=not args.so_ensaios, ensaios=not args.so_cenarios, n_pontos=args.pontos, metodo=args.metodo,
+        )
+    except RuntimeError as e:
+        print(e)
+        sys.exit(1)
+    print(resultado)
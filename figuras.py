@@ -0,0 +1,362 @@
+import random
+
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+import streamlit as st
+
+from amostragem import LTTB, reduzir
+from dados import indice_consolidada
+from indice import limites_segmentos
+from momentos import faixa_coluna
+
+
+# -----------------------------
+# Gráfico geral: todos os ensaios sobrepostos (teste8)
+# -----------------------------
+# A tabela é ordenada por id uma única vez e cada ensaio vira uma fatia
+# contígua dos arrays (um único passe, sem df[df["id"] == ...] por ensaio).
+
+MODO_TRACOS = "Um traço por ensaio"
+MODO_WEBGL = "WebGL (traço único)"
+
+# Acima desse número de ensaios o modo WebGL é o padrão
+LIMITE_TRACOS = 100
+
+
+def segmentos_por_id(df: pd.DataFrame, col_id: str = "id", ordenado: bool = False):
+    # ordenado=True: a tabela já vem ordenada por id (ex.: saída do reduzir)
+    if not ordenado:
+        df = df.sort_values(col_id, kind="stable")
+    ids = df[col_id].to_numpy()
+    inicios, fins = limites_segmentos(ids)
+    return df, ids[inicios], inicios, fins
+
+
+def cores_ensaios(n: int, seed: int = 42) -> list:
+    # Mesma sequência de cores aleatórias usada originalmente no teste8
+    random.seed(seed)
+    return [
+        f"rgb({random.randint(0,255)},{random.randint(0,255)},{random.randint(0,255)})"
+        for _ in range(n)
+    ]
+
+
+def figura_individual(df_ind: pd.DataFrame, rocha, id_sel, n_pontos: int = None, metodo: str = LTTB) -> go.Figure:
+    if n_pontos:
+        df_ind = reduzir(df_ind, "def", "tensao", n_pontos, metodo)
+
+    fig = go.Figure()
+    fig.add_trace(
+        go.Scatter(
+            x=df_ind["def"],
+            y=df_ind["tensao"],
+            mode="markers",
+            marker=dict(size=6),
+            name=f"ID {id_sel}"
+        )
+    )
+
+    fig.update_layout(
+        xaxis_title="δ (deslocamento axial)",
+        yaxis_title="Tensão (MPa)",
+        title=f"Rocha: {rocha} | Ensaio ID: {id_sel}",
+        hovermode="closest"
+    )
+    return fig
+
+
+def figura_geral(
+    df: pd.DataFrame,
+    x: str = "def",
+    y: str = "tensao",
+    modo: str = MODO_TRACOS,
+    n_pontos: int = None,
+    metodo: str = LTTB,
+) -> go.Figure:
+    if n_pontos:
+        # Redução por ensaio (n_pontos em cada curva), mantendo o pico de
+        # cada um; a saída já vem ordenada por id
+        df = reduzir(df, x, y, n_pontos, metodo, col_id="id")
+    df, ids, inicios, fins = segmentos_por_id(df, ordenado=bool(n_pontos))
+
+    # Ensaios com um único ponto ficam de fora, como antes
+    tamanhos = fins - inicios
+    validos = tamanhos > 1
+    pontos_validos = np.repeat(validos, tamanhos)
+    ids, inicios, fins, tamanhos = ids[validos], inicios[validos], fins[validos], tamanhos[validos]
+    cores = cores_ensaios(len(ids))
+
+    xs = df[x].to_numpy()
+    ys = df[y].to_numpy()
+
+    fig = go.Figure()
+    if modo == MODO_WEBGL:
+        if len(ids):
+            # Um único Scattergl: a cor de cada ponto vem do código do ensaio,
+            # mapeado numa escala discreta com a paleta acima
+            codigos = np.repeat(np.arange(len(ids)), tamanhos)
+            n = max(len(ids) - 1, 1)
+            escala = [[k / n, c] for k, c in enumerate(cores)]
+            if len(escala) == 1:
+                escala.append([1.0, cores[0]])
+            fig.add_trace(
+                go.Scattergl(
+                    x=xs[pontos_validos],
+                    y=ys[pontos_validos],
+                    mode="markers",
+                    marker=dict(
+                        size=5,
+                        color=codigos,
+                        colorscale=escala,
+                        cmin=0,
+                        cmax=n,
+                        showscale=False,
+                    ),
+                    customdata=np.repeat(ids, tamanhos),
+                    opacity=0.85,
+                    name="Ensaios",
+                    hovertemplate="ID %{customdata}<br>δ: %{x}<br>Tensão: %{y}<extra></extra>",
+                )
+            )
+    else:
+        for ensaio_id, a, b, cor in zip(ids, inicios, fins, cores):
+            fig.add_trace(
+                go.Scatter(
+                    x=xs[a:b],
+                    y=ys[a:b],
+                    mode="markers",
+                    marker=dict(size=5, color=cor),
+                    name=f"ID {ensaio_id}",
+                    opacity=0.85
+                )
+            )
+
+    fig.update_layout(
+        xaxis_title="δ (deslocamento axial)",
+        yaxis_title="Tensão (MPa)",
+        title=f"Tensão x Deslocamento Axial – Laboratório Comercial - Total {len(ids)} Ensaios",
+        hovermode="closest",
+        legend=dict(itemsizing="constant")
+    )
+    return fig
+
+
+# -----------------------------
+# Figura base em cache + ajustes de estilo (teste3/4/7)
+# -----------------------------
+# A figura com os dados é montada uma vez por (dados, versão) e guardada pelo
+# app; mudanças só de aparência (escala e limites dos eixos, jitter, tamanho
+# dos pontos) viram update_traces/update_layout numa cópia, sem voltar aos
+# dados. A figura em cache nunca é alterada.
+
+# Se menos que essa fração dos pontos da figura base cai dentro dos limites
+# escolhidos, vale refazer a redução só na faixa visível (zoom com resolução)
+FRACAO_REFINAR = 0.5
+
+
+def com_estilo(base: go.Figure, traces: dict = None, layout: dict = None) -> go.Figure:
+    fig = go.Figure(base)
+    if traces:
+        fig.update_traces(**traces)
+    if layout:
+        fig.update_layout(**layout)
+    return fig
+
+
+def limites_eixo(faixa: dict, escala: str = "linear", robusto: bool = False):
+    # (mínimo, máximo, valor inicial) do slider de limites a partir dos
+    # metadados da coluna (momentos.faixa_coluna); em log o mínimo é o menor
+    # valor positivo. None se a escala não for possível (log sem positivos).
+    lo = faixa["min_pos"] if escala == "log" else faixa["min"]
+    hi = faixa["max"]
+    if not (np.isfinite(lo) and np.isfinite(hi)):
+        return None
+    inicial = (lo, hi)
+    if robusto:
+        # Percentis 1% / 99%: extremos isolados não achatam a curva
+        a = max(faixa["1%"], lo) if np.isfinite(faixa["1%"]) else lo
+        b = min(faixa["99%"], hi) if np.isfinite(faixa["99%"]) else hi
+        if a < b:
+            inicial = (a, b)
+    return lo, hi, inicial
+
+
+def range_plotly(lo: float, hi: float, escala: str = "linear") -> list:
+    # Em eixo log o Plotly espera o range em log10
+    if escala == "log":
+        return [float(np.log10(lo)), float(np.log10(hi))]
+    return [lo, hi]
+
+
+def fracao_visivel(fig: go.Figure, faixa_x=None, faixa_y=None) -> float:
+    total = visiveis = 0
+    for trace in fig.data:
+        x = np.asarray(trace.x, dtype=np.float64)
+        y = np.asarray(trace.y, dtype=np.float64)
+        dentro = np.ones(len(x), dtype=bool)
+        if faixa_x is not None:
+            dentro &= (x >= faixa_x[0]) & (x <= faixa_x[1])
+        if faixa_y is not None:
+            dentro &= (y >= faixa_y[0]) & (y <= faixa_y[1])
+        total += len(x)
+        visiveis += int(dentro.sum())
+    return visiveis / total if total else 1.0
+
+
+# -----------------------------
+# Dispersão de um ensaio com eixos escolhidos (teste3/teste4)
+# -----------------------------
+
+# Figura com os dados por (versão do arquivo, ensaio, eixos, redução); escala
+# e limites dos eixos são só ajustes de layout numa cópia (com_estilo)
+@st.cache_resource(show_spinner=False, max_entries=32)
+def figura_base(path, versao, rocha, id_, eixo_x, eixo_y, n_pontos, metodo, faixa_x=None, faixa_y=None):
+    df_plot = reduzir(
+        indice_consolidada(path).ensaio(rocha, id_), eixo_x, eixo_y, n_pontos, metodo,
+        faixa_x=faixa_x, faixa_y=faixa_y
+    )
+    return px.scatter(
+        df_plot,
+        x=eixo_x,
+        y=eixo_y,
+        title=f"Gráfico Interativo: {eixo_x} x {eixo_y}",
+    )
+
+
+def limites(momentos_id: pd.DataFrame, eixo: str, escala: str, robusto: bool = False):
+    # (escala, (mínimo, máximo, inicial)) do slider do eixo a partir dos
+    # momentos do ensaio. Em log o limite inferior é o menor valor positivo;
+    # sem positivos, volta ao linear
+    faixa = faixa_coluna(momentos_id, eixo)
+    lim = limites_eixo(faixa, escala, robusto)
+    if lim is None and escala == "log":
+        st.warning(f"'{eixo}' não tem valores positivos: usando escala linear.")
+        escala, lim = "linear", limites_eixo(faixa, "linear", robusto)
+    if lim is None:
+        # Coluna sem nenhum valor finito neste ensaio (vazia ou só NaN)
+        st.warning(f"'{eixo}' não tem valores numéricos neste ensaio: escolha outro eixo ou ensaio.")
+        st.stop()
+    return escala, lim
+
+
+# -----------------------------
+# Boxplot com estatística calculada no servidor (teste6/7)
+# -----------------------------
+# Em vez de mandar todos os valores para o go.Box calcular os quartis no
+# navegador, calculamos q1/mediana/q3/cercas/média/desvio aqui (com as mesmas
+# regras do Plotly) e enviamos só os pontos necessários: os outliers e, com
+# "mostrar pontos", uma amostra aleatória limitada dos demais.
+
+MAX_PONTOS_BOX = 2000
+
+
+def estatistica_box(valores, pontos: str = "all", max_pontos: int = MAX_PONTOS_BOX, seed: int = 42) -> dict:
+    # Campos do go.Box para uma caixa (listas de 1 elemento); None se vazio
+    v = np.asarray(valores, dtype=np.float64)
+    v = np.sort(v[np.isfinite(v)])
+    n = len(v)
+    if not n:
+        return None
+
+    # Quartis pelo método "linear" do Plotly (p * n - 0.5, igual ao hazen do numpy)
+    q1, mediana, q3 = np.quantile(v, [0.25, 0.5, 0.75], method="hazen")
+    # Cercas: valores extremos dentro de 1.5 * IQR (como o Plotly)
+    cerca_inf = min(q1, v[min(np.searchsorted(v, 2.5 * q1 - 1.5 * q3, "left"), n - 1)])
+    cerca_sup = max(q3, v[max(np.searchsorted(v, 2.5 * q3 - 1.5 * q1, "right") - 1, 0)])
+
+    fora = (v < cerca_inf) | (v > cerca_sup)
+    enviados = v[fora]
+    if pontos == "all":
+        dentro = v[~fora]
+        k = max(max_pontos - len(enviados), 0)
+        if len(dentro) > k:
+            dentro = np.random.default_rng(seed).choice(dentro, k, replace=False)
+        enviados = np.concatenate([dentro, enviados])
+
+    return dict(
+        q1=[float(q1)],
+        median=[float(mediana)],
+        q3=[float(q3)],
+        lowerfence=[float(cerca_inf)],
+        upperfence=[float(cerca_sup)],
+        mean=[float(v.mean())],
+        sd=[float(v.std())],  # o Plotly usa o desvio populacional no boxmean="sd"
+        y=[enviados],
+    )
+
+
+# -----------------------------
+# Boxplot de um cenário, no estilo de publicação (teste7 / exportacao.py)
+# -----------------------------
+# pontos (None = o Plotly calcula a caixa com todos os valores; "all" ou
+# "outliers" = caixa pré-calculada com estatistica_box). Pontos, jitter e
+# tamanho ficam para com_estilo (ESTILO_CENARIO é o padrão do teste7).
+
+ESTILO_CENARIO = dict(boxpoints="all", jitter=0.25, marker_size=5)
+
+
+def figura_cenario(grupos: dict, cores: dict, scenario: str, pontos: str = None,
+                   max_pontos: int = MAX_PONTOS_BOX) -> go.Figure:
+    fig = go.Figure()
+
+    for name, values in grupos.items():
+        values = pd.Series(values).dropna().astype(float)
+        c = cores.get(name, "#CCCCCC")
+        dados_box = dict(y=values)
+        if pontos is not None:
+            dados_box = estatistica_box(values, pontos, max_pontos) or dict(y=[])
+            dados_box["x"] = [f"<b>{name}</b>"]
+
+        fig.add_trace(
+            go.Box(
+                **dados_box,
+                name=f"<b>{name}</b>",
+                boxmean="sd",
+                pointpos=0,
+                marker=dict(color=c, opacity=0.60),
+                line=dict(color=c, width=2),
+                fillcolor=c,
+                opacity=0.90,
+                hovertemplate=(
+                    f"<b>{name}</b><br>"
+                    "Tensão: %{y:.2f} MPa<br>"
+                    "<extra></extra>"
+                ),
+            )
+        )
+
+    fig.update_layout(
+        title=dict(
+            text=f"<b>Resistência Compressão UCS — {scenario}</b>",
+            x=0.02,
+            font=dict(size=24, family="Arial Black", color="black"),
+        ),
+        yaxis=dict(
+            title=dict(
+                text="<b>Resistência à Compressão (MPa)</b>",
+                font=dict(size=20, family="Arial Black", color="black"),
+            ),
+            tickfont=dict(size=16, family="Arial Black", color="black"),
+            gridcolor="rgba(0,0,0,0.08)",
+        ),
+        xaxis=dict(
+            title=dict(
+                text="<b>Litotipo</b>",
+                font=dict(size=20, family="Arial Black", color="black"),
+            ),
+            tickfont=dict(size=16, family="Arial Black", color="black"),
+        ),
+        legend=dict(
+            title=dict(
+                text="<b>Grupo</b>",
+                font=dict(size=20, family="Arial Black", color="black"),
+            ),
+            font=dict(size=18, family="Arial Black", color="black"),
+        ),
+        height=650,
+        plot_bgcolor="white",
+        margin=dict(l=70, r=30, t=90, b=90),
+    )
+    return fig
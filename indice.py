@@ -0,0 +1,90 @@
+import numpy as np
+import pandas as pd
+
+
+# -----------------------------
+# Índice (rocha, id) -> fatia contígua da tabela
+# -----------------------------
+# A tabela é ordenada uma única vez por (rocha, id); a partir daí, listar as
+# rochas, os IDs de uma rocha ou extrair um ensaio é uma consulta em dicionário
+# seguida de um iloc[a:b], sem varrer a tabela inteira com máscaras booleanas.
+
+class IndiceEnsaios:
+    def __init__(self, df: pd.DataFrame, col_rocha: str = "rocha", col_id: str = "id"):
+        cod_r, _ = pd.factorize(df[col_rocha], sort=True)
+        cod_i, _ = pd.factorize(df[col_id], sort=True)
+
+        # Só reordena (e copia) se a tabela ainda não estiver ordenada
+        if len(df) and not _ordenado(cod_r, cod_i):
+            ordem = np.lexsort((cod_i, cod_r))
+            df = df.iloc[ordem].reset_index(drop=True)
+            cod_r, cod_i = cod_r[ordem], cod_i[ordem]
+        else:
+            df = df.reset_index(drop=True)
+
+        self.tabela = df
+        n = len(df)
+        quebras = np.flatnonzero((cod_r[1:] != cod_r[:-1]) | (cod_i[1:] != cod_i[:-1])) + 1
+        inicios = np.r_[0, quebras] if n else np.array([], dtype=int)
+        fins = np.r_[quebras, n] if n else np.array([], dtype=int)
+
+        rochas = df[col_rocha].to_numpy()[inicios]
+        ids = df[col_id].to_numpy()[inicios]
+
+        self._fatias = {}
+        self._ids = {}
+        self._rocha_fatia = {}
+        for r, i, a, b in zip(rochas.tolist(), ids.tolist(), inicios.tolist(), fins.tolist()):
+            self._fatias[(r, i)] = (a, b)
+            self._ids.setdefault(r, []).append(i)
+            ini, _ = self._rocha_fatia.get(r, (a, b))
+            self._rocha_fatia[r] = (ini, b)
+
+    def rochas(self) -> list:
+        return list(self._ids)
+
+    def ids(self, rocha) -> list:
+        return list(self._ids.get(rocha, []))
+
+    def pares(self) -> list:
+        return list(self._fatias)
+
+    def rocha(self, rocha) -> pd.DataFrame:
+        a, b = self._rocha_fatia.get(rocha, (0, 0))
+        return self.tabela.iloc[a:b]
+
+    def ensaio(self, rocha, id_) -> pd.DataFrame:
+        a, b = self._fatias.get((rocha, id_), (0, 0))
+        return self.tabela.iloc[a:b]
+
+
+def _ordenado(cod_r: np.ndarray, cod_i: np.ndarray) -> bool:
+    dr = np.diff(cod_r)
+    if (dr < 0).any():
+        return False
+    di = np.diff(cod_i)
+    return not ((dr == 0) & (di < 0)).any()
+
+
+# -----------------------------
+# Segmentos contíguos (usados por amostragem, figuras e resumo)
+# -----------------------------
+
+def limites_segmentos(chaves: np.ndarray):
+    # Início e fim de cada sequência de chaves iguais (array já ordenado)
+    chaves = np.asarray(chaves)
+    if not len(chaves):
+        vazio = np.array([], dtype=np.int64)
+        return vazio, vazio
+    quebras = np.flatnonzero(chaves[1:] != chaves[:-1]) + 1
+    return np.r_[0, quebras], np.r_[quebras, len(chaves)]
+
+
+def primeiro_extremo(valor: np.ndarray, inicios: np.ndarray, maximo: bool = True) -> np.ndarray:
+    # Índice do primeiro ponto com o maior (ou menor) valor em cada segmento
+    red = np.maximum.reduceat(valor, inicios) if maximo else np.minimum.reduceat(valor, inicios)
+    tamanhos = np.diff(np.r_[inicios, len(valor)])
+    segmento = np.repeat(np.arange(len(inicios)), tamanhos)
+    cand = np.flatnonzero(valor == red[segmento])
+    _, primeiro = np.unique(segmento[cand], return_index=True)
+    return cand[primeiro]
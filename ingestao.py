@@ -0,0 +1,297 @@
+import hashlib
+import json
+import os
+import re
+import sys
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from dados import CACHE_DIR, VERSAO_CACHE, gravar_parquet, ler_planilha, prefixo_cache, tipar_colunas, trava
+from esquema import aplicar_esquema
+from leitura import caminho_tmp
+from limpeza import COLUNAS_LIMPEZA, VERSAO_LIMPEZA, limpar_ensaios
+from medicao import etapa
+from momentos import COLUNAS_ENSAIO, momentos_blocos
+from resumo import COLUNAS_RESUMO, resumo_ensaios
+
+
+# -----------------------------
+# Ingestão incremental de exportações por ensaio
+# -----------------------------
+# Em vez de reconsolidar tudo num único xlsx, o laboratório deixa um arquivo
+# por ensaio (xlsx ou csv) numa pasta. A cada sincronização só os arquivos
+# novos ou alterados (mtime/tamanho) são lidos; cada ensaio vira uma partição
+# Parquet própria e o resumo por ensaio é atualizado só para os ids afetados.
+#
+# Se o mesmo id aparecer em mais de um arquivo, vale o arquivo mais recente.
+# As partições guardam as amostras como vieram; o resumo é calculado sobre as
+# amostras limpas (ver limpeza.py), como na planilha consolidada.
+#
+# O esquema, a limpeza e os momentos também são guardados por partição
+# (pasta "processadas", chave = mtime/tamanho da partição): um ensaio novo
+# custa o processamento de um ensaio; a tabela compartilhada da pasta (ver
+# dados.py) só junta as partições já processadas.
+
+EXTENSOES = (".xlsx", ".csv")
+
+MANIFESTO = "manifesto.json"
+RESUMO = "resumo.parquet"
+PROCESSADAS = "processadas"
+
+
+def arquivos_exportados(diretorio: str) -> list:
+    # [(nome, stat)] dos arquivos de ensaio da pasta, em ordem de nome
+    arquivos = []
+    for entrada in os.scandir(diretorio):
+        nome = entrada.name
+        if entrada.is_file() and nome.lower().endswith(EXTENSOES) and not nome.startswith("~$"):
+            arquivos.append((nome, entrada.stat()))
+    return sorted(arquivos, key=lambda a: a[0])
+
+
+def pasta_store(diretorio: str) -> str:
+    return os.path.join(CACHE_DIR, f"store-{prefixo_cache(diretorio)}")
+
+
+def _nome_particao(id_) -> str:
+    return "ensaio_" + re.sub(r"[^\w.-]", "_", str(id_)) + ".parquet"
+
+
+def _ler_manifesto(store: str) -> dict:
+    caminho = os.path.join(store, MANIFESTO)
+    if not os.path.exists(caminho):
+        return {"arquivos": {}, "dono": {}}
+    with open(caminho, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _gravar_manifesto(store: str, manifesto: dict):
+    caminho = os.path.join(store, MANIFESTO)
+    tmp = caminho_tmp(caminho)
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifesto, f, ensure_ascii=False, indent=1)
+    os.replace(tmp, caminho)
+
+
+def sincronizar(diretorio: str) -> dict:
+    # Uma sincronização por vez (as sessões do Streamlit são threads)
+    with trava(pasta_store(diretorio)):
+        return _sincronizar(diretorio)
+
+
+def _sincronizar(diretorio: str) -> dict:
+    store = pasta_store(diretorio)
+    os.makedirs(os.path.join(store, "particoes"), exist_ok=True)
+    manifesto = _ler_manifesto(store)
+    conhecidos = manifesto["arquivos"]
+    dono = manifesto["dono"]
+
+    atuais = {nome: st for nome, st in arquivos_exportados(diretorio)}
+    alterados = [
+        nome for nome, st in atuais.items()
+        if nome not in conhecidos
+        or conhecidos[nome]["mtime_ns"] != st.st_mtime_ns
+        or conhecidos[nome]["tamanho"] != st.st_size
+    ]
+    removidos = [nome for nome in conhecidos if nome not in atuais]
+
+    # Ensaios que ficam sem dono (arquivo removido/alterado) podem voltar a
+    # ser fornecidos por outro arquivo que também os contenha
+    orfaos = {i for i, arq in dono.items() if arq in removidos or arq in alterados}
+    for nome, info in conhecidos.items():
+        if nome in atuais and nome not in alterados and orfaos & set(info["ids"]):
+            alterados.append(nome)
+
+    for nome in removidos:
+        del conhecidos[nome]
+    for i in orfaos:
+        del dono[i]
+
+    # Do mais antigo para o mais recente: o último a escrever um id é o dono
+    alterados.sort(key=lambda nome: (atuais[nome].st_mtime_ns, nome))
+    gravados = {}
+    for nome in alterados:
+        df = ler_planilha(os.path.join(diretorio, nome))
+        if "id" not in df.columns:
+            raise ValueError(f"{nome}: arquivo de ensaio precisa ter a coluna 'id'.")
+        ids = []
+        for id_, df_id in df.groupby("id", sort=False):
+            chave = str(id_)
+            ids.append(chave)
+            atual = dono.get(chave)
+            if atual is not None and atual != nome and atual in atuais and (
+                (atuais[atual].st_mtime_ns, atual) > (atuais[nome].st_mtime_ns, nome)
+            ):
+                continue
+            gravar_parquet(df_id, os.path.join(store, "particoes", _nome_particao(id_)))
+            dono[chave] = nome
+            gravados[chave] = df_id
+        conhecidos[nome] = {
+            "mtime_ns": atuais[nome].st_mtime_ns,
+            "tamanho": atuais[nome].st_size,
+            "ids": ids,
+        }
+
+    apagados = orfaos - set(dono)
+    for chave in apagados:
+        try:
+            os.remove(os.path.join(store, "particoes", _nome_particao(chave)))
+        except OSError:
+            pass
+
+    # Resumo: troca só as linhas dos ensaios gravados ou apagados; resumo de
+    # uma versão sem todas as colunas atuais (ou de outra versão da limpeza) é
+    # refeito com todas as partições
+    afetados = set(gravados) | apagados
+    anterior = resumo_store(diretorio)
+    desatualizado = len(anterior) > 0 and (
+        not set(COLUNAS_RESUMO) <= set(anterior.columns) or manifesto.get("limpeza") != VERSAO_LIMPEZA
+    )
+    if afetados or desatualizado or not os.path.exists(os.path.join(store, RESUMO)):
+        recalcular = list(gravados.values())
+        if desatualizado:
+            anterior, recalcular = pd.DataFrame(), [load_store(diretorio)]
+        elif len(anterior):
+            anterior = anterior[~anterior["id"].astype(str).isin(afetados)]
+        novos = resumo_ensaios(limpar_ensaios(pd.concat(recalcular, ignore_index=True))[0]) if recalcular else None
+        partes = [p for p in (anterior, novos) if p is not None and len(p)]
+        res = pd.concat(partes, ignore_index=True) if partes else pd.DataFrame()
+        if len(res):
+            # Arquivos de origens diferentes (xlsx x csv) podem divergir no tipo
+            res = tipar_colunas(res.sort_values("id", kind="stable").reset_index(drop=True))
+        gravar_parquet(res, os.path.join(store, RESUMO))
+
+    manifesto["limpeza"] = VERSAO_LIMPEZA
+    _gravar_manifesto(store, manifesto)
+    return {
+        "arquivos_lidos": len(alterados),
+        "arquivos_removidos": len(removidos),
+        "ensaios_gravados": len(gravados),
+        "ensaios_removidos": len(apagados),
+        "ensaios_total": len(dono),
+    }
+
+
+def load_store(diretorio: str) -> pd.DataFrame:
+    pasta = os.path.join(pasta_store(diretorio), "particoes")
+    arquivos = sorted(os.listdir(pasta)) if os.path.isdir(pasta) else []
+    partes = [pd.read_parquet(os.path.join(pasta, a)) for a in arquivos if a.endswith(".parquet")]
+    if not partes:
+        return pd.DataFrame()
+    df = pd.concat(partes, ignore_index=True).sort_values("id", kind="stable").reset_index(drop=True)
+    return tipar_colunas(df)
+
+
+def _processar(origem: str, destino: str):
+    # Esquema, limpeza e momentos de uma partição; os relatórios vão nos
+    # metadados do Parquet. Colunas ausentes no ensaio entram nos momentos
+    # como NaN (n = 0), para juntar com os das outras partições
+    df, relatorio = aplicar_esquema(tipar_colunas(pd.read_parquet(origem)))
+    df, limpeza = limpar_ensaios(df)
+    tabela = pa.Table.from_pandas(df, preserve_index=False)
+    meta = dict(tabela.schema.metadata or {})
+    meta[b"relatorio_esquema"] = json.dumps(relatorio).encode("utf-8")
+    meta[b"relatorio_limpeza"] = limpeza.to_json(orient="records").encode("utf-8")
+    tmp = caminho_tmp(destino)
+    pq.write_table(tabela.replace_schema_metadata(meta), tmp)
+    os.replace(tmp, destino)
+
+    faltando = {c: np.nan for c in ["rocha", "id"] + COLUNAS_ENSAIO if c not in df.columns}
+    gravar_parquet(momentos_blocos(df.assign(**faltando), COLUNAS_ENSAIO, ["rocha", "id"]), _momentos_de(destino))
+
+
+def _momentos_de(processada: str) -> str:
+    return processada[:-len(".parquet")] + ".momentos.parquet"
+
+
+def particoes_processadas(diretorio: str) -> list:
+    # Caminhos das partições já com esquema/limpeza aplicados (uma por ensaio,
+    # em ordem de nome); processa só as novas ou alteradas desde a última vez
+    store = pasta_store(diretorio)
+    pasta = os.path.join(store, "particoes")
+    saida = os.path.join(store, PROCESSADAS)
+    with trava(store):
+        os.makedirs(saida, exist_ok=True)
+        caminhos = []
+        for entrada in sorted(os.scandir(pasta), key=lambda e: e.name) if os.path.isdir(pasta) else []:
+            if not entrada.name.endswith(".parquet"):
+                continue
+            st = entrada.stat()
+            bruto = f"{st.st_mtime_ns}|{st.st_size}|{VERSAO_CACHE}|{VERSAO_LIMPEZA}"
+            nome = f"{entrada.name[:-len('.parquet')]}-{hashlib.sha1(bruto.encode('utf-8')).hexdigest()[:16]}.parquet"
+            destino = os.path.join(saida, nome)
+            if not (os.path.exists(destino) and os.path.exists(_momentos_de(destino))):
+                with etapa(f"processar {entrada.name}", "carga"):
+                    _processar(entrada.path, destino)
+            caminhos.append(destino)
+
+        # Versões antigas e partições apagadas
+        atuais = {os.path.basename(c) for c in caminhos} | {os.path.basename(_momentos_de(c)) for c in caminhos}
+        for nome in os.listdir(saida):
+            if nome not in atuais:
+                try:
+                    os.remove(os.path.join(saida, nome))
+                except OSError:
+                    pass
+    return caminhos
+
+
+def ensaios_store(diretorio: str):
+    # (amostras limpas no esquema compacto, relatório do esquema, relatório
+    # da limpeza) da pasta, juntando as partições processadas
+    caminhos = particoes_processadas(diretorio)
+    if not caminhos:
+        return pd.DataFrame(), {"coagidos": {}, "float64_mantidas": []}, pd.DataFrame(columns=["id"] + COLUNAS_LIMPEZA)
+
+    partes, coagidos, limpeza = [], {}, []
+    for caminho in caminhos:
+        tabela = pq.read_table(caminho)
+        partes.append(tabela.to_pandas())
+        relatorio = json.loads(tabela.schema.metadata[b"relatorio_esquema"])
+        for col, n in relatorio["coagidos"].items():
+            coagidos[col] = coagidos.get(col, 0) + n
+        limpeza.extend(json.loads(tabela.schema.metadata[b"relatorio_limpeza"]))
+
+    # Tipos divergentes entre partições (float32 x float64, categorias
+    # diferentes) se resolvem reaplicando o esquema na junção: os valores já
+    # são numéricos, então nada é coagido de novo
+    df, relatorio = aplicar_esquema(pd.concat(partes, ignore_index=True))
+    relatorio["coagidos"] = coagidos
+    chaves = [c for c in ("rocha", "id") if c in df.columns]
+    df = df.sort_values(chaves, kind="stable").reset_index(drop=True)
+    limpeza = pd.DataFrame(limpeza)
+    limpeza = limpeza.sort_values(chaves, kind="stable").reset_index(drop=True)
+    return df, relatorio, limpeza
+
+
+def momentos_store(diretorio: str, df: pd.DataFrame) -> pd.DataFrame:
+    # Momentos por ensaio juntando os das partições; ficam só as colunas
+    # presentes em df (tabela de ensaios_store) e as chaves com os tipos dela
+    partes = [pd.read_parquet(_momentos_de(c)) for c in particoes_processadas(diretorio)]
+    presentes = [c for c in COLUNAS_ENSAIO if c in df.columns]
+    mom = pd.concat(partes, ignore_index=True)
+    manter = [
+        nome for nome in mom.columns
+        if nome in ("rocha", "id") or all(c in presentes for c in nome.split("|")[0].split("*"))
+    ]
+    mom = mom[manter]
+    for col in ("rocha", "id"):
+        mom[col] = mom[col].astype(df[col].dtype)
+    return mom.sort_values(["rocha", "id"], kind="stable").reset_index(drop=True)
+
+
+def resumo_store(diretorio: str) -> pd.DataFrame:
+    caminho = os.path.join(pasta_store(diretorio), RESUMO)
+    if not os.path.exists(caminho):
+        return pd.DataFrame()
+    return pd.read_parquet(caminho)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        print("uso: python ingestao.py <pasta com os arquivos de ensaio>")
+        sys.exit(1)
+    print(sincronizar(sys.argv[1]))
@@ -0,0 +1,212 @@
+import os
+import uuid
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from openpyxl import load_workbook
+
+
+# -----------------------------
+# Leitura em lotes (memória limitada) de xlsx / csv / parquet
+# -----------------------------
+# O xlsx é lido com openpyxl em modo read_only (linha a linha, sem manter as
+# células na memória) e o csv com read_csv(chunksize=...). Cada lote vira uma
+# tabela Arrow tipada; as colunas obrigatórias são checadas já no cabeçalho e
+# os filtros (ex.: rocha/id) são aplicados durante a leitura, antes de juntar
+# as linhas do lote.
+
+TAMANHO_LOTE = 50_000
+
+# Colunas exigidas pelos apps (teste7: pico por ID; teste8: curvas)
+COLUNAS_PICO = {"id", "tensao"}
+COLUNAS_CURVAS = {"id", "rocha", "def", "tensao"}
+
+
+def caminho_tmp(destino: str) -> str:
+    # Nome temporário único: as sessões do Streamlit são threads do mesmo
+    # processo e podem gravar o mesmo destino ao mesmo tempo
+    return f"{destino}.{os.getpid()}.{uuid.uuid4().hex[:12]}.tmp"
+
+
+def _tipo(path: str) -> str:
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".csv":
+        return "csv"
+    if ext == ".parquet":
+        return "parquet"
+    return "xlsx"
+
+
+def colunas_arquivo(path: str) -> list:
+    tipo = _tipo(path)
+    if tipo == "csv":
+        return list(pd.read_csv(path, nrows=0).columns)
+    if tipo == "parquet":
+        return list(pq.read_schema(path).names)
+    wb = load_workbook(path, read_only=True, data_only=True)
+    try:
+        cabecalho = next(wb.active.iter_rows(max_row=1, values_only=True), ())
+    finally:
+        wb.close()
+    return [str(c) for c in cabecalho if c is not None]
+
+
+def _checar(colunas, obrigatorias, path):
+    faltando = set(obrigatorias or ()) - set(colunas)
+    if faltando:
+        raise ValueError(f"Colunas obrigatórias ausentes em {path}: {', '.join(sorted(faltando))}")
+
+
+def _array(valores: list) -> pa.Array:
+    try:
+        return pa.array(valores, from_pandas=True)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        # Coluna com tipos misturados (ex.: número e texto): vira texto
+        return pa.array([None if v is None else str(v) for v in valores], type=pa.string())
+
+
+def _filtro_linha(indices: dict, filtros: dict):
+    # Filtros {coluna: valores aceitos}; compara também pela forma em texto,
+    # já que o xlsx pode trazer 100922 onde o usuário passou "100922"
+    regras = []
+    for col, aceitos in (filtros or {}).items():
+        if not isinstance(aceitos, (list, tuple, set, frozenset)):
+            aceitos = [aceitos]
+        regras.append((indices[col], set(aceitos), {str(a) for a in aceitos}))
+    if not regras:
+        return None
+
+    def aceita(linha):
+        return all(linha[i] in v or str(linha[i]) in s for i, v, s in regras)
+
+    return aceita
+
+
+def filtrar_tabela(df: pd.DataFrame, filtros: dict) -> pd.DataFrame:
+    for col, aceitos in (filtros or {}).items():
+        if not isinstance(aceitos, (list, tuple, set, frozenset)):
+            aceitos = [aceitos]
+        aceitos = list(aceitos)
+        mask = df[col].isin(aceitos) | df[col].astype(str).isin([str(a) for a in aceitos])
+        df = df[mask]
+    return df
+
+
+def _lotes_xlsx(path, colunas, obrigatorias, filtros, tamanho):
+    wb = load_workbook(path, read_only=True, data_only=True)
+    try:
+        linhas = wb.active.iter_rows(values_only=True)
+        cabecalho = [None if c is None else str(c) for c in next(linhas, ())]
+        nomes = [c for c in cabecalho if c is not None]
+        _checar(nomes, obrigatorias, path)
+        _checar(nomes, filtros, path)
+        escolhidas = [c for c in (colunas or nomes) if c in nomes]
+        indices = {c: cabecalho.index(c) for c in nomes}
+        pos = [indices[c] for c in escolhidas]
+        aceita = _filtro_linha(indices, filtros)
+
+        buffer = []
+        for linha in linhas:
+            if linha is None or all(v is None for v in linha):
+                continue
+            if aceita is not None and not aceita(linha):
+                continue
+            buffer.append(linha)
+            if len(buffer) >= tamanho:
+                yield _tabela(buffer, escolhidas, pos)
+                buffer = []
+        if buffer:
+            yield _tabela(buffer, escolhidas, pos)
+    finally:
+        wb.close()
+
+
+def _tabela(buffer, nomes, pos) -> pa.Table:
+    colunas = {}
+    for nome, i in zip(nomes, pos):
+        colunas[nome] = _array([l[i] if i < len(l) else None for l in buffer])
+    return pa.table(colunas)
+
+
+def _lotes_csv(path, colunas, obrigatorias, filtros, tamanho):
+    nomes = colunas_arquivo(path)
+    _checar(nomes, obrigatorias, path)
+    _checar(nomes, filtros, path)
+    usar = [c for c in (colunas or nomes) if c in nomes]
+    ler = list(dict.fromkeys(usar + list(filtros or {})))
+    for bloco in pd.read_csv(path, usecols=ler, chunksize=tamanho):
+        bloco = filtrar_tabela(bloco, filtros)[usar]
+        if len(bloco):
+            yield pa.Table.from_pandas(bloco, preserve_index=False)
+
+
+def _lotes_parquet(path, colunas, obrigatorias, filtros, tamanho):
+    arquivo = pq.ParquetFile(path)
+    nomes = arquivo.schema_arrow.names
+    _checar(nomes, obrigatorias, path)
+    _checar(nomes, filtros, path)
+    usar = [c for c in (colunas or nomes) if c in nomes]
+    ler = list(dict.fromkeys(usar + list(filtros or {})))
+    for lote in arquivo.iter_batches(batch_size=tamanho, columns=ler):
+        bloco = filtrar_tabela(lote.to_pandas(), filtros)[usar]
+        if len(bloco):
+            yield pa.Table.from_pandas(bloco, preserve_index=False)
+
+
+def iter_tabelas(path, colunas=None, obrigatorias=None, filtros=None, tamanho=TAMANHO_LOTE):
+    leitor = {"xlsx": _lotes_xlsx, "csv": _lotes_csv, "parquet": _lotes_parquet}[_tipo(path)]
+    yield from leitor(path, colunas, obrigatorias, filtros, tamanho)
+
+
+def iter_lotes(path, colunas=None, obrigatorias=None, filtros=None, tamanho=TAMANHO_LOTE):
+    # Mesmo que iter_tabelas, mas cada lote é um dict {coluna: np.ndarray}
+    for tabela in iter_tabelas(path, colunas, obrigatorias, filtros, tamanho):
+        yield {nome: tabela.column(nome).to_numpy(zero_copy_only=False) for nome in tabela.column_names}
+
+
+def _juntar(tabelas: list) -> pa.Table:
+    return pa.concat_tables(tabelas, promote_options="permissive")
+
+
+def ler_tabela(path, colunas=None, obrigatorias=None, filtros=None, tamanho=TAMANHO_LOTE) -> pd.DataFrame:
+    tabelas = list(iter_tabelas(path, colunas, obrigatorias, filtros, tamanho))
+    if not tabelas:
+        return pd.DataFrame(columns=colunas or [])
+    return _juntar(tabelas).to_pandas()
+
+
+def converter_parquet(path, destino, obrigatorias=None, tamanho=TAMANHO_LOTE):
+    # Grava lote a lote. Se um lote vier com tipo incompatível com o esquema
+    # do primeiro (ex.: coluna inteira que passa a ter decimais), o arquivo é
+    # refeito uma vez juntando as partes com promoção de tipos.
+    tmp = caminho_tmp(destino)
+    partes, escritor, esquema = [], None, None
+    try:
+        for tabela in iter_tabelas(path, obrigatorias=obrigatorias, tamanho=tamanho):
+            if escritor is not None:
+                try:
+                    tabela = tabela.cast(esquema)
+                except (pa.ArrowInvalid, pa.ArrowNotImplementedError, ValueError):
+                    escritor.close()
+                    escritor = None
+            if escritor is None:
+                esquema = tabela.schema
+                partes.append(f"{tmp}.{len(partes)}")
+                escritor = pq.ParquetWriter(partes[-1], esquema)
+            escritor.write_table(tabela)
+        if escritor is not None:
+            escritor.close()
+
+        if not partes:
+            pd.DataFrame().to_parquet(tmp, index=False)
+        elif len(partes) == 1:
+            os.replace(partes[0], tmp)
+        else:
+            pq.write_table(_juntar([pq.read_table(p) for p in partes]), tmp)
+        os.replace(tmp, destino)
+    finally:
+        for p in partes + [tmp]:
+            if os.path.exists(p):
+                os.remove(p)
+    return destino
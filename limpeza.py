@@ -0,0 +1,146 @@
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from indice import limites_segmentos, primeiro_extremo
+
+
+# -----------------------------
+# Limpeza das amostras na ingestão (uma vez por versão do arquivo)
+# -----------------------------
+# Roda sobre a tabela inteira antes de gravar o cache (ver dados.py), em
+# operações vetorizadas sobre os segmentos de cada ensaio (rocha, id):
+#   1. ordena por (rocha, id, tempo)
+#   2. descarta leituras com tempo repetido no mesmo ensaio (fica a primeira)
+#   3. rejeita picos de sensor (filtro de Hampel): ponto cujo desvio da
+#      mediana móvel (JANELA_MEDIANA pontos, centrada) passa de LIMIAR_PICOS
+#      desvios robustos (MAD do resíduo do ensaio) e também de FRACAO_MINIMA
+#      da amplitude da coluna no ensaio (curvas com poucos pontos ou sem
+#      ruído têm MAD ~ 0; nas curvas esparsas cada passo já é 5-10% do UCS);
+#      vale para cada coluna de COLUNAS_PICOS. O ponto de tensão máxima (UCS)
+#      só sai se estiver acima dos dois vizinhos por mais que esse limite
+#      (leitura isolada, não o pico da curva)
+#   4. corrige o offset da deformação: a primeira leitura válida de def de
+#      cada ensaio passa a ser zero
+#
+# Nada é descartado em silêncio: o relatório traz, por ensaio, quantos pontos
+# saíram em cada etapa e o offset subtraído.
+
+# Aumente quando mudar os critérios (refaz os resumos já gravados)
+VERSAO_LIMPEZA = 1
+
+JANELA_MEDIANA = 7
+LIMIAR_PICOS = 6.0
+FRACAO_MINIMA = 0.15
+COLUNAS_PICOS = ["tensao", "def"]
+
+# Linhas por bloco na mediana móvel (matriz linhas x janela)
+TAMANHO_BLOCO = 500_000
+
+COLUNAS_LIMPEZA = ["n_original", "duplicados", "picos", "n_final", "offset_def"]
+
+
+def _numerico(df: pd.DataFrame, col: str) -> np.ndarray:
+    return pd.to_numeric(df[col], errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+
+
+def mediana_movel(x: np.ndarray, seg: np.ndarray, inicios: np.ndarray, fins: np.ndarray,
+                  janela: int = JANELA_MEDIANA) -> np.ndarray:
+    # Mediana centrada sem atravessar ensaios: perto das bordas do ensaio a
+    # janela encolhe dos dois lados (repetir o valor da borda puxa a mediana
+    # para o trecho pós-pico nas curvas com poucos pontos)
+    meia = janela // 2
+    desloc = np.arange(-meia, meia + 1)
+    saida = np.empty(len(x))
+    for a in range(0, len(x), TAMANHO_BLOCO):
+        pos = np.arange(a, min(a + TAMANHO_BLOCO, len(x)))
+        s = seg[pos]
+        raio = np.minimum(np.minimum(pos - inicios[s], fins[s] - 1 - pos), meia)
+        valores = x[np.clip(pos[:, None] + desloc, inicios[s][:, None], fins[s][:, None] - 1)]
+        valores[np.abs(desloc) > raio[:, None]] = np.nan
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning)  # janela só com NaN
+            saida[pos] = np.nanmedian(valores, axis=1)
+    return saida
+
+
+def mediana_segmentos(v: np.ndarray, seg: np.ndarray, n_seg: int) -> np.ndarray:
+    # Mediana de cada segmento (valores finitos), por uma ordenação só
+    ok = np.isfinite(v)
+    s, v = seg[ok], v[ok]
+    ordem = np.lexsort((v, s))
+    s, v = s[ordem], v[ordem]
+    n = np.bincount(s, minlength=n_seg)
+    ini = np.r_[0, np.cumsum(n)[:-1]]
+    saida = np.full(n_seg, np.nan)
+    tem = n > 0
+    lo = ini[tem] + (n[tem] - 1) // 2
+    hi = ini[tem] + n[tem] // 2
+    saida[tem] = (v[lo] + v[hi]) / 2
+    return saida
+
+
+def limpar_ensaios(df: pd.DataFrame, col_id: str = "id", col_tempo: str = "tempo"):
+    # Devolve (tabela limpa ordenada por rocha/id/tempo, relatório por ensaio)
+    if col_id not in df.columns or not len(df):
+        return df, pd.DataFrame(columns=[col_id] + COLUNAS_LIMPEZA)
+
+    chaves = [c for c in ("rocha", col_id) if c in df.columns]
+    tem_tempo = col_tempo in df.columns
+    df = df.sort_values(chaves + ([col_tempo] if tem_tempo else []), kind="stable", na_position="last")
+    df = df.reset_index(drop=True)
+    seg = df.groupby(chaves, sort=False, observed=True, dropna=False).ngroup().to_numpy()
+    inicios, _ = limites_segmentos(seg)
+    n_seg = len(inicios)
+    relatorio = df.iloc[inicios][chaves].reset_index(drop=True)
+    relatorio["n_original"] = np.bincount(seg, minlength=n_seg)
+
+    # 1) Tempo repetido no mesmo ensaio (NaN nunca é repetido)
+    manter = np.ones(len(df), dtype=bool)
+    if tem_tempo:
+        t = _numerico(df, col_tempo)
+        manter[1:] = ~((seg[1:] == seg[:-1]) & (t[1:] == t[:-1]))
+    relatorio["duplicados"] = np.bincount(seg[~manter], minlength=n_seg)
+    df, seg = df[manter].reset_index(drop=True), seg[manter]
+    inicios, fins = limites_segmentos(seg)
+
+    # 2) Picos de sensor (o ponto do UCS fica sempre)
+    picos = np.zeros(len(df), dtype=bool)
+    limite_tensao = None
+    for col in [c for c in COLUNAS_PICOS if c in df.columns]:
+        x = _numerico(df, col)
+        residuo = np.abs(x - mediana_movel(x, seg, inicios, fins))
+        escala = 1.4826 * mediana_segmentos(residuo, seg, n_seg)
+        amplitude = (np.maximum.reduceat(np.where(np.isnan(x), -np.inf, x), inicios)
+                     - np.minimum.reduceat(np.where(np.isnan(x), np.inf, x), inicios))
+        limite = np.maximum(LIMIAR_PICOS * escala, FRACAO_MINIMA * amplitude)
+        with np.errstate(invalid="ignore"):
+            picos |= residuo > limite[seg]
+        if col == "tensao":
+            limite_tensao = limite
+    if limite_tensao is not None:
+        tensao = _numerico(df, "tensao")
+        pico = primeiro_extremo(np.where(np.isnan(tensao), -np.inf, tensao), inicios)
+        antes = np.maximum(pico - 1, inicios)
+        depois = np.minimum(pico + 1, fins - 1)
+        with np.errstate(invalid="ignore"):
+            isolado = ((tensao[pico] - tensao[antes] > limite_tensao)
+                       & (tensao[pico] - tensao[depois] > limite_tensao))
+        picos[pico[~isolado]] = False
+    relatorio["picos"] = np.bincount(seg[picos], minlength=n_seg)
+    df, seg = df[~picos].reset_index(drop=True), seg[~picos]
+
+    # 3) Offset da deformação: primeira leitura válida de cada ensaio vira zero
+    offset = np.zeros(n_seg)
+    if "def" in df.columns:
+        deformacao = _numerico(df, "def")
+        validas = np.flatnonzero(np.isfinite(deformacao))
+        segs, primeira = np.unique(seg[validas], return_index=True)
+        offset[segs] = deformacao[validas[primeira]]
+        corrigida = deformacao - offset[seg]
+        tipo = df["def"].dtype
+        df["def"] = corrigida.astype(tipo) if np.issubdtype(tipo, np.floating) else corrigida
+    relatorio["offset_def"] = offset
+    relatorio["n_final"] = np.bincount(seg, minlength=n_seg)
+    return df, relatorio[chaves + COLUNAS_LIMPEZA]
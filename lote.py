@@ -0,0 +1,183 @@
+import argparse
+import json
+import os
+import re
+import shutil
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import matplotlib
+
+matplotlib.use("Agg")
+
+from dados import (  # noqa: E402
+    chave_cache,
+    indice_consolidada,
+    load_consolidada,
+    load_filtrado,
+    momentos_consolidada,
+    resumo_consolidada,
+)
+from indice import IndiceEnsaios  # noqa: E402
+from leitura import caminho_tmp  # noqa: E402
+from momentos import COLUNAS_ENSAIO, corr_blocos, describe_blocos, momentos_blocos  # noqa: E402
+from relatorio import COLUNAS, imagem_relatorio  # noqa: E402
+from resumo import COLUNAS_RESUMO, estatistica_pico, resumo_ensaios  # noqa: E402
+
+
+# -----------------------------
+# Relatórios em lote (sem Streamlit)
+# -----------------------------
+# Gera, para todos os ensaios (rocha, id), o mesmo relatório do teste2
+# (gráficos, describe e matriz de correlação) e a linha de pico do teste5,
+# distribuindo os ensaios entre processos.
+#
+# Os dados são preparados uma vez no processo principal (Arrow IPC mapeado em
+# memória, ver dados.py); cada worker abre o mesmo arquivo e compartilha as
+# páginas via page cache, sem receber cópias das amostras por pickle.
+#
+# Cada ensaio vira uma pasta própria, montada numa pasta temporária e renomeada
+# no fim: se o lote for interrompido, rodar de novo pula as pastas já completas
+# da mesma versão dos dados.
+#
+# Com --rocha / --id só os ensaios pedidos são gerados. Se o cache da versão
+# atual ainda não existe, o arquivo é lido com o filtro aplicado durante a
+# leitura (ver dados.load_filtrado) e os workers recebem só esses ensaios.
+#
+# uso: python lote.py consolidada.xlsx --saida relatorios --workers 8
+#      python lote.py consolidada.xlsx --rocha "Granito" --id 100922 --id 100923
+
+MARCADOR = "ensaio.json"
+
+# Estado de cada worker (preenchido por _iniciar)
+_indice = None
+_picos = None
+_momentos = None
+
+
+def nome_pasta(rocha, id_) -> str:
+    return re.sub(r"[^\w.-]", "_", f"{rocha}_{id_}")
+
+
+def _concluido(pasta: str, versao: str) -> bool:
+    try:
+        with open(os.path.join(pasta, MARCADOR), encoding="utf-8") as f:
+            return json.load(f).get("versao") == versao
+    except (OSError, ValueError):
+        return False
+
+
+def _usar(indice: IndiceEnsaios, momentos, resumo):
+    global _indice, _picos, _momentos
+    _indice = indice
+    # Momentos indexados por (rocha, id): cada ensaio sai com .loc
+    _momentos = momentos.set_index(["rocha", "id"], drop=False).sort_index()
+    _picos = resumo.drop(columns=COLUNAS_RESUMO).set_index(resumo["id"].astype(str))
+
+
+def _iniciar(path: str):
+    _usar(indice_consolidada(path), momentos_consolidada(path), resumo_consolidada(path))
+
+
+def _gerar(rocha, id_, saida: str, versao: str, formato: str) -> str:
+    pasta = os.path.join(saida, nome_pasta(rocha, id_))
+    df_id = _indice.ensaio(rocha, id_)
+    mom = _momentos.loc[[(rocha, id_)]]
+    correlacao = corr_blocos(mom, COLUNAS)
+
+    tmp = caminho_tmp(pasta)
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+    with open(os.path.join(tmp, f"relatorio.{formato}"), "wb") as f:
+        f.write(imagem_relatorio(df_id, formato, correlacao))
+    describe_blocos(mom, COLUNAS).to_csv(os.path.join(tmp, "describe.csv"))
+    correlacao.to_csv(os.path.join(tmp, "correlacao.csv"))
+    if str(id_) in _picos.index:
+        _picos.loc[[str(id_)]].to_csv(os.path.join(tmp, "pico.csv"), index=False)
+
+    # O marcador é o último arquivo escrito: pasta sem ele está incompleta
+    with open(os.path.join(tmp, MARCADOR), "w", encoding="utf-8") as f:
+        json.dump({"rocha": str(rocha), "id": str(id_), "versao": versao, "n_amostras": len(df_id)}, f, ensure_ascii=False)
+    shutil.rmtree(pasta, ignore_errors=True)
+    os.replace(tmp, pasta)
+    return pasta
+
+
+def _gerar_tarefa(tarefa):
+    return _gerar(*tarefa)
+
+
+def _filtrados(path: str, filtros: dict):
+    # Índice, momentos e resumo só dos ensaios pedidos
+    df = load_filtrado(path, filtros, ["rocha", "id"] + COLUNAS)
+    if not len(df):
+        raise ValueError(f"Nenhum ensaio em {path} com os filtros {filtros}")
+    indice = IndiceEnsaios(df)
+    momentos = momentos_blocos(df, [c for c in COLUNAS_ENSAIO if c in df.columns], ["rocha", "id"])
+    return indice, momentos, resumo_ensaios(df)
+
+
+def gerar_relatorios(path: str, saida: str = "relatorios", workers: int = None, formato: str = "png",
+                     refazer: bool = False, filtros: dict = None) -> dict:
+    versao = chave_cache(path)
+    if filtros:
+        indice, momentos, resumo = _filtrados(path, filtros)
+        # Os workers recebem só os ensaios filtrados (pickle pequeno)
+        inicializar = dict(initializer=_usar, initargs=(indice, momentos, resumo))
+    else:
+        # Prepara o cache compartilhado antes de abrir os workers (uma conversão só)
+        load_consolidada(path, ["rocha", "id"] + COLUNAS)
+        momentos_consolidada(path)
+        indice, resumo = indice_consolidada(path), resumo_consolidada(path)
+        inicializar = dict(initializer=_iniciar, initargs=(path,))
+    os.makedirs(saida, exist_ok=True)
+
+    # Estatística do pico dos ensaios do lote (mesmas tabelas do teste5)
+    df_pico_por_id = resumo.drop(columns=COLUNAS_RESUMO)
+    df_pico_por_id.to_excel(os.path.join(saida, "tensao_pico_por_id.xlsx"), index=False)
+    estatistica_pico(df_pico_por_id["tensao"]).to_excel(os.path.join(saida, "estatistica_tensao_pico.xlsx"), index=False)
+
+    pares = indice.pares()
+    pendentes = [
+        (rocha, id_, saida, versao, formato) for rocha, id_ in pares
+        if refazer or not _concluido(os.path.join(saida, nome_pasta(rocha, id_)), versao)
+    ]
+    print(f"{len(pares)} ensaios, {len(pares) - len(pendentes)} já prontos, {len(pendentes)} a gerar")
+
+    erros = {}
+    if pendentes:
+        with ProcessPoolExecutor(max_workers=workers, **inicializar) as pool:
+            futuros = {pool.submit(_gerar_tarefa, t): t for t in pendentes}
+            for n, futuro in enumerate(as_completed(futuros), 1):
+                rocha, id_ = futuros[futuro][:2]
+                try:
+                    futuro.result()
+                    print(f"[{n}/{len(pendentes)}] {rocha} / {id_}")
+                except Exception as e:
+                    erros[f"{rocha}/{id_}"] = str(e)
+                    print(f"[{n}/{len(pendentes)}] {rocha} / {id_}: ERRO {e}")
+
+    return {
+        "ensaios_total": len(pares),
+        "ensaios_gerados": len(pendentes) - len(erros),
+        "ensaios_pulados": len(pares) - len(pendentes),
+        "erros": erros,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Gera o relatório de todos os ensaios em paralelo.")
+    parser.add_argument("arquivo", nargs="?", default="consolidada.xlsx",
+                        help="planilha consolidada ou pasta de exportações por ensaio")
+    parser.add_argument("--saida", default="relatorios", help="pasta de saída (uma subpasta por ensaio)")
+    parser.add_argument("--workers", type=int, default=None, help="nº de processos (padrão: todos os núcleos)")
+    parser.add_argument("--formato", choices=["png", "svg", "pdf"], default="png")
+    parser.add_argument("--refazer", action="store_true", help="gera de novo mesmo os ensaios já prontos")
+    parser.add_argument("--rocha", action="append", help="só os ensaios desta rocha (pode repetir)")
+    parser.add_argument("--id", action="append", help="só os ensaios com este id (pode repetir)")
+    args = parser.parse_args()
+
+    filtros = {col: valores for col, valores in (("rocha", args.rocha), ("id", args.id)) if valores}
+    resultado = gerar_relatorios(args.arquivo, args.saida, args.workers, args.formato, args.refazer, filtros)
+    print(resultado)
+    sys.exit(1 if resultado["erros"] else 0)
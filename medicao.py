@@ -0,0 +1,283 @@
+import contextlib
+import cProfile
+import functools
+import io
+import json
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+import uuid
+
+
+# -----------------------------
+# Medição das etapas dos dashboards (carga, filtro, cálculo, render)
+# -----------------------------
+# etapa(nome, tipo) é um context manager e medido(tipo) um decorator; cada
+# etapa medida vira um registro com o tempo (perf_counter) e, conforme o modo:
+#   - "tempo":   só o tempo
+#   - "memoria": também o pico de memória alocada na etapa, acima do que já
+#                estava alocado na entrada, e o saldo no fim (tracemalloc)
+#   - "perfil":  também as funções mais caras da etapa (cProfile; só nas
+#                etapas de fora, um profiler por vez)
+#
+# Desligada por padrão: etapa() devolve um contexto nulo compartilhado, sem
+# alocar nada; o custo é uma leitura de atributo por chamada.
+# Ligar: variável DASH_MEDICAO=tempo|memoria|perfil (apps e scripts) ou o
+# controle da sidebar (controle_sidebar), que vale só para a sessão.
+#
+# Os registros ficam por thread (cada rerun do Streamlit roda numa thread) e
+# são zerados por iniciar(); painel() mostra os da execução atual. Cada etapa
+# também vai como uma linha JSON para DASH_MEDICAO_LOG (padrão medicao.jsonl).
+#
+# O tracemalloc é do processo inteiro: fica ligado enquanto houver alguma
+# etapa "memoria" aberta em qualquer sessão e o pico só é zerado quando uma
+# única thread está medindo. Com duas sessões medindo memória ao mesmo tempo,
+# o pico inclui as alocações da outra; esses registros saem marcados
+# (memoria_concorrente) e o painel avisa.
+
+MODOS = ["tempo", "memoria", "perfil"]
+ARQUIVO_LOG = os.environ.get("DASH_MEDICAO_LOG", "medicao.jsonl")
+LINHAS_PERFIL = 15
+
+_MODO_PADRAO = os.environ.get("DASH_MEDICAO", "").strip().lower() or None
+if _MODO_PADRAO in ("1", "sim", "true"):
+    _MODO_PADRAO = "tempo"
+if _MODO_PADRAO not in MODOS:
+    _MODO_PADRAO = None
+
+_NULO = contextlib.nullcontext()
+_trava_log = threading.Lock()
+
+# tracemalloc deixa toda alocação mais lenta: só fica ligado enquanto alguma
+# etapa "memoria" está aberta e só é desligado aqui se foi ligado por aqui
+_tracemalloc_nosso = False
+_trava_memoria = threading.Lock()
+# thread -> nº de etapas "memoria" abertas nela
+_medindo_memoria = {}
+
+
+def _entrar_memoria() -> bool:
+    # Registra a etapa; True se esta é a única thread medindo memória
+    global _tracemalloc_nosso
+    with _trava_memoria:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _tracemalloc_nosso = True
+        ident = threading.get_ident()
+        _medindo_memoria[ident] = _medindo_memoria.get(ident, 0) + 1
+        return len(_medindo_memoria) == 1
+
+
+def _sair_memoria() -> bool:
+    # Fecha a etapa; desliga o tracemalloc quando nenhuma thread mede mais.
+    # True se outra thread ainda estava medindo
+    global _tracemalloc_nosso
+    with _trava_memoria:
+        ident = threading.get_ident()
+        concorrente = len(_medindo_memoria) > 1
+        abertas = _medindo_memoria.pop(ident, 1) - 1
+        if abertas > 0:
+            _medindo_memoria[ident] = abertas
+        if not _medindo_memoria and _tracemalloc_nosso and tracemalloc.is_tracing():
+            tracemalloc.stop()
+            _tracemalloc_nosso = False
+        return concorrente
+
+
+class _Estado(threading.local):
+    def __init__(self):
+        self.modo = _MODO_PADRAO
+        self.app = None
+        self.execucao = None
+        self.registros = []
+        self.pilha = []
+        self.contador = 0
+
+
+_local = _Estado()
+
+
+def ligar(modo: str = "tempo"):
+    # modo None desliga (vale para a thread atual)
+    if modo is not None and modo not in MODOS:
+        raise ValueError(f"Modo de medição desconhecido: {modo} (use {', '.join(MODOS)})")
+    _local.modo = modo
+
+
+def ativo() -> bool:
+    return _local.modo is not None
+
+
+def iniciar(app: str = None, modo: str = "padrao"):
+    # Começo de uma execução (rerun): zera os registros da thread
+    if modo != "padrao":
+        ligar(modo)
+    _local.app = app
+    _local.execucao = uuid.uuid4().hex[:12]
+    _local.registros = []
+    _local.pilha = []
+    _local.contador = 0
+
+
+def registros() -> list:
+    return list(_local.registros)
+
+
+def etapa(nome: str, tipo: str = "calculo"):
+    if _local.modo is None:
+        return _NULO
+    return _Etapa(nome, tipo, _local.modo)
+
+
+def medido(tipo: str = "calculo", nome: str = None):
+    def decorar(funcao):
+        rotulo = nome or funcao.__name__
+
+        @functools.wraps(funcao)
+        def envolvida(*args, **kwargs):
+            if _local.modo is None:
+                return funcao(*args, **kwargs)
+            with _Etapa(rotulo, tipo, _local.modo):
+                return funcao(*args, **kwargs)
+        return envolvida
+    return decorar
+
+
+class _Etapa:
+    __slots__ = ("nome", "tipo", "modo", "t0", "perfil", "pico", "base", "ordem", "concorrente")
+
+    def __init__(self, nome: str, tipo: str, modo: str):
+        self.nome = nome
+        self.tipo = tipo
+        self.modo = modo
+        self.perfil = None
+        self.pico = 0
+        self.base = 0
+        self.concorrente = False
+
+    def __enter__(self):
+        pilha = _local.pilha
+        if self.modo == "memoria":
+            sozinha = _entrar_memoria()
+            # O pico acumulado até aqui pertence à etapa de fora
+            if pilha:
+                pilha[-1].pico = max(pilha[-1].pico, tracemalloc.get_traced_memory()[1])
+            if sozinha:
+                tracemalloc.reset_peak()
+            else:
+                # Zerar o pico apagaria o das etapas abertas nas outras sessões
+                self.concorrente = True
+            self.base = tracemalloc.get_traced_memory()[0]
+        elif self.modo == "perfil" and not pilha:
+            self.perfil = cProfile.Profile()
+        pilha.append(self)
+        self.ordem = _local.contador = _local.contador + 1
+        self.t0 = time.perf_counter()
+        if self.perfil is not None:
+            try:
+                self.perfil.enable()
+            except ValueError:
+                # Outro profiler ativo no processo (ex.: outra sessão em modo perfil)
+                self.perfil = None
+        return self
+
+    def __exit__(self, *exc):
+        if self.perfil is not None:
+            self.perfil.disable()
+        segundos = time.perf_counter() - self.t0
+        pilha = _local.pilha
+        pilha.pop()
+
+        registro = {
+            "app": _local.app,
+            "execucao": _local.execucao,
+            "etapa": self.nome,
+            "tipo": self.tipo,
+            "nivel": len(pilha),
+            "ordem": self.ordem,
+            "segundos": segundos,
+            "inicio": time.time() - segundos,
+        }
+        if self.modo == "memoria":
+            if tracemalloc.is_tracing():
+                atual, pico = tracemalloc.get_traced_memory()
+                self.pico = max(self.pico, pico)
+                # Acima do que já estava alocado na entrada da etapa
+                registro["memoria_pico_mb"] = max(self.pico - self.base, 0) / 2**20
+                registro["memoria_liquida_mb"] = (atual - self.base) / 2**20
+                if pilha:
+                    pilha[-1].pico = max(pilha[-1].pico, self.pico)
+            if _sair_memoria() or self.concorrente:
+                registro["memoria_concorrente"] = True
+                if pilha:
+                    pilha[-1].concorrente = True
+        if self.perfil is not None:
+            saida = io.StringIO()
+            pstats.Stats(self.perfil, stream=saida).sort_stats("cumulative").print_stats(LINHAS_PERFIL)
+            registro["perfil"] = saida.getvalue()
+
+        _local.registros.append(registro)
+        _gravar_log(registro)
+        return False
+
+
+def _gravar_log(registro: dict):
+    if not ARQUIVO_LOG:
+        return
+    linha = {k: v for k, v in registro.items() if k != "perfil"}
+    try:
+        with _trava_log, open(ARQUIVO_LOG, "a", encoding="utf-8") as f:
+            f.write(json.dumps(linha, ensure_ascii=False) + "\n")
+    except OSError:
+        pass
+
+
+# -----------------------------
+# Streamlit: controle e painel na sidebar
+# -----------------------------
+
+def controle_sidebar(app: str):
+    # Chamar no começo do script; o modo escolhido vale para a sessão
+    import streamlit as st
+
+    with st.sidebar.expander("⏱️ Medição das etapas", expanded=False):
+        opcoes = ["desligada"] + MODOS
+        padrao = opcoes.index(_MODO_PADRAO) if _MODO_PADRAO else 0
+        escolha = st.selectbox("Medição", opcoes, index=padrao, key="_medicao_modo",
+                               help="tempo: só tempos | memoria: + pico de memória (tracemalloc) | "
+                                    "perfil: + funções mais caras (cProfile)")
+    iniciar(app, None if escolha == "desligada" else escolha)
+
+
+def painel():
+    # Chamar no fim do script: tempos (e memória) das etapas desta execução
+    if _local.modo is None or not _local.registros:
+        return
+    import pandas as pd
+    import streamlit as st
+
+    regs = sorted(_local.registros, key=lambda r: r["ordem"])
+    tabela = pd.DataFrame({
+        "etapa": ["  " * r["nivel"] + r["etapa"] for r in regs],
+        "tipo": [r["tipo"] for r in regs],
+        "ms": [r["segundos"] * 1000 for r in regs],
+    })
+    concorrente = any(r.get("memoria_concorrente") for r in regs)
+    if any("memoria_pico_mb" in r for r in regs):
+        tabela["pico (MB)"] = [r.get("memoria_pico_mb") for r in regs]
+        tabela["saldo (MB)"] = [r.get("memoria_liquida_mb") for r in regs]
+
+    total = sum(r["segundos"] for r in regs if r["nivel"] == 0)
+    with st.sidebar.expander(f"⏱️ Etapas desta execução ({total * 1000:.0f} ms)", expanded=True):
+        por_tipo = tabela[[r["nivel"] == 0 for r in regs]].groupby("tipo")["ms"].sum()
+        st.caption(" | ".join(f"{tipo}: {ms:.0f} ms" for tipo, ms in por_tipo.items()))
+        if concorrente:
+            st.caption("Outra sessão media memória ao mesmo tempo: os picos incluem as alocações dela.")
+        st.dataframe(tabela.style.format({"ms": "{:.1f}", "pico (MB)": "{:.1f}", "saldo (MB)": "{:+.1f}"}, na_rep=""),
+                     hide_index=True, use_container_width=True)
+        for r in regs:
+            if "perfil" in r:
+                st.markdown(f"**{r['etapa']}**")
+                st.code(r["perfil"], language=None)
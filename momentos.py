@@ -0,0 +1,227 @@
+import numpy as np
+import pandas as pd
+
+from indice import limites_segmentos
+
+
+# -----------------------------
+# Momentos por bloco (ensaio, litologia, ...) e junção de blocos
+# -----------------------------
+# Para cada bloco e coluna guardamos n, média, M2 (soma dos quadrados dos
+# desvios), mínimo, máximo, quartis exatos e um esboço de quantis; para cada
+# par de colunas, os mesmos momentos sobre as linhas completas do par e o
+# co-momento (soma dos produtos cruzados dos desvios). Média/M2 no lugar de
+# soma/soma dos quadrados: a junção (fórmula de Chan) não perde precisão por
+# cancelamento quando a média é grande perto do desvio (ex.: tempo).
+#
+# A estatística de qualquer união de blocos (uma rocha, um grupo de cenário)
+# sai da junção das linhas dos blocos: O(nº de blocos), sem reler as amostras.
+#
+# O esboço guarda todos os valores do bloco (ordenados) até LIMITE_ESBOCO;
+# acima disso, LIMITE_ESBOCO quantis igualmente espaçados. Enquanto nenhum
+# bloco passa do limite a mediana da junção é exata.
+#
+# Também ficam guardados o menor valor positivo (limite de eixo em escala log)
+# e os percentis 1% / 99% de cada coluna, para os limites dos gráficos.
+
+# Colunas dos relatórios por ensaio (describe / correlação do teste2)
+COLUNAS_ENSAIO = ["def", "tensao", "tempo", "carga"]
+
+LIMITE_ESBOCO = 1024
+QUARTIS = (0.25, 0.5, 0.75)
+
+# Percentis guardados para limites robustos de eixo (ver faixa_coluna)
+PERCENTIS_FAIXA = (0.01, 0.99)
+
+
+def _rotulo(q: float) -> str:
+    return f"{q:.0%}"
+
+
+def _pares(colunas: list) -> list:
+    return [(a, b) for i, a in enumerate(colunas) for b in colunas[i + 1:]]
+
+
+def _reduzir(x: np.ndarray, inicios: np.ndarray, vazio: float = np.nan, ufunc=np.add) -> np.ndarray:
+    # Redução por segmento (x já com o elemento neutro nas posições inválidas)
+    if not len(x):
+        return np.full(len(inicios), vazio)
+    return ufunc.reduceat(x, inicios)
+
+
+def _momentos(validos: np.ndarray, xs: list, inicios: np.ndarray, fins: np.ndarray):
+    # n, médias e M2/co-momento de cada segmento, só sobre as linhas válidas
+    n = _reduzir(validos.astype(np.float64), inicios, 0.0)
+    seg = np.repeat(np.arange(len(inicios)), fins - inicios)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        medias = [_reduzir(np.where(validos, x, 0.0), inicios) / n for x in xs]
+    desvios = [np.where(validos, x - m[seg], 0.0) for x, m in zip(xs, medias)]
+    return n, medias, desvios
+
+
+def _quantis_ordenados(valores: np.ndarray, inicios: np.ndarray, n: np.ndarray, q) -> np.ndarray:
+    # Quantil com interpolação linear (como o pandas) de segmentos ordenados
+    pos = inicios + q * np.maximum(n - 1, 0)
+    baixo = np.floor(pos).astype(np.int64)
+    alto = np.minimum(baixo + 1, inicios + np.maximum(n - 1, 0)).astype(np.int64)
+    frac = pos - baixo
+    saida = np.full(len(n), np.nan)
+    ok = n > 0
+    saida[ok] = valores[baixo[ok]] * (1 - frac[ok]) + valores[alto[ok]] * frac[ok]
+    return saida
+
+
+def _esboco(ordenados: np.ndarray) -> np.ndarray:
+    n = len(ordenados)
+    if n <= LIMITE_ESBOCO:
+        return ordenados
+    # Quantis nos pontos médios: cada ponto representa n / LIMITE_ESBOCO valores
+    posicoes = (np.arange(LIMITE_ESBOCO) + 0.5) / LIMITE_ESBOCO * n - 0.5
+    return np.interp(posicoes, np.arange(n), ordenados)
+
+
+def momentos_blocos(df: pd.DataFrame, colunas: list, chaves: list = None) -> pd.DataFrame:
+    # Uma linha por bloco (combinação das colunas-chave); sem chaves, um bloco só
+    chaves = list(chaves or [])
+    if chaves:
+        codigos = df.groupby(chaves, sort=True, observed=True, dropna=False).ngroup().to_numpy()
+    else:
+        codigos = np.zeros(len(df), dtype=np.int64)
+    ordem = np.argsort(codigos, kind="stable")
+    if chaves:
+        inicios, fins = limites_segmentos(codigos[ordem])
+        res = df.iloc[ordem[inicios]][chaves].reset_index(drop=True)
+    else:
+        inicios, fins = np.array([0]), np.array([len(df)])
+        res = pd.DataFrame(index=range(1))
+
+    xs = {}
+    for col in colunas:
+        x = pd.to_numeric(df[col], errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)[ordem]
+        xs[col] = x
+        validos = np.isfinite(x)
+        n, (media,), (desvio,) = _momentos(validos, [x], inicios, fins)
+        res[f"{col}|n"] = n
+        res[f"{col}|media"] = media
+        res[f"{col}|m2"] = _reduzir(desvio ** 2, inicios, 0.0)
+        res[f"{col}|min"] = np.where(n > 0, _reduzir(np.where(validos, x, np.inf), inicios, ufunc=np.minimum), np.nan)
+        res[f"{col}|max"] = np.where(n > 0, _reduzir(np.where(validos, x, -np.inf), inicios, ufunc=np.maximum), np.nan)
+        min_pos = _reduzir(np.where(validos & (x > 0), x, np.inf), inicios, np.inf, ufunc=np.minimum)
+        res[f"{col}|min_pos"] = np.where(np.isfinite(min_pos), min_pos, np.nan)
+
+        # Valores válidos ordenados dentro de cada segmento
+        seg = np.repeat(np.arange(len(inicios)), fins - inicios)[validos]
+        v = x[validos]
+        ordenados = v[np.lexsort((v, seg))]
+        ini_v = np.r_[0, np.cumsum(n)[:-1]].astype(np.int64)
+        for q in QUARTIS + PERCENTIS_FAIXA:
+            res[f"{col}|{_rotulo(q)}"] = _quantis_ordenados(ordenados, ini_v, n, q)
+        res[f"{col}|esboco"] = [_esboco(ordenados[a:a + int(k)]) for a, k in zip(ini_v, n)]
+
+    for a, b in _pares(colunas):
+        validos = np.isfinite(xs[a]) & np.isfinite(xs[b])
+        n, (ma, mb), (da, db) = _momentos(validos, [xs[a], xs[b]], inicios, fins)
+        par = f"{a}*{b}"
+        res[f"{par}|n"] = n
+        res[f"{par}|media_a"] = ma
+        res[f"{par}|media_b"] = mb
+        res[f"{par}|m2_a"] = _reduzir(da ** 2, inicios, 0.0)
+        res[f"{par}|m2_b"] = _reduzir(db ** 2, inicios, 0.0)
+        res[f"{par}|c"] = _reduzir(da * db, inicios, 0.0)
+    return res
+
+
+def _chan(n: np.ndarray, medias: list, m2s: list, co: np.ndarray = None):
+    # Junta os momentos de vários blocos (fórmula de Chan et al. para k blocos)
+    total = n.sum()
+    if total == 0:
+        return 0.0, [np.nan] * len(medias), [np.nan] * len(m2s), np.nan
+    ok = n > 0
+    medias_t = [np.sum(n[ok] * m[ok]) / total for m in medias]
+    m2_t = [np.sum(m2[ok]) + np.sum(n[ok] * (m[ok] - mt) ** 2) for m2, m, mt in zip(m2s, medias, medias_t)]
+    co_t = None
+    if co is not None:
+        co_t = np.sum(co[ok]) + np.sum(n[ok] * (medias[0][ok] - medias_t[0]) * (medias[1][ok] - medias_t[1]))
+    return total, medias_t, m2_t, co_t
+
+
+def _quantil_esbocos(m: pd.DataFrame, col: str, q: float) -> float:
+    # Quantil da união pelos esboços: cada ponto pesa n_bloco / tamanho_esboço;
+    # com os valores completos (peso 1) é o mesmo quantil linear do pandas
+    n = m[f"{col}|n"].to_numpy()
+    if len(m) == 1 and q in QUARTIS + PERCENTIS_FAIXA:
+        # Um bloco só: quantil exato guardado
+        return float(m[f"{col}|{_rotulo(q)}"].iloc[0])
+    esbocos = [np.asarray(e, dtype=np.float64) for e in m[f"{col}|esboco"]]
+    pesos = [np.full(len(e), k / len(e)) for e, k in zip(esbocos, n) if len(e)]
+    esbocos = [e for e in esbocos if len(e)]
+    if not esbocos:
+        return np.nan
+    v = np.concatenate(esbocos)
+    w = np.concatenate(pesos)
+    ordem = np.argsort(v, kind="stable")
+    v, w = v[ordem], w[ordem]
+    centros = np.cumsum(w) - (w + 1) / 2
+    return float(np.interp(q * (w.sum() - 1), centros, v))
+
+
+def _desvpad(n: float, m2: float) -> float:
+    return float(np.sqrt(m2 / (n - 1))) if n > 1 else np.nan
+
+
+def estatistica_blocos(m: pd.DataFrame, col: str) -> pd.Series:
+    # Mesma tabela do stats_series (teste6/7), a partir dos momentos
+    n, (media,), (m2,), _ = _chan(m[f"{col}|n"].to_numpy(), [m[f"{col}|media"].to_numpy()], [m[f"{col}|m2"].to_numpy()])
+    return pd.Series({
+        "SOMA": int(n),
+        "MÉDIA": media,
+        "MEDIANA": _quantil_esbocos(m, col, 0.5),
+        "DESVPAD": _desvpad(n, m2),
+        "MÍNIMO": m[f"{col}|min"].min(),
+        "MÁXIMO": m[f"{col}|max"].max(),
+    })
+
+
+def describe_blocos(m: pd.DataFrame, colunas: list) -> pd.DataFrame:
+    # Equivalente ao df[colunas].describe() da união dos blocos
+    saida = {}
+    for col in colunas:
+        n, (media,), (m2,), _ = _chan(m[f"{col}|n"].to_numpy(), [m[f"{col}|media"].to_numpy()], [m[f"{col}|m2"].to_numpy()])
+        linha = {"count": n, "mean": media, "std": _desvpad(n, m2), "min": m[f"{col}|min"].min()}
+        for q in QUARTIS:
+            linha[_rotulo(q)] = _quantil_esbocos(m, col, q)
+        linha["max"] = m[f"{col}|max"].max()
+        saida[col] = linha
+    return pd.DataFrame(saida)
+
+
+def faixa_coluna(m: pd.DataFrame, col: str) -> dict:
+    # Limites de uma coluna na união dos blocos: mínimo, máximo, menor valor
+    # positivo (eixo log) e percentis 1% / 99% (limites robustos)
+    faixa = {
+        "min": m[f"{col}|min"].min(),
+        "max": m[f"{col}|max"].max(),
+        "min_pos": m[f"{col}|min_pos"].min(),
+    }
+    for q in PERCENTIS_FAIXA:
+        faixa[_rotulo(q)] = _quantil_esbocos(m, col, q)
+    return {k: float(v) for k, v in faixa.items()}
+
+
+def corr_blocos(m: pd.DataFrame, colunas: list) -> pd.DataFrame:
+    # Equivalente ao df[colunas].corr() (Pearson, linhas completas de cada par)
+    r = pd.DataFrame(np.eye(len(colunas)), index=colunas, columns=colunas)
+    for col in colunas:
+        if m[f"{col}|n"].sum() < 2 or not (m[f"{col}|max"].max() > m[f"{col}|min"].min()):
+            r.loc[col, col] = np.nan
+    for a, b in _pares(colunas):
+        par = f"{a}*{b}"
+        n, _, (m2a, m2b), c = _chan(
+            m[f"{par}|n"].to_numpy(),
+            [m[f"{par}|media_a"].to_numpy(), m[f"{par}|media_b"].to_numpy()],
+            [m[f"{par}|m2_a"].to_numpy(), m[f"{par}|m2_b"].to_numpy()],
+            m[f"{par}|c"].to_numpy(),
+        )
+        valor = c / np.sqrt(m2a * m2b) if n > 1 and m2a > 0 and m2b > 0 else np.nan
+        r.loc[a, b] = r.loc[b, a] = np.clip(valor, -1, 1)
+    return r
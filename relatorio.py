@@ -0,0 +1,125 @@
+import io
+
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+import seaborn as sns
+from scipy import stats
+
+from momentos import COLUNAS_ENSAIO
+
+
+# -----------------------------
+# Relatório estático por ensaio (teste2)
+# -----------------------------
+# Os sete gráficos do teste2 numa única figura (grade 4 x 2), renderizada
+# para PNG/SVG e fechada logo em seguida (plt.close), para não acumular
+# figuras abertas a cada rerun.
+
+COLUNAS = COLUNAS_ENSAIO
+
+# Acima disso o KDE dos histogramas usa a estimativa por bins + FFT
+LIMITE_KDE_EXATO = 5_000
+
+
+def kde_binned(x: np.ndarray, n_grade: int = 512):
+    # KDE gaussiana (largura de banda de Scott, como o seaborn) calculada por
+    # binning linear numa grade regular e convolução via FFT: O(n + g log g)
+    x = np.asarray(x, dtype=np.float64)
+    x = x[np.isfinite(x)]
+    n = len(x)
+    if n < 2:
+        return None
+    h = x.std(ddof=1) * n ** (-1 / 5)
+    if not h > 0:
+        return None
+
+    lo, hi = x.min() - 3 * h, x.max() + 3 * h
+    grade = np.linspace(lo, hi, n_grade)
+    delta = grade[1] - grade[0]
+
+    pos = (x - lo) / delta
+    i = np.clip(np.floor(pos).astype(np.int64), 0, n_grade - 2)
+    w = pos - i
+    contagem = np.bincount(i, 1 - w, minlength=n_grade) + np.bincount(i + 1, w, minlength=n_grade)
+
+    meia = int(min(n_grade - 1, np.ceil(4 * h / delta)))
+    u = np.arange(-meia, meia + 1) * delta / h
+    nucleo = np.exp(-0.5 * u ** 2) / (h * np.sqrt(2 * np.pi))
+
+    tamanho = n_grade + len(nucleo) - 1
+    conv = np.fft.irfft(np.fft.rfft(contagem, tamanho) * np.fft.rfft(nucleo, tamanho), tamanho)
+    densidade = np.clip(conv[meia:meia + n_grade], 0, None) / n
+    return grade, densidade
+
+
+def _histograma(ax, x: pd.Series, titulo: str):
+    x = pd.Series(x).dropna()
+    if len(x) <= LIMITE_KDE_EXATO:
+        sns.histplot(x, kde=True, ax=ax)
+    else:
+        bordas = np.histogram_bin_edges(x.to_numpy(dtype=np.float64), bins="auto")
+        sns.histplot(x, bins=bordas, ax=ax)
+        kde = kde_binned(x.to_numpy())
+        if kde is not None:
+            grade, dens = kde
+            # Mesma escala do histograma (contagem por bin)
+            ax.plot(grade, dens * len(x) * (bordas[1] - bordas[0]))
+    ax.set_title(titulo)
+
+
+def _linha(ax, df: pd.DataFrame, x: str, y: str, titulo: str):
+    # Equivalente ao sns.lineplot (média de y para cada x, em ordem de x, com
+    # a faixa de 95% onde o x se repete). A faixa é o intervalo t da média,
+    # calculado direto dos grupos, no lugar do bootstrap do seaborn, que
+    # domina o tempo em séries longas
+    g = df.groupby(x, sort=True, observed=True)[y].agg(["mean", "std", "count"])
+    xs, media = g.index.to_numpy(), g["mean"].to_numpy()
+    (linha,) = ax.plot(xs, media)
+    n = g["count"].to_numpy()
+    if (n > 1).any():
+        with np.errstate(invalid="ignore"):
+            meia = stats.t.ppf(0.975, n - 1) * g["std"].to_numpy() / np.sqrt(n)
+        meia = np.where(n > 1, meia, 0.0)
+        ax.fill_between(xs, media - meia, media + meia, color=linha.get_color(), alpha=0.2, linewidth=0)
+    ax.set_xlabel(x)
+    ax.set_ylabel(y)
+    ax.set_title(titulo)
+
+
+def figura_relatorio(df_id: pd.DataFrame, correlacao: pd.DataFrame = None):
+    # correlacao: matriz já calculada (ex.: pelos momentos do ensaio)
+    fig, axes = plt.subplots(4, 2, figsize=(14, 20))
+    (ax1, ax2), (ax3, ax4), (ax5, ax6), (ax7, ax8) = axes
+
+    sns.scatterplot(data=df_id, x="def", y="tensao", ax=ax1)
+    ax1.set_title("Dispersão: Def x Tensão")
+
+    _linha(ax2, df_id, "tempo", "tensao", "Curva: Tensão x Tempo")
+    _linha(ax3, df_id, "carga", "tensao", "Curva: Tensão x Carga")
+    _linha(ax4, df_id, "tempo", "def", "Curva: Def x Tempo")
+
+    _histograma(ax5, df_id["tensao"], "Histograma de Tensão")
+    _histograma(ax6, df_id["def"], "Histograma de Deformação (Def)")
+
+    if correlacao is None:
+        correlacao = df_id[COLUNAS].corr()
+    sns.heatmap(correlacao, annot=True, cmap="viridis", ax=ax7)
+    ax7.set_title("Mapa de Correlação")
+    ax8.axis("off")
+
+    fig.tight_layout()
+    return fig
+
+
+def salvar_figura(fig, formato: str = "png") -> bytes:
+    buffer = io.BytesIO()
+    try:
+        fig.savefig(buffer, format=formato, dpi=100)
+    finally:
+        plt.close(fig)
+    return buffer.getvalue()
+
+
+def imagem_relatorio(df_id: pd.DataFrame, formato: str = "png", correlacao: pd.DataFrame = None) -> bytes:
+    return salvar_figura(figura_relatorio(df_id, correlacao), formato)
@@ -0,0 +1,102 @@
+import numpy as np
+import pandas as pd
+
+from curvas import COLUNAS_CURVA, JANELA_MODULO, caracteristicas_curvas
+from indice import limites_segmentos, primeiro_extremo
+
+
+# -----------------------------
+# Resumo por ensaio (pico de tensão / UCS)
+# -----------------------------
+# Uma linha por id: a linha original do pico de tensão (mesma linha que
+# df.loc[df.groupby("id")["tensao"].idxmax()]) mais as colunas abaixo.
+# Tudo é calculado num único passe sobre a tabela ordenada por id, incluindo
+# módulos e inclinações da curva (ver curvas.py).
+
+COLUNAS_RESUMO = [
+    "tensao_pico",
+    "def_pico",
+    "tempo_pico",
+    "n_amostras",
+    "duracao",
+    "assinatura",
+] + COLUNAS_CURVA
+
+
+def _numerico(df: pd.DataFrame, col: str) -> np.ndarray:
+    if col not in df.columns:
+        return np.full(len(df), np.nan)
+    return pd.to_numeric(df[col], errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+
+
+def assinaturas(df: pd.DataFrame, col_id: str = "id") -> pd.Series:
+    # Hash do conteúdo das linhas de cada ensaio: muda se qualquer valor mudar
+    h = pd.util.hash_pandas_object(df, index=False).to_numpy()
+    return pd.Series(h, index=df.index).groupby(df[col_id].to_numpy(), sort=True, dropna=False).sum()
+
+
+def resumo_ensaios(df: pd.DataFrame, col_id: str = "id", janela: tuple = JANELA_MODULO) -> pd.DataFrame:
+    if col_id not in df.columns or "tensao" not in df.columns:
+        raise ValueError("Arquivo da Geocontrole precisa ter colunas: 'id' e 'tensao'.")
+
+    df = df.sort_values(col_id, kind="stable")
+    inicios, fins = limites_segmentos(df[col_id].to_numpy())
+    if not len(inicios):
+        return pd.DataFrame(columns=list(df.columns) + COLUNAS_RESUMO)
+
+    tensao = _numerico(df, "tensao")
+    tempo = _numerico(df, "tempo")
+    deformacao = _numerico(df, "def")
+
+    # Pico = primeira ocorrência da tensão máxima (NaN nunca é pico)
+    pos_pico = primeiro_extremo(np.where(np.isnan(tensao), -np.inf, tensao), inicios)
+
+    t_max = np.maximum.reduceat(np.where(np.isnan(tempo), -np.inf, tempo), inicios)
+    t_min = np.minimum.reduceat(np.where(np.isnan(tempo), np.inf, tempo), inicios)
+    duracao = np.where(np.isfinite(t_max) & np.isfinite(t_min), t_max - t_min, np.nan)
+
+    res = df.iloc[pos_pico].reset_index(drop=True)
+    res["tensao"] = tensao[pos_pico]
+    res["tensao_pico"] = tensao[pos_pico]
+    res["def_pico"] = deformacao[pos_pico]
+    res["tempo_pico"] = tempo[pos_pico]
+    res["n_amostras"] = (fins - inicios).astype(np.int64)
+    res["duracao"] = duracao
+    res["assinatura"] = assinaturas(df, col_id).to_numpy()
+    for col, valores in caracteristicas_curvas(deformacao, tensao, inicios, fins, pos_pico, janela).items():
+        res[col] = valores
+    return res
+
+
+def estatistica_pico(tensao: pd.Series) -> pd.DataFrame:
+    # Estatística da tensão de pico por ID (tabela do teste5)
+    return pd.DataFrame({
+        "SOMA": [tensao.count()],   # nº de IDs
+        "MÉDIA": [tensao.mean()],
+        "MEDIANA": [tensao.median()],
+        "DESVPAD": [tensao.std(ddof=1)],  # amostral
+        "MÍNIMO": [tensao.min()],
+        "MÁXIMO": [tensao.max()]
+    })
+
+
+def atualizar_resumo(df: pd.DataFrame, anterior: pd.DataFrame = None, col_id: str = "id",
+                     janela: tuple = JANELA_MODULO) -> pd.DataFrame:
+    # Recalcula só os ensaios cujas linhas mudaram (assinatura diferente),
+    # reaproveitando as linhas do resumo anterior para os demais. Resumo de
+    # uma versão sem todas as colunas atuais é refeito inteiro.
+    if anterior is None or not len(anterior) or not set(COLUNAS_RESUMO) <= set(anterior.columns):
+        return resumo_ensaios(df, col_id, janela)
+
+    atual = assinaturas(df, col_id)
+    antes = anterior.set_index(col_id)["assinatura"]
+    comum = atual.index.intersection(antes.index)
+    iguais = comum[(atual[comum] == antes[comum]).to_numpy()]
+
+    novos = resumo_ensaios(df[~df[col_id].isin(iguais)], col_id, janela)
+    mantidos = anterior[anterior[col_id].isin(iguais)]
+    # Parte vazia fica de fora: o resumo vazio não tem tipos e o concat
+    # deixaria todas as colunas como object
+    partes = [p for p in (mantidos, novos) if len(p)] or [novos]
+    res = pd.concat(partes, ignore_index=True)
+    return res.sort_values(col_id, kind="stable").reset_index(drop=True)
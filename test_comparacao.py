@@ -0,0 +1,27 @@
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+from comparacao import _dif_medias, comparar_grupos, permutacao_medias
+
+
+def _amostras():
+    rng = np.random.default_rng(7)
+    return rng.normal(100.0, 20.0, 40), rng.normal(110.0, 25.0, 35)
+
+
+def test_permutacao_igual_ao_scipy_com_a_mesma_semente():
+    x, y = _amostras()
+    dif, p = permutacao_medias(x, y, 5000, np.random.default_rng(0))
+    ref = stats.permutation_test((x, y), _dif_medias, vectorized=True, n_resamples=5000,
+                                 rng=np.random.default_rng(0))
+    assert dif == ref.statistic
+    assert p == ref.pvalue
+
+
+def test_comparar_grupos_um_par_por_combinacao():
+    x, y = _amostras()
+    res = comparar_grupos({"A": x, "B": y, "C": pd.Series([], dtype=float)}, permutacoes=200)
+    assert list(zip(res["grupo A"], res["grupo B"])) == [("A", "B"), ("A", "C"), ("B", "C")]
+    assert 0 < res.loc[0, "p permutação"] <= 1
+    assert res.loc[1:, "p permutação"].isna().all()
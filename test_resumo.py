@@ -0,0 +1,31 @@
+import numpy as np
+import pandas as pd
+
+from resumo import atualizar_resumo, resumo_ensaios
+
+
+def _ensaios():
+    return pd.DataFrame({
+        "id": np.repeat([100, 101, 102], 4),
+        "tempo": np.tile(np.arange(4.0), 3),
+        "def": np.linspace(0.0, 1.0, 12),
+        "tensao": [1.0, 3.0, 2.0, 0.5, 4.0, 6.0, 6.0, 1.0, 2.0, 2.5, 9.0, 3.0],
+    })
+
+
+def test_atualizar_resumo_sem_alteracao_mantem_tipos():
+    df = _ensaios()
+    anterior = resumo_ensaios(df)
+    res = atualizar_resumo(df, anterior)
+    pd.testing.assert_series_equal(res.dtypes, anterior.dtypes)
+    pd.testing.assert_frame_equal(res, anterior)
+
+
+def test_atualizar_resumo_recalcula_so_o_ensaio_alterado():
+    df = _ensaios()
+    anterior = resumo_ensaios(df)
+    df.loc[df["id"] == 101, "tensao"] += 1.0
+    res = atualizar_resumo(df, anterior)
+    pd.testing.assert_series_equal(res.dtypes, anterior.dtypes)
+    assert res.loc[res["id"] == 101, "tensao_pico"].item() == 7.0
+    assert res.loc[res["id"] == 102, "tensao_pico"].item() == 9.0
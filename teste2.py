@@ -1,58 +1,54 @@
 import streamlit as st
-import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
+
+from dados import chave_cache, indice_consolidada, momentos_ensaio
+from medicao import controle_sidebar, etapa, painel
+from momentos import corr_blocos, describe_blocos
+from relatorio import COLUNAS, imagem_relatorio
 
 st.set_page_config(layout='wide')
+controle_sidebar('teste2')
 
-df = pd.read_excel('consolidada.xlsx')
 
-st.title('Análise de Ensaios de Rochas')
+@st.cache_data(max_entries=64, show_spinner=False)
+def imagem(path, versao, rocha, id_, formato):
+    # Uma imagem por (arquivo/versão, rocha, id, formato): voltar a um ensaio
+    # já visto não roda o seaborn de novo
+    return imagem_relatorio(
+        indice_consolidada(path).ensaio(rocha, id_), formato, corr_blocos(momentos_ensaio(path, rocha, id_), COLUNAS)
+    )
 
-rochas = df['rocha'].unique()
-rocha_sel = st.selectbox('Selecione a rocha:', rochas)
 
-df_r = df[df['rocha'] == rocha_sel]
-
-ids = df_r['id'].unique()
-id_sel = st.selectbox('Selecione o ID:', ids)
+with etapa('indice_consolidada', 'carga'):
+    indice = indice_consolidada('consolidada.xlsx')
 
-df_id = df_r[df_r['id'] == id_sel]
+st.title('Análise de Ensaios de Rochas')
 
-st.subheader('Dispersão: Def x Tensão')
-fig, ax = plt.subplots()
-sns.scatterplot(data=df_id, x='def', y='tensao', ax=ax)
-st.pyplot(fig)
+rochas = indice.rochas()
+rocha_sel = st.selectbox('Selecione a rocha:', rochas)
 
-st.subheader('Curva: Tensão x Tempo')
-fig2, ax2 = plt.subplots()
-sns.lineplot(data=df_id, x='tempo', y='tensao', ax=ax2)
-st.pyplot(fig2)
+ids = indice.ids(rocha_sel)
+id_sel = st.selectbox('Selecione o ID:', ids)
 
-st.subheader('Curva: Tensão x Carga')
-fig3, ax3 = plt.subplots()
-sns.lineplot(data=df_id, x='carga', y='tensao', ax=ax3)
-st.pyplot(fig3)
+versao = chave_cache('consolidada.xlsx')
 
-st.subheader('Curva: Def x Tempo')
-fig4, ax4 = plt.subplots()
-sns.lineplot(data=df_id, x='tempo', y='def', ax=ax4)
-st.pyplot(fig4)
+st.subheader('Gráficos do ensaio')
+with etapa('imagem do relatório', 'render'):
+    st.image(imagem('consolidada.xlsx', versao, rocha_sel, id_sel, 'png'))
 
-st.subheader('Histograma de Tensão')
-fig5, ax5 = plt.subplots()
-sns.histplot(df_id['tensao'], kde=True, ax=ax5)
-st.pyplot(fig5)
+formato = st.radio('Formato para download:', ['png', 'svg'], horizontal=True)
+with etapa('imagem para download', 'render'):
+    st.download_button(
+        'Baixar relatório',
+        imagem('consolidada.xlsx', versao, rocha_sel, id_sel, formato),
+        file_name=f'ensaio_{rocha_sel}_{id_sel}.{formato}',
+        mime='image/svg+xml' if formato == 'svg' else 'image/png'
+    )
 
-st.subheader('Histograma de Deformação (Def)')
-fig6, ax6 = plt.subplots()
-sns.histplot(df_id['def'], kde=True, ax=ax6)
-st.pyplot(fig6)
+st.subheader('Resumo Estatístico')
+with etapa('describe', 'calculo'):
+    st.write(describe_blocos(momentos_ensaio('consolidada.xlsx', rocha_sel, id_sel), COLUNAS))
 
-st.subheader('Mapa de Correlação')
-fig7, ax7 = plt.subplots(figsize=(8,5))
-sns.heatmap(df_id[['def','tensao','tempo','carga']].corr(), annot=True, cmap='viridis', ax=ax7)
-st.pyplot(fig7)
+with st.expander(f'Resumo Estatístico da rocha {rocha_sel} (todos os ensaios)'):
+    st.write(describe_blocos(momentos_ensaio('consolidada.xlsx', rocha_sel), COLUNAS))
 
-st.subheader('Resumo Estatístico')
-st.write(df_id[['def','tensao','tempo','carga']].describe())
\ No newline at end of file
+painel()
\ No newline at end of file
@@ -1,6 +1,10 @@
 import streamlit as st
-import pandas as pd
-import plotly.express as px
+
+from amostragem import METODOS
+from dados import chave_cache, indice_consolidada, momentos_ensaio
+from figuras import FRACAO_REFINAR, com_estilo, figura_base, fracao_visivel, limites, range_plotly
+from medicao import controle_sidebar, etapa, painel
+from uploads import entrada_arquivo
 
 # =========================
 # 🔐 CONFIG DE ACESSO
@@ -11,6 +15,7 @@ ALLOWED_EMAILS = {
 }
 
 st.set_page_config(layout="wide")
+controle_sidebar("teste4")
 
 st.title("Gráficos Interativos – Ensaios de Rochas")
 
@@ -41,24 +46,32 @@ with st.sidebar:
 # =========================
 # 📄 DADOS
 # =========================
-# ⚠️ No Streamlit Cloud, seu arquivo consolidada.xlsx precisa estar no repositório.
-# Alternativa melhor: permitir upload do Excel.
-# Se você preferir upload, me diga que eu adapto.
+# consolidada.xlsx do repositório ou a planilha enviada pelo navegador (no
+# Streamlit Cloud não é preciso versionar o arquivo); o envio é guardado pelo
+# hash do conteúdo e só é convertido uma vez (ver uploads.py)
+geo_path = entrada_arquivo("Arquivo Geocontrole", "consolidada.xlsx", "geo")
+
+try:
+    with etapa("indice_consolidada", "carga"):
+        indice = indice_consolidada(geo_path)
+except Exception as e:
+    st.error(f"Erro ao ler {geo_path}: {e}")
+    st.stop()
 
-df = pd.read_excel("consolidada.xlsx")
 
 # =========================
 # 🎛️ FILTROS
 # =========================
-rochas = df["rocha"].unique()
+rochas = indice.rochas()
 rocha_sel = st.selectbox("Selecione a rocha:", rochas)
 
-df_r = df[df["rocha"] == rocha_sel]
-
-ids = df_r["id"].unique()
+ids = indice.ids(rocha_sel)
 id_sel = st.selectbox("Selecione o ID:", ids)
 
-df_id = df_r[df_r["id"] == id_sel]
+# Limites de cada coluna do ensaio (mín., máx., menor positivo, percentis),
+# calculados uma vez junto com os momentos por ensaio
+with etapa("momentos do ensaio", "filtro"):
+    momentos_id = momentos_ensaio(geo_path, rocha_sel, id_sel)
 
 st.subheader("Configurações do gráfico interativo")
 
@@ -71,32 +84,37 @@ with col2:
 escala_x = st.radio("Escala do eixo X:", ["linear", "log"], horizontal=True)
 escala_y = st.radio("Escala do eixo Y:", ["linear", "log"], horizontal=True)
 
-min_x, max_x = st.slider(
-    "Limite do eixo X:",
-    float(df_id[eixo_x].min()),
-    float(df_id[eixo_x].max()),
-    (float(df_id[eixo_x].min()), float(df_id[eixo_x].max()))
-)
-
-min_y, max_y = st.slider(
-    "Limite do eixo Y:",
-    float(df_id[eixo_y].min()),
-    float(df_id[eixo_y].max()),
-    (float(df_id[eixo_y].min()), float(df_id[eixo_y].max()))
-)
-
-fig = px.scatter(
-    df_id,
-    x=eixo_x,
-    y=eixo_y,
-    title=f"Gráfico Interativo: {eixo_x} x {eixo_y}",
-)
-
-# Nota: Em Plotly, range em eixo log é em log10; para simplificar, mantive como está.
-# Se você usar log e quiser "range" correto, eu ajusto (é simples).
-fig.update_layout(
-    xaxis=dict(type=escala_x, range=[min_x, max_x]),
-    yaxis=dict(type=escala_y, range=[min_y, max_y])
-)
-
-st.plotly_chart(fig, use_container_width=True)
\ No newline at end of file
+col3, col4 = st.columns(2)
+with col3:
+    n_pontos = st.slider("Pontos no gráfico (máx.):", 200, 20000, 2000, 100)
+with col4:
+    metodo = st.radio("Redução de pontos:", METODOS, horizontal=True)
+
+robusto = st.checkbox("Limites iniciais sem os extremos (percentis 1% a 99%)", value=False)
+
+escala_x, (lo_x, hi_x, ini_x) = limites(momentos_id, eixo_x, escala_x, robusto)
+escala_y, (lo_y, hi_y, ini_y) = limites(momentos_id, eixo_y, escala_y, robusto)
+
+min_x, max_x = st.slider("Limite do eixo X:", lo_x, hi_x, ini_x)
+
+min_y, max_y = st.slider("Limite do eixo Y:", lo_y, hi_y, ini_y)
+
+versao = chave_cache(geo_path)
+args = (geo_path, versao, rocha_sel, id_sel, eixo_x, eixo_y, n_pontos, metodo)
+with etapa("figura", "render"):
+    base = figura_base(*args)
+
+    # Zoom forte: refaz a redução só dentro dos limites escolhidos, aumentando a
+    # resolução da curva na faixa visível
+    if fracao_visivel(base, (min_x, max_x), (min_y, max_y)) < FRACAO_REFINAR:
+        base = figura_base(*args, (min_x, max_x), (min_y, max_y))
+
+    fig = com_estilo(base, layout=dict(
+        xaxis=dict(type=escala_x, range=range_plotly(min_x, max_x, escala_x)),
+        yaxis=dict(type=escala_y, range=range_plotly(min_y, max_y, escala_y))
+    ))
+
+with etapa("plotly_chart", "render"):
+    st.plotly_chart(fig, use_container_width=True)
+
+painel()
\ No newline at end of file
@@ -1,31 +1,28 @@
-import pandas as pd
+from dados import resumo_consolidada
+from medicao import etapa, iniciar
+from resumo import COLUNAS_RESUMO, estatistica_pico
 
-# 1) Ler o arquivo Excel
+# Medição das etapas (DASH_MEDICAO=tempo|memoria|perfil; ver medicao.py)
+iniciar("teste5")
+
+# 1) Ler o resumo por ensaio (calculado uma vez e guardado junto ao cache)
 arquivo = "consolidada.xlsx"
-df = pd.read_excel(arquivo, engine="openpyxl")
+with etapa("resumo_consolidada", "carga"):
+    resumo = resumo_consolidada(arquivo)
 
-# 2) Garantir que a coluna de tensão é numérica
-df["tensao"] = pd.to_numeric(df["tensao"], errors="coerce")
+# 2) Tensão já numérica no resumo (coerção feita no cálculo do pico)
 
-# 3) Para cada ID, pegar a linha onde a tensão é MÁXIMA
-df_pico_por_id = (
-    df.loc[df.groupby("id")["tensao"].idxmax()]
-    .reset_index(drop=True)
-)
+# 3) Para cada ID, a linha onde a tensão é MÁXIMA (colunas originais)
+df_pico_por_id = resumo.drop(columns=COLUNAS_RESUMO)
 
 # 4) Estatística sobre a tensão de pico por ID
-estatistica = pd.DataFrame({
-    "SOMA": [df_pico_por_id["tensao"].count()],   # nº de IDs (≈ 30)
-    "MÉDIA": [df_pico_por_id["tensao"].mean()],
-    "MEDIANA": [df_pico_por_id["tensao"].median()],
-    "DESVPAD": [df_pico_por_id["tensao"].std(ddof=1)],  # amostral
-    "MÍNIMO": [df_pico_por_id["tensao"].min()],
-    "MÁXIMO": [df_pico_por_id["tensao"].max()]
-})
+with etapa("estatistica_pico", "calculo"):
+    estatistica = estatistica_pico(df_pico_por_id["tensao"])   # SOMA = nº de IDs (≈ 30)
 
 # 5) (Opcional) Salvar resultados
-df_pico_por_id.to_excel("tensao_pico_por_id.xlsx", index=False)
-estatistica.to_excel("estatistica_tensao_pico.xlsx", index=False)
+with etapa("salvar xlsx", "render"):
+    df_pico_por_id.to_excel("tensao_pico_por_id.xlsx", index=False)
+    estatistica.to_excel("estatistica_tensao_pico.xlsx", index=False)
 
 # 6) Mostrar no console
 print("Tensão de pico por ID:")
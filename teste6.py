@@ -3,43 +3,25 @@ import pandas as pd
 import numpy as np
 import plotly.graph_objects as go
 
+from bootstrap import REAMOSTRAGENS, SEMENTE, colunas_ic
+from cache_cenarios import (bootstrap_cenario, comparacao_cenario, indice_litologias, load_cenarios, load_geo_peak,
+                            load_vale, momentos_vale, montar_cenario)
+from cenarios import CONFIG_PADRAO, chave_config
+from comparacao import PERMUTACOES, chave_grupos, grupos_comparacao
+from dados import chave_cache
+from figuras import MAX_PONTOS_BOX, estatistica_box
+from medicao import controle_sidebar, etapa, painel
+from uploads import entrada_arquivo
+
 # -----------------------------
 # Config Streamlit
 # -----------------------------
 st.set_page_config(page_title="Boxplot UCS - Vale x Geocontrole", layout="wide")
+controle_sidebar("teste6")
 
 st.title("📦 Boxplots UCS (Tensão de Pico) — Vale x Geocontrole")
 st.caption("Lê os arquivos da pasta, calcula pico por ID (Geocontrole) e plota boxplots interativos por cenário.")
 
-# -----------------------------
-# Leitura dos arquivos (cache)
-# -----------------------------
-@st.cache_data(show_spinner=True)
-def load_vale(path="testeinacio estatisca.xlsx"):
-    df = pd.read_excel(path, engine="openpyxl")
-    # Garantias de tipo
-    df["Tensão de Pico"] = pd.to_numeric(df["Tensão de Pico"], errors="coerce")
-    return df
-
-@st.cache_data(show_spinner=True)
-def load_geo_and_peak(path="consolidada.xlsx"):
-    df = pd.read_excel(path, engine="openpyxl")
-    df["tensao"] = pd.to_numeric(df["tensao"], errors="coerce")
-    # PICO por ID = máximo da coluna tensao
-    df_peak = df.loc[df.groupby("id")["tensao"].idxmax()].copy().reset_index(drop=True)
-    return df, df_peak
-
-def stats_series(s: pd.Series) -> pd.Series:
-    s = pd.Series(s).dropna().astype(float)
-    return pd.Series({
-        "SOMA": int(s.count()),
-        "MÉDIA": s.mean(),
-        "MEDIANA": s.median(),
-        "DESVPAD": s.std(ddof=1),   # amostral
-        "MÍNIMO": s.min(),
-        "MÁXIMO": s.max()
-    })
-
 def fmt_pt(x):
     # Formata números com vírgula e 2 casas
     if pd.isna(x):
@@ -51,144 +33,155 @@ def fmt_pt(x):
 # -----------------------------
 st.sidebar.header("⚙️ Configurações")
 
-vale_path = st.sidebar.text_input("Arquivo Vale", "testeinacio estatisca.xlsx")
-geo_path  = st.sidebar.text_input("Arquivo Geocontrole", "consolidada.xlsx")
+# Caminho local ou planilha enviada (guardada pelo hash do conteúdo, ver uploads.py)
+vale_path = entrada_arquivo("Arquivo Vale", "testeinacio estatisca.xlsx", "vale")
+geo_path  = entrada_arquivo("Arquivo Geocontrole", "consolidada.xlsx", "geo")
+cenarios_path = st.sidebar.text_input("Arquivo de cenários", CONFIG_PADRAO)
 
 show_points = st.sidebar.checkbox("Mostrar pontos (jitter) sobre o boxplot", value=True)
 jitter = st.sidebar.slider("Jitter (dispersão dos pontos)", 0.0, 0.6, 0.25, 0.05)
 point_size = st.sidebar.slider("Tamanho dos pontos", 2, 10, 5, 1)
 
+# Grupos grandes / conexão lenta: quartis, cercas, média e desvio calculados
+# aqui; o navegador recebe só os outliers (e uma amostra, com pontos)
+caixas_servidor = st.sidebar.checkbox("Calcular as caixas no servidor (envia só outliers/amostra)", value=False)
+max_pontos = MAX_PONTOS_BOX
+if caixas_servidor:
+    max_pontos = st.sidebar.slider("Máx. de pontos por caixa", 200, 20000, MAX_PONTOS_BOX, 100)
+
+# Intervalos de confiança 95% (percentil) de média, mediana e desvio por grupo
+calcular_ic = st.sidebar.checkbox("Intervalos de confiança (bootstrap)", value=False)
+if calcular_ic:
+    reamostragens = st.sidebar.select_slider("Reamostragens", [500, 1000, 2000, 5000, 10000], REAMOSTRAGENS)
+    semente = int(st.sidebar.number_input("Semente", 0, 2**31 - 1, SEMENTE, 1))
+
+# Mann–Whitney, KS e permutação entre cada par de grupos do cenário
+comparar = st.sidebar.checkbox("Comparar grupos (testes estatísticos)", value=False)
+if comparar:
+    permutacoes = st.sidebar.select_slider("Permutações", [1000, 2000, 5000, 10000, 20000], PERMUTACOES)
+
 # -----------------------------
 # Carregar dados
 # -----------------------------
 try:
-    df_vale = load_vale(vale_path)
+    with etapa("load_vale", "carga"):
+        df_vale = load_vale(vale_path, chave_cache(vale_path))
 except Exception as e:
     st.error(f"Erro ao ler {vale_path}: {e}")
     st.stop()
 
 try:
-    df_geo_raw, df_geo_peak = load_geo_and_peak(geo_path)
+    with etapa("load_geo_peak", "carga"):
+        df_geo_peak = load_geo_peak(geo_path, chave_cache(geo_path))
 except Exception as e:
     st.error(f"Erro ao ler {geo_path}: {e}")
     st.stop()
 
-st.success(f"Vale carregado: {len(df_vale)} linhas | Geocontrole carregado: {len(df_geo_raw)} linhas | Pico por ID: {len(df_geo_peak)} IDs")
-
-# -----------------------------
-# Definições de grupos (Vale)
-# -----------------------------
-GR = [
-    "Granito Isotrópico (GRA)",
-    "Granito Albítico (GRB)",
-    "Granito Albítico Pegmatítico (GRBp)",
-    "Granitoide (GRN)"
-]
-
-HD_ALL_VALE = [
-    "Anfibolito (ANF)",
-    "Biotita Xisto (HDB)",
-    "Hidrotermalito (HQM)",
-    "Hidrotermalito a Anfibólio (HDA)",
-    "Hidrotermalito a Granada (HDG)"
-]
-
-HD_SEM_HDA = [
-    "Anfibolito (ANF)",
-    "Biotita Xisto (HDB)",
-    "Hidrotermalito (HQM)",
-    "Hidrotermalito a Granada (HDG)"
-]
+try:
+    config = load_cenarios(cenarios_path, chave_cache(cenarios_path))
+except Exception as e:
+    st.error(f"Erro ao ler {cenarios_path}: {e}")
+    st.stop()
 
-HDA_VALE = ["Hidrotermalito a Anfibólio (HDA)"]
+st.success(f"Vale carregado: {len(df_vale)} linhas | Geocontrole carregado: {int(df_geo_peak['n_amostras'].sum())} linhas | Pico por ID: {len(df_geo_peak)} IDs")
 
 # -----------------------------
-# Montagem dos 3 cenários (dados brutos)
+# Cenário selecionado (montado sob demanda)
 # -----------------------------
-vale_gr = df_vale[df_vale["Litologia"].isin(GR)]["Tensão de Pico"].dropna()
-vale_hd_all = df_vale[df_vale["Litologia"].isin(HD_ALL_VALE)]["Tensão de Pico"].dropna()
-vale_hd_sem_hda = df_vale[df_vale["Litologia"].isin(HD_SEM_HDA)]["Tensão de Pico"].dropna()
-vale_hda = df_vale[df_vale["Litologia"].isin(HDA_VALE)]["Tensão de Pico"].dropna()
-
-geo_peak = df_geo_peak["tensao"].dropna()  # 30 picos (ou quantos IDs existirem)
-
-# Cenário 1: Somente Vale 1
-c1 = {
-    "Rochas graníticas": vale_gr,
-    "Rochas graníticas hidrotermalizadas": vale_hd_all
-}
-
-# Cenário 2: Vale x Geocontrole 2 (hidrotermalizadas = Vale(hd_all) + Geo(picos))
-c2 = {
-    "Rochas graníticas": vale_gr,
-    "Rochas graníticas hidrotermalizadas": pd.concat([vale_hd_all.reset_index(drop=True), geo_peak.reset_index(drop=True)], ignore_index=True)
-}
-
-# Cenário 3: Vale x Geocontrole 3
-# hidrotermalizadas = Vale(hd_sem_hda)
-# minério HDA = Vale(hda) + Geo(picos)
-c3 = {
-    "Rochas graníticas": vale_gr,
-    "Rochas graníticas hidrotermalizadas": vale_hd_sem_hda,
-    "Minério HDA": pd.concat([vale_hda.reset_index(drop=True), geo_peak.reset_index(drop=True)], ignore_index=True)
-}
-
-cenarios = {
-    "Somente Vale 1": c1,
-    "Vale × Geocontrole 2": c2,
-    "Vale × Geocontrole 3": c3
-}
-
-scenario = st.selectbox("Selecione o cenário:", list(cenarios.keys()), index=0)
-data_groups = cenarios[scenario]
+ids_cenarios = {c["nome"]: c["id"] for c in config["cenarios"]}
+scenario = st.selectbox("Selecione o cenário:", list(ids_cenarios), index=0)
+cenario_id = ids_cenarios[scenario]
+with etapa("montar_cenario", "calculo"):
+    data_groups, tab = montar_cenario(
+        config, chave_config(config), cenario_id,
+        vale_path, chave_cache(vale_path), geo_path, chave_cache(geo_path)
+    )
 
 # -----------------------------
 # Boxplot interativo (Plotly)
 # -----------------------------
-fig = go.Figure()
-
-for name, values in data_groups.items():
-    values = pd.Series(values).dropna().astype(float)
-
-    fig.add_trace(go.Box(
-        y=values,
-        name=name,
-        boxmean="sd",          # mostra média e ±1 desvio padrão
-        boxpoints="outliers" if not show_points else "all",
-        jitter=jitter if show_points else 0,
-        pointpos=0,
-        marker=dict(size=point_size),
-        hovertemplate=(
-            f"<b>{name}</b><br>"
-            "Tensão: %{y:.2f} MPa<br>"
-            "<extra></extra>"
-        )
-    ))
-
-fig.update_layout(
-    title=f"Boxplot — {scenario}",
-    yaxis_title="Tensão de Pico (MPa)",
-    xaxis_title="Grupo",
-    height=600
-)
-
-st.plotly_chart(fig, use_container_width=True)
+with etapa("figura", "render"):
+    fig = go.Figure()
+
+    for name, values in data_groups.items():
+        values = pd.Series(values).dropna().astype(float)
+        dados_box = dict(y=values)
+        if caixas_servidor:
+            dados_box = estatistica_box(values, "all" if show_points else "outliers", max_pontos) or dict(y=[])
+            dados_box["x"] = [name]
+
+        fig.add_trace(go.Box(
+            **dados_box,
+            name=name,
+            boxmean="sd",          # mostra média e ±1 desvio padrão
+            boxpoints="outliers" if not show_points else "all",
+            jitter=jitter if show_points else 0,
+            pointpos=0,
+            marker=dict(size=point_size),
+            hovertemplate=(
+                f"<b>{name}</b><br>"
+                "Tensão: %{y:.2f} MPa<br>"
+                "<extra></extra>"
+            )
+        ))
+
+    fig.update_layout(
+        title=f"Boxplot — {scenario}",
+        yaxis_title="Tensão de Pico (MPa)",
+        xaxis_title="Grupo",
+        height=600
+    )
+
+with etapa("plotly_chart", "render"):
+    st.plotly_chart(fig, use_container_width=True)
 
 # -----------------------------
 # Tabela de estatística (EXATA com dados brutos)
 # -----------------------------
 st.subheader("📊 Estatística calculada a partir dos dados brutos (exata)")
 
-tab = pd.DataFrame({k: stats_series(v) for k, v in data_groups.items()}).T
 tab_disp = tab.copy()
+colunas_num = ["MÉDIA", "MEDIANA", "DESVPAD", "MÍNIMO", "MÁXIMO"]
+if calcular_ic:
+    with etapa("bootstrap_cenario", "calculo"):
+        ic = bootstrap_cenario(
+            config, chave_config(config), cenario_id,
+            vale_path, chave_cache(vale_path), geo_path, chave_cache(geo_path), reamostragens, semente
+        )
+    tab_disp = tab_disp.join(ic)
+    colunas_num += colunas_ic()
+    st.caption(f"IC95% por bootstrap percentil ({reamostragens} reamostragens, semente {semente}).")
 
-for col in ["MÉDIA", "MEDIANA", "DESVPAD", "MÍNIMO", "MÁXIMO"]:
+for col in colunas_num:
     tab_disp[col] = tab_disp[col].apply(fmt_pt)
 
 tab_disp["SOMA"] = tab_disp["SOMA"].astype(int)
 
 st.dataframe(tab_disp, use_container_width=True)
 
+# -----------------------------
+# Comparação entre grupos (justifica juntar Vale e Geocontrole)
+# -----------------------------
+if comparar:
+    st.subheader("⚖️ Comparação entre grupos")
+    st.caption(
+        "Mann–Whitney e KS bilaterais; permutação da diferença de médias "
+        f"({permutacoes} permutações, semente fixa; o p é uma estimativa de Monte Carlo e varia um pouco "
+        "com o número de permutações). Nos grupos com Geocontrole, Vale e Geocontrole entram separados."
+    )
+    with etapa("comparacao_cenario", "calculo"):
+        grupos_teste = grupos_comparacao(
+            config, cenario_id, indice_litologias(config, chave_config(config), vale_path, chave_cache(vale_path)),
+            df_geo_peak["tensao"].dropna(),
+        )
+        comp = comparacao_cenario(grupos_teste, chave_grupos(grupos_teste, permutacoes), permutacoes)
+    st.dataframe(
+        comp.style.format({c: "{:.4f}" for c in comp.columns if c.startswith("p ")} | {
+            c: fmt_pt for c in ["Mann–Whitney U", "KS D", "dif. médias", "delta de Cliff", "g de Hedges"]
+        }),
+        use_container_width=True, hide_index=True,
+    )
+
 # -----------------------------
 # Extras: mostrar pico por ID e validações
 # -----------------------------
@@ -197,4 +190,11 @@ with st.expander("🔎 Ver Tensão de Pico por ID (Geocontrole)"):
 
 with st.expander("🧪 Checagens rápidas"):
     st.write(f"IDs Geocontrole (picos): {len(df_geo_peak)}")
-    st.write(f"Vale - GR: {len(vale_gr)} | HD (com HDA): {len(vale_hd_all)} | HD (sem HDA): {len(vale_hd_sem_hda)} | HDA Vale: {len(vale_hda)}")
+    mom_vale = momentos_vale(vale_path, chave_cache(vale_path))
+    contagens = {
+        nome: int(mom_vale[mom_vale["Litologia"].isin(litologias)]["UCS|n"].sum())
+        for nome, litologias in config["litologias"].items()
+    }
+    st.write(" | ".join(f"Vale - {nome}: {n}" for nome, n in contagens.items()))
+
+painel()
@@ -2,8 +2,28 @@ import streamlit as st
 import pandas as pd
 import plotly.graph_objects as go
 
+from bootstrap import REAMOSTRAGENS, SEMENTE, colunas_ic
+from cache_cenarios import (
+    bootstrap_cenario,
+    comparacao_cenario,
+    indice_litologias,
+    load_cenarios,
+    load_geo_peak,
+    load_vale,
+    momentos_vale,
+    montar_cenario,
+)
+from cenarios import CONFIG_PADRAO, chave_config
+from comparacao import PERMUTACOES, chave_grupos, grupos_comparacao
+from dados import chave_cache
+from exportacao import FORMATOS, MIME, imagem_figura
+from figuras import MAX_PONTOS_BOX, com_estilo, figura_cenario
+from medicao import controle_sidebar, etapa, painel
+from uploads import entrada_arquivo
+
 
 st.set_page_config(page_title="Boxplot UCS - Vale x Geocontrole", layout="wide")
+controle_sidebar("teste7")
 
 st.title("📦 Boxplots UCS (Tensão de Pico) — Vale x Geocontrole")
 st.caption(
@@ -11,37 +31,17 @@ st.caption(
 )
 
 
-@st.cache_data(show_spinner=True)
-def load_vale(path: str) -> pd.DataFrame:
-    df = pd.read_excel(path, engine="openpyxl")
-    if "Litologia" not in df.columns or "Tensão de Pico" not in df.columns:
-        raise ValueError("Arquivo do Vale precisa ter colunas: 'Litologia' e 'Tensão de Pico'.")
-    df["Tensão de Pico"] = pd.to_numeric(df["Tensão de Pico"], errors="coerce")
-    return df
-
-
-@st.cache_data(show_spinner=True)
-def load_geo_and_peak(path: str):
-    df = pd.read_excel(path, engine="openpyxl")
-    if "id" not in df.columns or "tensao" not in df.columns:
-        raise ValueError("Arquivo da Geocontrole precisa ter colunas: 'id' e 'tensao'.")
-    df["tensao"] = pd.to_numeric(df["tensao"], errors="coerce")
-    df_peak = df.loc[df.groupby("id")["tensao"].idxmax()].copy().reset_index(drop=True)
-    return df, df_peak
-
-
-def stats_series(s: pd.Series) -> pd.Series:
-    s = pd.Series(s).dropna().astype(float)
-    return pd.Series(
-        {
-            "SOMA": int(s.count()),
-            "MÉDIA": s.mean(),
-            "MEDIANA": s.median(),
-            "DESVPAD": s.std(ddof=1),
-            "MÍNIMO": s.min(),
-            "MÁXIMO": s.max(),
-        }
-    )
+# Figura do cenário (traços e layout, ver figuras.figura_cenario) montada uma
+# vez por (config, cenário, versões dos arquivos); pontos, jitter e tamanho
+# são aplicados numa cópia com update_traces (ver figuras.com_estilo).
+# pontos (None = o Plotly calcula a caixa com todos os valores; "all" ou
+# "outliers" = caixa pré-calculada aqui, enviando só a amostra/outliers)
+@st.cache_resource(show_spinner=False, max_entries=32)
+def figura_base(_config: dict, chave: str, scenario: str, vale_path: str, vale_versao: str,
+                geo_path: str, geo_versao: str, pontos: str = None,
+                max_pontos: int = MAX_PONTOS_BOX) -> go.Figure:
+    data_groups, _ = montar_cenario(_config, chave, scenario, vale_path, vale_versao, geo_path, geo_versao)
+    return figura_cenario(data_groups, _config["cores"], scenario, pontos, max_pontos)
 
 
 def fmt_pt(x):
@@ -52,191 +52,159 @@ def fmt_pt(x):
 
 st.sidebar.header("⚙️ Configurações")
 
-vale_path = st.sidebar.text_input("Arquivo Vale", "testeinacio estatisca.xlsx")
-geo_path = st.sidebar.text_input("Arquivo Geocontrole", "consolidada.xlsx")
+# Caminho local ou planilha enviada (guardada pelo hash do conteúdo, ver uploads.py)
+vale_path = entrada_arquivo("Arquivo Vale", "testeinacio estatisca.xlsx", "vale")
+geo_path = entrada_arquivo("Arquivo Geocontrole", "consolidada.xlsx", "geo")
+cenarios_path = st.sidebar.text_input("Arquivo de cenários", CONFIG_PADRAO)
+
+try:
+    config = load_cenarios(cenarios_path, chave_cache(cenarios_path))
+except Exception as e:
+    st.error(f"Erro ao ler arquivo de cenários ({cenarios_path}): {e}")
+    st.stop()
 
 show_points = st.sidebar.checkbox("Mostrar pontos (jitter) sobre o boxplot", value=True)
 jitter = st.sidebar.slider("Jitter (dispersão dos pontos)", 0.0, 0.6, 0.25, 0.05)
 point_size = st.sidebar.slider("Tamanho dos pontos", 2, 10, 5, 1)
 
+caixas_servidor = st.sidebar.checkbox(
+    "Calcular as caixas no servidor (envia só outliers/amostra)", value=False,
+    help="Para grupos grandes ou conexões lentas: quartis, cercas, média e desvio são calculados aqui.",
+)
+max_pontos = MAX_PONTOS_BOX
+if caixas_servidor:
+    max_pontos = st.sidebar.slider("Máx. de pontos por caixa", 200, 20000, MAX_PONTOS_BOX, 100)
+
+calcular_ic = st.sidebar.checkbox(
+    "Intervalos de confiança (bootstrap)", value=False,
+    help="IC 95% (percentil) da média, mediana e desvio padrão de cada grupo.",
+)
+if calcular_ic:
+    reamostragens = st.sidebar.select_slider("Reamostragens", [500, 1000, 2000, 5000, 10000], REAMOSTRAGENS)
+    semente = int(st.sidebar.number_input("Semente", 0, 2**31 - 1, SEMENTE, 1))
+
+comparar = st.sidebar.checkbox(
+    "Comparar grupos (testes estatísticos)", value=False,
+    help="Mann–Whitney, KS e permutação entre cada par de grupos, com tamanhos de efeito.",
+)
+if comparar:
+    permutacoes = st.sidebar.select_slider("Permutações", [1000, 2000, 5000, 10000, 20000], PERMUTACOES)
+
 st.sidebar.markdown("---")
 st.sidebar.subheader("🎨 Cores")
 
-COLOR_GR = "#FFDCB4"
-COLOR_HD = "#C8F0C8"
-COLOR_HDA = "#FF4D4D"
-
-st.sidebar.write(f"Graníticas: {COLOR_GR}")
-st.sidebar.write(f"Hidrotermalizadas: {COLOR_HD}")
-st.sidebar.write(f"Minério HDA: {COLOR_HDA}")
+colors = config["cores"]
+for grupo, cor in colors.items():
+    st.sidebar.write(f"{grupo}: {cor}")
 
 try:
-    df_vale = load_vale(vale_path)
+    with etapa("load_vale", "carga"):
+        df_vale = load_vale(vale_path, chave_cache(vale_path))
 except Exception as e:
     st.error(f"Erro ao ler arquivo do Vale ({vale_path}): {e}")
     st.stop()
 
 try:
-    df_geo_raw, df_geo_peak = load_geo_and_peak(geo_path)
+    with etapa("load_geo_peak", "carga"):
+        df_geo_peak = load_geo_peak(geo_path, chave_cache(geo_path))
 except Exception as e:
     st.error(f"Erro ao ler arquivo da Geocontrole ({geo_path}): {e}")
     st.stop()
 
 st.success(
     f"Vale carregado: {len(df_vale)} linhas | "
-    f"Geocontrole carregado: {len(df_geo_raw)} linhas | "
+    f"Geocontrole carregado: {int(df_geo_peak['n_amostras'].sum())} linhas | "
     f"Pico por ID: {len(df_geo_peak)} IDs"
 )
 
-GR = [
-    "Granito Isotrópico (GRA)",
-    "Granito Albítico (GRB)",
-    "Granito Albítico Pegmatítico (GRBp)",
-    "Granitoide (GRN)",
-]
-
-HD_ALL_VALE = [
-    "Anfibolito (ANF)",
-    "Biotita Xisto (HDB)",
-    "Hidrotermalito (HQM)",
-    "Hidrotermalito a Anfibólio (HDA)",
-    "Hidrotermalito a Granada (HDG)",
-]
-
-HD_SEM_HDA = [
-    "Anfibolito (ANF)",
-    "Biotita Xisto (HDB)",
-    "Hidrotermalito (HQM)",
-    "Hidrotermalito a Granada (HDG)",
-]
-
-HDA_VALE = ["Hidrotermalito a Anfibólio (HDA)"]
-
-vale_gr = df_vale[df_vale["Litologia"].isin(GR)]["Tensão de Pico"].dropna()
-vale_hd_all = df_vale[df_vale["Litologia"].isin(HD_ALL_VALE)]["Tensão de Pico"].dropna()
-vale_hd_sem_hda = df_vale[df_vale["Litologia"].isin(HD_SEM_HDA)]["Tensão de Pico"].dropna()
-vale_hda = df_vale[df_vale["Litologia"].isin(HDA_VALE)]["Tensão de Pico"].dropna()
-
-geo_peak = df_geo_peak["tensao"].dropna()
-
-c1 = {
-    "Rochas graníticas": vale_gr,
-    "Rochas graníticas hidrotermalizadas": vale_hd_all,
-}
-
-c2 = {
-    "Rochas graníticas": vale_gr,
-    "Rochas graníticas hidrotermalizadas": pd.concat(
-        [vale_hd_all.reset_index(drop=True), geo_peak.reset_index(drop=True)],
-        ignore_index=True,
-    ),
-}
-
-c3 = {
-    "Rochas graníticas": vale_gr,
-    "Rochas graníticas hidrotermalizadas": vale_hd_sem_hda,
-    "Minério HDA": pd.concat(
-        [vale_hda.reset_index(drop=True), geo_peak.reset_index(drop=True)],
-        ignore_index=True,
-    ),
-}
-
-cenarios = {
-    "1": c1,
-    "2": c2,
-    "3": c3,
-}
-
-scenario = st.selectbox("Selecione o cenário:", list(cenarios.keys()), index=0)
-data_groups = cenarios[scenario]
-
-colors = {
-    "Rochas graníticas": COLOR_GR,
-    "Rochas graníticas hidrotermalizadas": COLOR_HD,
-    "Minério HDA": COLOR_HDA,
-}
-
-fig = go.Figure()
-
-for name, values in data_groups.items():
-    values = pd.Series(values).dropna().astype(float)
-    c = colors.get(name, "#CCCCCC")
-
-    fig.add_trace(
-        go.Box(
-            y=values,
-            name=f"<b>{name}</b>",
-            boxmean="sd",
-            boxpoints="all" if show_points else "outliers",
-            jitter=jitter if show_points else 0,
-            pointpos=0,
-            marker=dict(size=point_size, color=c, opacity=0.60),
-            line=dict(color=c, width=2),
-            fillcolor=c,
-            opacity=0.90,
-            hovertemplate=(
-                f"<b>{name}</b><br>"
-                "Tensão: %{y:.2f} MPa<br>"
-                "<extra></extra>"
-            ),
-        )
+scenario = st.selectbox("Selecione o cenário:", [c["id"] for c in config["cenarios"]], index=0)
+with etapa("montar_cenario", "calculo"):
+    data_groups, tab = montar_cenario(
+        config, chave_config(config), scenario,
+        vale_path, chave_cache(vale_path), geo_path, chave_cache(geo_path),
     )
 
-fig.update_layout(
-    title=dict(
-        text=f"<b>Resistência Compressão UCS — {scenario}</b>",
-        x=0.02,
-        font=dict(size=24, family="Arial Black", color="black"),
-    ),
-    yaxis=dict(
-        title=dict(
-            text="<b>Resistência à Compressão (MPa)</b>",
-            font=dict(size=20, family="Arial Black", color="black"),
-        ),
-        tickfont=dict(size=16, family="Arial Black", color="black"),
-        gridcolor="rgba(0,0,0,0.08)",
-    ),
-    xaxis=dict(
-        title=dict(
-            text="<b>Litotipo</b>",
-            font=dict(size=20, family="Arial Black", color="black"),
+with etapa("figura", "render"):
+    fig = com_estilo(
+        figura_base(
+            config, chave_config(config), scenario,
+            vale_path, chave_cache(vale_path), geo_path, chave_cache(geo_path),
+            ("all" if show_points else "outliers") if caixas_servidor else None, max_pontos,
         ),
-        tickfont=dict(size=16, family="Arial Black", color="black"),
-    ),
-    legend=dict(
-        title=dict(
-            text="<b>Grupo</b>",
-            font=dict(size=20, family="Arial Black", color="black"),
+        traces=dict(
+            boxpoints="all" if show_points else "outliers",
+            jitter=jitter if show_points else 0,
+            marker_size=point_size,
         ),
-        font=dict(size=18, family="Arial Black", color="black"),
-    ),
-    height=650,
-    plot_bgcolor="white",
-    margin=dict(l=70, r=30, t=90, b=90),
-)
+    )
 
-st.plotly_chart(fig, use_container_width=True)
+with etapa("plotly_chart", "render"):
+    st.plotly_chart(fig, use_container_width=True)
+
+# Imagem estática sem print da tela (kaleido; guardada pelo hash da figura)
+with st.expander("📥 Exportar figura (PNG / SVG / PDF)"):
+    formato = st.radio("Formato", FORMATOS, horizontal=True)
+    if st.button("Gerar imagem"):
+        try:
+            imagem = imagem_figura(fig, formato)
+        except Exception as e:
+            st.error(f"Erro ao exportar a figura: {e}")
+        else:
+            st.download_button(
+                "Baixar", imagem, file_name=f"ucs_cenario_{scenario}.{formato}", mime=MIME[formato], on_click="ignore"
+            )
 
 st.subheader("📊 Estatística calculada a partir dos dados brutos (exata)")
 
-tab = pd.DataFrame({k: stats_series(v) for k, v in data_groups.items()}).T
 tab_disp = tab.copy()
+colunas_num = ["MÉDIA", "MEDIANA", "DESVPAD", "MÍNIMO", "MÁXIMO"]
+if calcular_ic:
+    with etapa("bootstrap_cenario", "calculo"):
+        ic = bootstrap_cenario(
+            config, chave_config(config), scenario,
+            vale_path, chave_cache(vale_path), geo_path, chave_cache(geo_path), reamostragens, semente,
+        )
+    tab_disp = tab_disp.join(ic)
+    colunas_num += colunas_ic()
+    st.caption(f"IC95% por bootstrap percentil ({reamostragens} reamostragens, semente {semente}).")
 
-for col in ["MÉDIA", "MEDIANA", "DESVPAD", "MÍNIMO", "MÁXIMO"]:
+for col in colunas_num:
     tab_disp[col] = tab_disp[col].apply(fmt_pt)
 
 tab_disp["SOMA"] = tab_disp["SOMA"].astype(int)
 st.dataframe(tab_disp, use_container_width=True)
 
+if comparar:
+    st.subheader("⚖️ Comparação entre grupos")
+    st.caption(
+        "Mann–Whitney e KS bilaterais; permutação da diferença de médias "
+        f"({permutacoes} permutações, semente fixa; o p é uma estimativa de Monte Carlo e varia um pouco "
+        "com o número de permutações). Nos grupos com Geocontrole, Vale e Geocontrole entram separados."
+    )
+    with etapa("comparacao_cenario", "calculo"):
+        grupos_teste = grupos_comparacao(
+            config, scenario, indice_litologias(config, chave_config(config), vale_path, chave_cache(vale_path)),
+            df_geo_peak["tensao"].dropna(),
+        )
+        comp = comparacao_cenario(grupos_teste, chave_grupos(grupos_teste, permutacoes), permutacoes)
+    st.dataframe(
+        comp.style.format({c: "{:.4f}" for c in comp.columns if c.startswith("p ")} | {
+            c: fmt_pt for c in ["Mann–Whitney U", "KS D", "dif. médias", "delta de Cliff", "g de Hedges"]
+        }),
+        use_container_width=True, hide_index=True,
+    )
+
 with st.expander("🔎 Ver Tensão de Pico por ID (Geocontrole)"):
     cols = [c for c in ["id", "rocha", "tensao"] if c in df_geo_peak.columns]
     st.dataframe(df_geo_peak[cols].sort_values("id"), use_container_width=True)
 
 with st.expander("🧪 Checagens rápidas"):
     st.write(f"IDs Geocontrole (picos): {len(df_geo_peak)}")
-    st.write(
-        f"Vale - GR: {len(vale_gr)} | "
-        f"HD (com HDA): {len(vale_hd_all)} | "
-        f"HD (sem HDA): {len(vale_hd_sem_hda)} | "
-        f"HDA Vale: {len(vale_hda)}"
-    )
\ No newline at end of file
+    mom_vale = momentos_vale(vale_path, chave_cache(vale_path))
+    contagens = {
+        nome: int(mom_vale[mom_vale["Litologia"].isin(litologias)]["UCS|n"].sum())
+        for nome, litologias in config["litologias"].items()
+    }
+    st.write(" | ".join(f"Vale - {nome}: {n}" for nome, n in contagens.items()))
+
+painel()
\ No newline at end of file
@@ -1,86 +1,118 @@
 import streamlit as st
 import pandas as pd
-import plotly.graph_objects as go
-import random
+
+from amostragem import METODOS
+from curvas import JANELA_MODULO
+from dados import chave_cache, indice_consolidada, load_consolidada, relatorio_esquema, relatorio_limpeza, resumo_por_id
+from figuras import LIMITE_TRACOS, MODO_TRACOS, MODO_WEBGL, figura_geral, figura_individual
+from leitura import COLUNAS_CURVAS
+from medicao import controle_sidebar, etapa, painel
 
 st.set_page_config(page_title="Tensão x Deslocamento Axial", layout="wide")
+controle_sidebar("teste8")
 
 st.title("Tensão x Deslocamento Axial")
 
-df = pd.read_excel("consolidada.xlsx", engine="openpyxl")
 
-required_cols = {"id", "rocha", "def", "tensao"}
+# Gráfico geral montado uma vez por (versão do arquivo, modo, pontos, método)
+# para todas as sessões: trocar a rocha ou o ID não refaz a redução de todos
+# os ensaios
+@st.cache_resource(show_spinner=False, max_entries=8)
+def figura_geral_base(path, versao, modo, n_pontos, metodo):
+    return figura_geral(load_consolidada(path, COLUNAS_CURVAS), "def", "tensao", modo, n_pontos, metodo)
+
+
+required_cols = COLUNAS_CURVAS
+
+# As colunas são checadas no cabeçalho, antes de ler o arquivo inteiro. As
+# amostras já vêm limpas da ingestão (ordem, duplicados, picos e offset da
+# deformação, ver limpeza.py); o que saiu aparece em "Checagens do arquivo"
+try:
+    with etapa("load_consolidada", "carga"):
+        df = load_consolidada("consolidada.xlsx", required_cols)
+except ValueError:
+    df = pd.DataFrame()
+
 if not required_cols.issubset(df.columns):
     st.error("Colunas obrigatórias ausentes no arquivo")
 else:
-    df = df.copy()
-    df = df[df["def"] > 0]
+    with etapa("indice_consolidada", "filtro"):
+        indice = indice_consolidada("consolidada.xlsx")
+
+    col1, col2 = st.columns(2)
+    with col1:
+        n_pontos = st.slider("Pontos por ensaio (máx.)", 200, 20000, 2000, 100)
+    with col2:
+        metodo = st.radio("Redução de pontos", METODOS, horizontal=True)
 
     st.subheader("Gráfico individual (δ – deslocamento axial)")
 
     col1, col2 = st.columns(2)
     with col1:
-        rocha_sel = st.selectbox(
-            "Rocha",
-            sorted(df["rocha"].astype(str).unique())
-        )
+        rocha_sel = st.selectbox("Rocha", indice.rochas())
     with col2:
-        ids_disp = sorted(
-            df[df["rocha"].astype(str) == rocha_sel]["id"].unique()
-        )
-        id_sel = st.selectbox("ID", ids_disp)
-
-    df_ind = df[
-        (df["rocha"].astype(str) == rocha_sel) &
-        (df["id"] == id_sel)
-    ]
-
-    fig1 = go.Figure()
-    fig1.add_trace(
-        go.Scatter(
-            x=df_ind["def"],
-            y=df_ind["tensao"],
-            mode="markers",
-            marker=dict(size=6),
-            name=f"ID {id_sel}"
-        )
-    )
+        id_sel = st.selectbox("ID", indice.ids(rocha_sel))
 
-    fig1.update_layout(
-        xaxis_title="δ (deslocamento axial)",
-        yaxis_title="Tensão (MPa)",
-        title=f"Rocha: {rocha_sel} | Ensaio ID: {id_sel}",
-        hovermode="closest"
-    )
+    with etapa("ensaio selecionado", "filtro"):
+        df_ind = indice.ensaio(rocha_sel, id_sel)
 
-    st.plotly_chart(fig1, use_container_width=True)
+    with etapa("figura individual", "render"):
+        fig1 = figura_individual(df_ind, rocha_sel, id_sel, n_pontos, metodo)
+        st.plotly_chart(fig1, use_container_width=True)
+
+    # Módulos e características da curva: calculados com o resumo por ensaio
+    # (uma vez por versão do arquivo, ver curvas.py)
+    with etapa("resumo_consolidada", "carga"):
+        resumo = resumo_por_id("consolidada.xlsx")
+    if str(id_sel) in resumo.index:
+        linha = resumo.loc[[str(id_sel)]].iloc[0]
+        c1, c2, c3, c4, c5 = st.columns(5)
+        c1.metric("UCS (MPa)", f"{linha['tensao_pico']:.1f}")
+        c2.metric("E tangente 50% (GPa)", f"{linha['modulo_tangente_50']:.1f}")
+        c3.metric("E secante 50% (GPa)", f"{linha['modulo_secante_50']:.1f}")
+        c4.metric(f"E {JANELA_MODULO[0]:.0%}–{JANELA_MODULO[1]:.0%} UCS (GPa)", f"{linha['modulo_janela']:.1f}")
+        c5.metric("δ no pico (%)", f"{linha['def_pico']:.3f}")
 
     st.subheader("Gráfico geral – todos os ensaios (δ)")
 
-    fig2 = go.Figure()
-    random.seed(42)
-
-    for ensaio_id in sorted(df["id"].unique()):
-        df_id = df[df["id"] == ensaio_id]
-        if len(df_id) > 1:
-            cor = f"rgb({random.randint(0,255)},{random.randint(0,255)},{random.randint(0,255)})"
-            fig2.add_trace(
-                go.Scatter(
-                    x=df_id["def"],
-                    y=df_id["tensao"],
-                    mode="markers",
-                    marker=dict(size=5, color=cor),
-                    name=f"ID {ensaio_id}",
-                    opacity=0.85
-                )
-            )
-
-    fig2.update_layout(
-        xaxis_title="δ (deslocamento axial)",
-        yaxis_title="Tensão (MPa)",
-        title="Tensão x Deslocamento Axial – Laboratório Comercial - Total 30 Ensaios",
-        hovermode="closest",
-        legend=dict(itemsizing="constant")
+    modos = [MODO_TRACOS, MODO_WEBGL]
+    modo = st.radio(
+        "Renderização",
+        modos,
+        index=1 if len(indice.pares()) > LIMITE_TRACOS else 0,
+        horizontal=True
     )
 
-    st.plotly_chart(fig2, use_container_width=True)
+    with etapa("figura geral", "render"):
+        fig2 = figura_geral_base("consolidada.xlsx", chave_cache("consolidada.xlsx"), modo, n_pontos, metodo)
+        st.plotly_chart(fig2, use_container_width=True)
+
+    with st.expander("📐 Módulos e características de todos os ensaios"):
+        colunas = ["id", "rocha", "tensao_pico", "def_pico", "def_50", "modulo_tangente_50",
+                   "modulo_secante_50", "modulo_janela", "inclinacao_pos_pico"]
+        st.caption(
+            f"Módulos em GPa (def em %, tensão em MPa). Janela do ajuste linear: "
+            f"{JANELA_MODULO[0]:.0%} a {JANELA_MODULO[1]:.0%} do UCS. Inclinação pós-pico em GPa."
+        )
+        st.dataframe(resumo[[c for c in colunas if c in resumo.columns]], use_container_width=True, hide_index=True)
+
+    with st.expander("🧪 Checagens do arquivo"):
+        relatorio = relatorio_esquema("consolidada.xlsx")
+        coagidos = relatorio["coagidos"]
+        st.write(f"Valores não numéricos descartados: {coagidos if coagidos else 'nenhum'}")
+        if relatorio["float64_mantidas"]:
+            st.write(f"Colunas mantidas em float64: {', '.join(relatorio['float64_mantidas'])}")
+
+        limpeza = relatorio_limpeza("consolidada.xlsx")
+        st.write(
+            f"Limpeza das amostras: {int(limpeza['n_original'].sum())} lidas, "
+            f"{int(limpeza['duplicados'].sum())} com tempo repetido e "
+            f"{int(limpeza['picos'].sum())} picos de sensor removidos, "
+            f"{int(limpeza['n_final'].sum())} mantidas."
+        )
+        alterados = limpeza[(limpeza["duplicados"] > 0) | (limpeza["picos"] > 0) | (limpeza["offset_def"] != 0)]
+        if len(alterados):
+            st.caption("Ensaios alterados pela limpeza (offset_def: deformação inicial subtraída, em %)")
+            st.dataframe(alterados, use_container_width=True, hide_index=True)
+
+painel()
@@ -0,0 +1,182 @@
+import hashlib
+import os
+import re
+import threading
+from collections import OrderedDict
+
+import dados
+from dados import CACHE_DIR, prefixo_cache
+from leitura import caminho_tmp
+
+
+# -----------------------------
+# Planilhas enviadas pelo navegador (st.file_uploader)
+# -----------------------------
+# O arquivo enviado é gravado em CACHE_DIR/uploads com o SHA-256 do conteúdo
+# no nome e segue o mesmo caminho dos arquivos locais (Parquet, Arrow, resumo,
+# ver dados.py): o caminho e o mtime não mudam enquanto o arquivo existir,
+# então reenviar a mesma planilha, ou outro usuário enviar o mesmo arquivo,
+# reaproveita o que já foi convertido, sem ler o xlsx de novo.
+#
+# A pasta tem tamanho máximo (LIMITE_UPLOADS_MB, contando os caches derivados
+# de cada envio): passando do limite, saem os envios usados há mais tempo
+# (LRU), junto com os seus caches. O último uso fica no mtime de um arquivo
+# "<hash>.uso" ao lado (o mtime do próprio envio faz parte da chave do cache).
+# Caches de envios que não existem mais (ex.: apagados à mão) saem na poda.
+
+PASTA_UPLOADS = os.path.join(CACHE_DIR, "uploads")
+LIMITE_UPLOADS_MB = float(os.environ.get("DADOS_UPLOADS_MB", "1024"))
+EXTENSOES = (".xlsx", ".csv")
+
+_trava = threading.Lock()
+# (file_id, nome, tamanho) do Streamlit -> caminho gravado: evita refazer o
+# hash a cada rerun. Compartilhado entre as sessões (protegido por
+# _trava_enviados); cheio, sai só o envio usado há mais tempo
+_enviados = OrderedDict()
+_trava_enviados = threading.Lock()
+MAX_ENVIADOS = 256
+
+# Nome dos arquivos do cache gerados a partir de um envio (ver dados.prefixo_cache)
+_DERIVADO = re.compile(r"([0-9a-f]{64})-[0-9a-f]{8}-")
+
+
+def _marcar_uso(caminho: str):
+    uso = os.path.splitext(caminho)[0] + ".uso"
+    with open(uso, "a"):
+        pass
+    os.utime(uso)
+
+
+def _derivados(caminho: str) -> list:
+    # Arquivos do cache (dados.CACHE_DIR) gerados a partir deste envio
+    prefixo = prefixo_cache(caminho) + "-"
+    if not os.path.isdir(CACHE_DIR):
+        return []
+    return [os.path.join(CACHE_DIR, n) for n in os.listdir(CACHE_DIR) if n.startswith(prefixo)]
+
+
+def _tamanho(caminhos: list) -> int:
+    total = 0
+    for c in caminhos:
+        try:
+            total += os.path.getsize(c)
+        except OSError:
+            pass
+    return total
+
+
+def _remover(caminho: str):
+    dados.esquecer(caminho)
+    for c in [caminho, os.path.splitext(caminho)[0] + ".uso"] + _derivados(caminho):
+        try:
+            os.remove(c)
+        except OSError:
+            pass
+
+
+def _remover_orfaos(presentes: set):
+    # Caches derivados cujo envio (hash do conteúdo) não está mais na pasta
+    if not os.path.isdir(CACHE_DIR):
+        return
+    for nome in os.listdir(CACHE_DIR):
+        m = _DERIVADO.match(nome)
+        if m and m.group(1) not in presentes:
+            try:
+                os.remove(os.path.join(CACHE_DIR, nome))
+            except OSError:
+                pass
+
+
+def podar(manter: str = None, limite_mb: float = None) -> list:
+    # Remove os envios menos usados até caber no limite; devolve os removidos
+    limite = (LIMITE_UPLOADS_MB if limite_mb is None else limite_mb) * 2**20
+    if not os.path.isdir(PASTA_UPLOADS):
+        return []
+    nomes = os.listdir(PASTA_UPLOADS)
+    presentes = {os.path.splitext(n)[0] for n in nomes if n.lower().endswith(EXTENSOES)}
+    envios = []
+    for nome in nomes:
+        caminho = os.path.join(PASTA_UPLOADS, nome)
+        if nome.endswith(".uso"):
+            # Marca de um envio já removido: a memória e os caches são
+            # indexados pelo caminho com a extensão original
+            if nome[:-4] not in presentes:
+                for ext in EXTENSOES:
+                    _remover(caminho[:-4] + ext)
+            continue
+        if not nome.lower().endswith(EXTENSOES):
+            continue
+        uso = os.path.splitext(caminho)[0] + ".uso"
+        ultimo = os.path.getmtime(uso) if os.path.exists(uso) else os.path.getmtime(caminho)
+        envios.append((ultimo, caminho, _tamanho([caminho] + _derivados(caminho))))
+
+    _remover_orfaos(presentes)
+
+    total = sum(t for _, _, t in envios)
+    removidos = []
+    for _, caminho, tamanho in sorted(envios):
+        if total <= limite:
+            break
+        if manter is not None and os.path.abspath(caminho) == os.path.abspath(manter):
+            continue
+        _remover(caminho)
+        removidos.append(caminho)
+        total -= tamanho
+    return removidos
+
+
+def salvar_upload(conteudo: bytes, nome: str) -> str:
+    # Caminho local do arquivo enviado (gravado só na primeira vez)
+    ext = os.path.splitext(nome)[1].lower()
+    if ext not in EXTENSOES:
+        raise ValueError(f"Formato não suportado: {nome} (use {', '.join(EXTENSOES)})")
+    destino = os.path.join(PASTA_UPLOADS, hashlib.sha256(conteudo).hexdigest() + ext)
+    with _trava:
+        if not os.path.exists(destino):
+            os.makedirs(PASTA_UPLOADS, exist_ok=True)
+            tmp = caminho_tmp(destino)
+            with open(tmp, "wb") as f:
+                f.write(conteudo)
+            # link falha se outro processo já gravou o mesmo conteúdo: o
+            # arquivo existente (e o seu mtime) fica como está
+            try:
+                os.link(tmp, destino)
+            except FileExistsError:
+                pass
+            finally:
+                os.remove(tmp)
+        _marcar_uso(destino)
+        podar(manter=destino)
+    return destino
+
+
+# -----------------------------
+# Streamlit: caminho local ou envio
+# -----------------------------
+
+def entrada_arquivo(rotulo: str, padrao: str, key: str, container=None) -> str:
+    # Campo de caminho + envio de arquivo; o envio, se houver, tem prioridade
+    import streamlit as st
+
+    container = container or st.sidebar
+    caminho = container.text_input(rotulo, padrao, key=f"{key}_caminho")
+    enviado = container.file_uploader(f"{rotulo} (enviar)", type=[e.lstrip(".") for e in EXTENSOES], key=key)
+    if enviado is None:
+        return caminho
+    chave = (enviado.file_id, enviado.name, enviado.size)
+    with _trava_enviados:
+        destino = _enviados.get(chave)
+        if destino is not None:
+            _enviados.move_to_end(chave)
+    if destino is None or not os.path.exists(destino):
+        # Hash e gravação fora da trava; duas sessões com o mesmo envio chegam
+        # ao mesmo arquivo (nome = hash do conteúdo)
+        destino = salvar_upload(enviado.getvalue(), enviado.name)
+        with _trava_enviados:
+            _enviados[chave] = destino
+            _enviados.move_to_end(chave)
+            while len(_enviados) > MAX_ENVIADOS:
+                _enviados.popitem(last=False)
+    else:
+        _marcar_uso(destino)
+    return destino